@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from json_stream import iter_array_spans
+
+# Trường của phần tử được đưa vào index để tra cứu (company đã/chưa transform, node career path của Zippia)
+KEY_FIELDS = ('name', 'companyName', 'companyUrl', 'website', 'job_id', 'job_name', 'jobUrl')
+# Trường của từng job trong phần tử (tra một job -> company chứa nó)
+JOB_KEY_FIELDS = ('jobUrl', 'job_url')
+
+
+def index_path(path):
+    return path + '.idx'
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_index(path, output=None, key_fields=KEY_FIELDS, job_key_fields=JOB_KEY_FIELDS):
+    """
+    Quét một lượt file mảng JSON top-level, lưu vị trí byte (offset, length) của từng phần tử
+    và các khóa tra cứu vào file index SQLite bên cạnh (<path>.idx).
+    Trả về số phần tử.
+    """
+    output = output or index_path(path)
+    partial = output + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    size, mtime_ns = source_signature(path)
+
+    conn = sqlite3.connect(partial)
+    conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value)")
+    conn.execute("CREATE TABLE elements (position INTEGER PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL)")
+    conn.execute("CREATE TABLE keys (field TEXT NOT NULL, value TEXT NOT NULL, position INTEGER NOT NULL)")
+
+    count = 0
+    elements = []
+    keys = []
+
+    def flush():
+        conn.executemany("INSERT INTO elements (position, offset, length) VALUES (?, ?, ?)", elements)
+        conn.executemany("INSERT INTO keys (field, value, position) VALUES (?, ?, ?)", keys)
+        elements.clear()
+        keys.clear()
+
+    for position, (offset, length, item) in enumerate(iter_array_spans(path)):
+        elements.append((position, offset, length))
+        if isinstance(item, dict):
+            for field in key_fields:
+                value = item.get(field)
+                if value not in (None, '') and not isinstance(value, (dict, list)):
+                    keys.append((field, str(value), position))
+            for job in item.get('jobs') or []:
+                if isinstance(job, dict):
+                    for field in job_key_fields:
+                        if job.get(field):
+                            keys.append((field, str(job[field]), position))
+        count += 1
+        if len(elements) >= 10000:
+            flush()
+    flush()
+
+    # Tạo index sau khi chèn xong cho nhanh
+    conn.execute("CREATE INDEX keys_field_value ON keys (field, value)")
+    conn.executemany("INSERT INTO meta (name, value) VALUES (?, ?)",
+                     [('source', os.path.abspath(path)), ('size', size), ('mtime_ns', mtime_ns), ('count', count)])
+    conn.commit()
+    conn.close()
+    os.replace(partial, output)
+    return count
+
+
+class ArrayIndex:
+    """
+    Truy cập ngẫu nhiên vào file mảng JSON lớn qua index đã build:
+    đọc phần tử thứ n, tìm theo khóa, đọc tiếp từ phần tử n, hoặc chia file thành các khoảng byte cho nhiều worker.
+    """
+
+    def __init__(self, path, index_file=None):
+        self.path = path
+        index_file = index_file or index_path(path)
+        if not os.path.exists(index_file):
+            raise FileNotFoundError(2, "Chưa có index, hãy chạy array_index.py build", index_file)
+        self.conn = sqlite3.connect(index_file)
+        meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+        if (meta['size'], meta['mtime_ns']) != source_signature(path):
+            self.conn.close()
+            raise ValueError(f"Index {index_file} đã cũ so với {path}, hãy build lại")
+        self.count = meta['count']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def span(self, position):
+        """(offset, length) của phần tử thứ position."""
+        row = self.conn.execute("SELECT offset, length FROM elements WHERE position = ?", (position,)).fetchone()
+        if row is None:
+            raise IndexError(f"Không có phần tử {position} (file có {self.count} phần tử)")
+        return row
+
+    def read(self, position):
+        """Đọc và parse riêng phần tử thứ position, không đọc phần còn lại của file."""
+        offset, length = self.span(position)
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def find(self, field, value):
+        """Vị trí các phần tử có khóa field = value."""
+        rows = self.conn.execute("SELECT DISTINCT position FROM keys WHERE field = ? AND value = ? ORDER BY position",
+                                 (field, str(value)))
+        return [row[0] for row in rows]
+
+    def iter_range(self, start=0, stop=None):
+        """
+        Đọc tuần tự các phần tử [start, stop) theo offset trong index, không parse phần trước start.
+        Yield (position, item).
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return
+        rows = self.conn.execute("SELECT position, offset, length FROM elements WHERE position >= ? AND position < ? "
+                                 "ORDER BY position", (start, stop))
+        with open(self.path, 'rb') as f:
+            for position, offset, length in rows:
+                f.seek(offset)
+                yield position, json.loads(f.read(length))
+
+    def resume_offset(self, position):
+        """Byte để truyền vào iter_array_spans(start_offset=...) khi đọc tiếp từ phần tử position."""
+        if self.count == 0:
+            # Mảng rỗng: ngay sau dấu '[' (0 nếu không tìm thấy)
+            with open(self.path, 'rb') as f:
+                head = f.read(4096)
+            return head.find(b'[') + 1
+        if position >= self.count:
+            offset, length = self.span(self.count - 1)
+            return offset + length
+        return self.span(position)[0]
+
+    def ranges(self, parts):
+        """
+        Chia các phần tử thành `parts` khoảng có số byte gần bằng nhau cho nhiều worker.
+        Trả về list (start, stop, byte_offset, byte_length).
+        """
+        rows = self.conn.execute("SELECT offset, length FROM elements ORDER BY position").fetchall()
+        if not rows:
+            return []
+        first = rows[0][0]
+        total = rows[-1][0] + rows[-1][1] - first
+        target = total / max(1, parts)
+        result = []
+        start = 0
+        for position, (offset, length) in enumerate(rows):
+            end = offset + length - first
+            if end >= target * (len(result) + 1) or position == len(rows) - 1:
+                begin = rows[start][0]
+                result.append((start, position + 1, begin, offset + length - begin))
+                start = position + 1
+        return result
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index vị trí byte cho file mảng JSON lớn (truy cập ngẫu nhiên)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Quét file một lần và tạo <file>.idx")
+    build_parser.add_argument("input", help="File JSON mảng top-level (result.json, transformed_companies.json, ...)")
+
+    get_parser = subparsers.add_parser("get", help="In một phần tử theo vị trí hoặc theo khóa")
+    get_parser.add_argument("input")
+    get_parser.add_argument("position", nargs="?", type=int, help="Vị trí phần tử (từ 0)")
+    get_parser.add_argument("--key", nargs=2, metavar=("FIELD", "VALUE"), help="Tìm theo khóa, vd: --key jobUrl <url>")
+
+    ranges_parser = subparsers.add_parser("ranges", help="Chia file thành các khoảng byte cho nhiều worker")
+    ranges_parser.add_argument("input")
+    ranges_parser.add_argument("-n", "--parts", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            print(f"🔄 Đang tạo index cho {args.input}...")
+            started = time.monotonic()
+            count = build_index(args.input)
+            print(f"✅ Đã index {count} phần tử trong {time.monotonic() - started:.1f}s -> {index_path(args.input)}")
+            return
+
+        with ArrayIndex(args.input) as index:
+            if args.command == "get":
+                if args.key:
+                    positions = index.find(*args.key)
+                    if not positions:
+                        print(f"❌ Không tìm thấy {args.key[0]} = {args.key[1]}")
+                elif args.position is not None:
+                    positions = [args.position]
+                else:
+                    parser.error("Cần vị trí phần tử hoặc --key")
+                for position in positions:
+                    print(f"📄 Phần tử {position}:")
+                    print(json.dumps(index.read(position), ensure_ascii=False, indent=2))
+            else:
+                for start, stop, offset, length in index.ranges(args.parts):
+                    print(f"   - Phần tử {start}-{stop - 1}: byte {offset} (+{length})")
+    except FileNotFoundError as e:
+        print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+    except (ValueError, IndexError) as e:
+        print(f"❌ Lỗi: {e}")
+
+
+if __name__ == "__main__":
+    main()
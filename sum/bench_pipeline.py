@@ -0,0 +1,301 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from json_stream import JsonArrayWriter, iter_array_items
+from transform_structure import transform_company
+
+SUM_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SUM_DIR)
+
+STAGES = ('split', 'summarize', 'transform', 'pipeline')
+DEFAULT_SIZES = (10_000, 100_000)
+MAX_JOBS = 10_000_000
+
+# Mức tăng (tương đối) bị coi là hồi quy, và mức chênh tuyệt đối tối thiểu để tránh báo nhầm do nhiễu
+DEFAULT_THRESHOLD = 0.2
+MIN_SECONDS_DELTA = 0.5
+MIN_RSS_DELTA = 16 * 1024 * 1024
+
+VI_SENTENCES = [
+    "Tư vấn, giới thiệu sản phẩm và dịch vụ của công ty đến khách hàng cá nhân và doanh nghiệp",
+    "Tiếp nhận, xử lý yêu cầu và phản hồi của khách hàng qua điện thoại, email và các kênh trực tuyến",
+    "Lập kế hoạch kinh doanh theo tuần, tháng và báo cáo kết quả cho trưởng phòng",
+    "Phối hợp với các phòng ban liên quan để triển khai dự án đúng tiến độ và chất lượng",
+    "Kiểm tra, đối chiếu chứng từ, hóa đơn và hồ sơ thanh toán theo quy định của công ty",
+    "Phân tích số liệu bán hàng, đề xuất giải pháp cải thiện doanh số và mở rộng thị trường",
+    "Xây dựng và duy trì mối quan hệ lâu dài với khách hàng, đối tác và nhà cung cấp",
+    "Tham gia các buổi đào tạo nội bộ để nâng cao kỹ năng chuyên môn và nghiệp vụ",
+    "Quản lý, hướng dẫn và đánh giá hiệu quả công việc của nhân viên trong nhóm",
+    "Thiết kế, phát triển và bảo trì các tính năng mới cho hệ thống phần mềm của công ty",
+    "Thực hiện các công việc khác theo sự phân công của cấp quản lý",
+    "Chăm sóc khách hàng sau bán hàng, giải đáp thắc mắc và xử lý khiếu nại",
+    "Theo dõi công nợ, đôn đốc thu hồi công nợ đúng hạn",
+    "Lập báo cáo thuế, báo cáo tài chính định kỳ theo quy định hiện hành",
+]
+EN_SENTENCES = [
+    "Collaborate with cross-functional teams to define, design and ship new features",
+    "Write clean, maintainable and well-tested code following engineering best practices",
+    "Identify and resolve performance bottlenecks in production systems",
+    "Prepare weekly sales reports and forecasts for the regional management team",
+    "Build long-term relationships with key accounts and strategic partners",
+    "Participate in code reviews and mentor junior members of the team",
+    "Analyze customer feedback and market data to improve product quality",
+    "Coordinate with logistics and warehouse teams to ensure on-time delivery",
+    "Maintain accurate records in the CRM and follow up on qualified leads",
+    "Support the finance team with month-end closing and reconciliation",
+]
+REQUIREMENTS = [
+    "• Tốt nghiệp Cao đẳng/Đại học chuyên ngành liên quan",
+    "• Tối thiểu 1 năm kinh nghiệm ở vị trí tương đương",
+    "• Kỹ năng giao tiếp, thuyết phục và đàm phán tốt",
+    "• Sử dụng thành thạo tin học văn phòng (Word, Excel)",
+    "• Trung thực, cẩn thận, có trách nhiệm trong công việc",
+    "• Có khả năng làm việc độc lập và làm việc nhóm",
+    "• English communication skills are a plus",
+    "• At least 2 years of experience with Python or JavaScript",
+    "• Strong analytical and problem-solving skills",
+]
+ROLES = ["Nhân Viên Kinh Doanh", "Kế Toán Tổng Hợp", "Chuyên Viên Tư Vấn Tài Chính", "Nhân Viên Chăm Sóc Khách Hàng",
+         "Lập Trình Viên Backend", "Software Engineer", "Sales Executive", "Trưởng Nhóm Kinh Doanh",
+         "Chuyên Viên Tuyển Dụng", "Marketing Executive", "Nhân Viên Kho", "Data Analyst", "Giáo Viên Tiếng Anh",
+         "Kỹ Sư Xây Dựng", "Nhân Viên Hành Chính Nhân Sự", "Business Development Manager"]
+LEVELS = ["", "", "Senior ", "Junior ", "Thực Tập Sinh ", "Trưởng Phòng "]
+SUFFIXES = ["", "", "", " (HCM)", " - Hà Nội", " - Lương Cứng 10M", " (Không Yêu Cầu Kinh Nghiệm)"]
+LOCATIONS = ["Quận 1, Hồ Chí Minh", "Quận 7, Hồ Chí Minh", "Thủ Đức, Hồ Chí Minh", "Cầu Giấy, Hà Nội",
+             "Đống Đa, Hà Nội", "Hải Châu, Đà Nẵng", "Ninh Kiều, Cần Thơ", "Biên Hòa, Đồng Nai", "Remote"]
+BUDGETS = ["Thỏa thuận", "8 - 12 triệu VNĐ", "10 - 15 triệu VNĐ", "15 - 25 triệu VNĐ", "Trên 20 triệu VNĐ",
+           "Lên đến 30 triệu", "$1,000 - $2,000", "Up to $3,000", "7 triệu/tháng", "25.000đ/giờ"]
+SKILLS = ["giao tiếp", "đàm phán", "excel", "python", "javascript", "sql", "quản lý", "bán hàng", "tiếng anh",
+          "kế toán", "marketing", "lập kế hoạch", "chăm sóc khách hàng", "docker", "react"]
+INDUSTRIES = ["Tài Chính", "Ngân Hàng", "Công Nghệ Thông Tin", "Bán Lẻ", "Giáo Dục", "Bất Động Sản", "Sản Xuất"]
+COMPANY_WORDS = ["Công ty TNHH", "Công ty Cổ phần", "Tập đoàn", "Ngân hàng TMCP"]
+COMPANY_NAMES = ["Ánh Dương", "Phú Thịnh", "Minh Long", "Sao Việt", "Hoàng Gia", "Tân Phát", "Global Tech",
+                 "Thành Công", "Việt Nhật", "An Khang", "Đại Phát", "Bình Minh"]
+
+
+def random_description(rng):
+    """Mô tả dài (vài trăm tới vài nghìn ký tự) trộn tiếng Việt và tiếng Anh, dạng gạch đầu dòng như dữ liệu crawl."""
+    sentences = VI_SENTENCES if rng.random() < 0.7 else EN_SENTENCES
+    count = min(int(rng.expovariate(1 / 8)) + 3, 60)
+    return ' '.join('• ' + rng.choice(sentences) + '.' for _ in range(count))
+
+
+def generate_companies(jobs, seed=1, duplicate_rate=0.15):
+    """
+    Sinh dần companies theo định dạng dữ liệu crawl (jobsgo), transform ra đúng cấu trúc dataschema.json.
+    - số jobs mỗi company lệch (đa số ít, một số rất nhiều), tổng đúng bằng `jobs`
+    - duplicate_rate: tỷ lệ job là tin đăng lại (cùng tiêu đề/mô tả, khác URL) của một job trước đó
+    - title/location/budget/skills lặp lại nhiều như dữ liệu thật
+    """
+    rng = random.Random(seed)
+    recent = []
+    produced = 0
+    company_index = 0
+    while produced < jobs:
+        company_index += 1
+        name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_NAMES)} {company_index}"
+        count = min(jobs - produced, max(1, int(rng.paretovariate(1.3))))
+        company_jobs = []
+        for _ in range(count):
+            produced += 1
+            if recent and rng.random() < duplicate_rate:
+                job = dict(rng.choice(recent))
+            else:
+                title = f"{rng.choice(LEVELS)}{rng.choice(ROLES)}{rng.choice(SUFFIXES)}"
+                job = {
+                    'title': title,
+                    'company_info': name,
+                    'location': rng.choice(LOCATIONS),
+                    'work_arrangement': rng.choice(['Onsite', 'Hybrid', 'Remote']),
+                    'job_type': rng.choice(['Toàn thời gian', 'Bán thời gian', 'Full-time', 'Thực tập']),
+                    'description': random_description(rng),
+                    'budget': rng.choice(BUDGETS),
+                    'skills': rng.sample(SKILLS, rng.randint(2, 7)),
+                    'requirements': rng.sample(REQUIREMENTS, rng.randint(3, 7)),
+                    'status': 'Open',
+                    'createdAt': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025",
+                    'updatedAt': None,
+                    'application_deadline': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2026",
+                }
+                # Một phần nguồn đã có sẵn trường *Sum dài cần tóm tắt lại
+                if rng.random() < 0.3:
+                    job['requirementsSum'] = ' '.join(job['requirements'])
+                    job['skillsSum'] = ', '.join(job['skills'])
+                recent.append(job)
+                if len(recent) > 5000:
+                    recent.pop(rng.randrange(len(recent)))
+            job['company_info'] = name
+            job['job_url'] = f"https://jobsgo.vn/viec-lam/bench-{produced}.html"
+            company_jobs.append(job)
+        yield {
+            'companyName': name,
+            'companyUrl': f"company{company_index}.vn",
+            'description': ' '.join(rng.choice(VI_SENTENCES) + '.' for _ in range(rng.randint(2, 10))),
+            'size': rng.choice(['', '25-99', '100-499', '500-999', '1000+']),
+            'industry': rng.choice(INDUSTRIES),
+            'location': rng.sample(LOCATIONS, rng.randint(0, 3)),
+            'companyEmail': '',
+            'companyPhone': '',
+            'jobs': company_jobs,
+        }
+
+
+def generate_dataset(path, jobs, seed=1, duplicate_rate=0.15):
+    """Ghi dataset sinh ra vào path (mảng JSON compact). Trả về (số companies, số bytes)."""
+    if not 0 < jobs <= MAX_JOBS:
+        raise ValueError(f"Số jobs phải trong khoảng 1..{MAX_JOBS}")
+    with JsonArrayWriter(path, mode='compact') as writer:
+        for company in generate_companies(jobs, seed, duplicate_rate):
+            writer.write(company)
+    return writer.count, writer.bytes_written
+
+
+def check_schema(path):
+    """Kiểm tra company đầu tiên sau khi transform có đúng các trường của dataschema.json."""
+    with open(os.path.join(ROOT_DIR, 'dataschema.json'), 'r', encoding='utf-8') as f:
+        schema = json.load(f)[0]
+    company = transform_company(next(iter_array_items(path)))
+    if set(company) != set(schema) or set(company['jobs'][0]) != set(schema['jobs'][0]):
+        raise ValueError("Dữ liệu sinh ra không khớp dataschema.json sau khi transform")
+
+
+def stage_commands(stage, data_file, workers):
+    """Lệnh chạy từng stage (chạy trong thư mục làm việc của benchmark)."""
+    python = sys.executable
+    if stage == 'split':
+        return [python, os.path.join(SUM_DIR, 'split_json.py'), data_file, '--jobs', '10000',
+                '-o', os.path.join('shards', 'part-{}.json')]
+    if stage == 'summarize':
+        return [python, os.path.join(SUM_DIR, 'summarized_jobs.py'), '-i', data_file,
+                '-o', 'summarized_companies.json', '-w', str(workers), '--progress-interval', '3600']
+    if stage == 'transform':
+        # transform_structure.py đọc summarized_companies.json trong thư mục hiện tại (kết quả của stage summarize)
+        return [python, os.path.join(SUM_DIR, 'transform_structure.py')]
+    return [python, os.path.join(SUM_DIR, 'pipeline.py'), '-i', data_file, '-o', 'pipeline_companies.json']
+
+
+def run_stage(stage, data_file, workdir, workers):
+    """Chạy một stage trong process riêng, trả về {seconds, peakRssBytes, bytesWritten}."""
+    if stage == 'split':
+        shutil.rmtree(os.path.join(workdir, 'shards'), ignore_errors=True)
+        os.makedirs(os.path.join(workdir, 'shards'))
+    metrics_file = os.path.join(workdir, f'{stage}.metrics.json')
+    command = stage_commands(stage, data_file, workers) + ['--metrics', metrics_file]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - started
+    if result.returncode != 0 or not os.path.exists(metrics_file):
+        raise RuntimeError(f"Stage {stage} lỗi (mã {result.returncode}): {result.stderr.strip()[-500:]}")
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    os.remove(metrics_file)
+    return {
+        'seconds': round(seconds, 3),
+        'peakRssBytes': report['memory']['peakRssBytes'],
+        'bytesWritten': report['bytes']['written'],
+    }
+
+
+def compare(results, baseline, threshold):
+    """Danh sách mô tả các hồi quy so với baseline (thời gian, RSS, số bytes ghi ra)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        checks = [('seconds', MIN_SECONDS_DELTA), ('peakRssBytes', MIN_RSS_DELTA), ('bytesWritten', 0)]
+        for metric, min_delta in checks:
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append(f"{key} {metric}: {old} -> {new} (+{(new - old) / old:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các stage xử lý trên dữ liệu giả lập nhiều kích thước")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Chỉ sinh dataset giả lập")
+    generate_parser.add_argument("-n", "--jobs", type=int, default=DEFAULT_SIZES[0], help="Số jobs")
+    generate_parser.add_argument("-o", "--output", default='bench_companies.json')
+
+    run_parser = subparsers.add_parser("run", help="Sinh dữ liệu, chạy các stage và so sánh với baseline")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                            help=f"Số jobs của từng dataset (tối đa {MAX_JOBS})")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--workers", type=int, default=1, help="Số process của stage summarize")
+    run_parser.add_argument("--workdir", help="Thư mục làm việc (mặc định: thư mục tạm, xóa sau khi chạy)")
+    run_parser.add_argument("--results", default='bench_results.json', help="File ghi kết quả")
+    run_parser.add_argument("--baseline", help="File baseline để so sánh (vd: bench_baseline.json)")
+    run_parser.add_argument("--update-baseline", action="store_true", help="Ghi kết quả lần này làm baseline mới")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Mức tăng tương đối bị coi là hồi quy (0.2 = 20%%)")
+
+    for sub in (generate_parser, run_parser):
+        sub.add_argument("--seed", type=int, default=1)
+        sub.add_argument("--duplicate-rate", type=float, default=0.15, help="Tỷ lệ tin đăng lại")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "generate":
+            companies, size = generate_dataset(args.output, args.jobs, args.seed, args.duplicate_rate)
+            print(f"✅ Đã sinh {args.jobs} jobs / {companies} companies ({size} bytes) -> {args.output}")
+            return
+
+        workdir = args.workdir or tempfile.mkdtemp(prefix='bench_pipeline_')
+        os.makedirs(workdir, exist_ok=True)
+        results = {}
+        try:
+            for jobs in args.sizes:
+                data_file = os.path.join(workdir, f'bench_{jobs}.json')
+                started = time.perf_counter()
+                companies, size = generate_dataset(data_file, jobs, args.seed, args.duplicate_rate)
+                check_schema(data_file)
+                print(f"📄 {jobs} jobs / {companies} companies ({size / 1e6:.1f} MB), "
+                      f"sinh trong {time.perf_counter() - started:.1f}s")
+                for stage in args.stages:
+                    result = run_stage(stage, data_file, workdir, args.workers)
+                    results[f"{jobs}:{stage}"] = result
+                    print(f"   - {stage:<10} {result['seconds']:>9.2f}s  "
+                          f"RSS {(result['peakRssBytes'] or 0) / 1e6:>8.1f} MB  ghi {result['bytesWritten'] / 1e6:>8.1f} MB")
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Đã ghi kết quả: {args.results}")
+
+        if args.baseline and args.update_baseline:
+            with open(args.baseline, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"💾 Đã cập nhật baseline: {args.baseline}")
+        elif args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, args.threshold)
+            if regressions:
+                print(f"❌ Hồi quy vượt ngưỡng {args.threshold:.0%} so với {args.baseline}:")
+                for line in regressions:
+                    print(f"   - {line}")
+                sys.exit(1)
+            print(f"✅ Không có hồi quy so với {args.baseline}")
+    except FileNotFoundError as e:
+        print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+        sys.exit(1)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Lỗi: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from json_stream import iter_array_items
+from records import Company
+from transform_structure import transform_company
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_companies(encoded, scale):
+    """Parse lại dữ liệu mẫu scale lần (mỗi lần là các object riêng, như khi đọc một file lớn)."""
+    companies = []
+    for _ in range(scale):
+        companies.extend(json.loads(encoded))
+    return companies
+
+
+def measure(build):
+    """(kết quả, bytes Python còn giữ sau khi build, giây)."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh bộ nhớ giữ companies dạng dict và dạng record gọn (records.py)")
+    parser.add_argument("input", nargs="?", default=os.path.join(ROOT_DIR, 'jobsgo', 'data.json'),
+                        help="File companies (dữ liệu crawl) dùng làm mẫu")
+    parser.add_argument("--scale", type=int, default=10, help="Nhân bản dữ liệu mẫu bao nhiêu lần")
+    args = parser.parse_args()
+
+    sample = [transform_company(company) for company in iter_array_items(args.input)]
+    encoded = json.dumps(sample, ensure_ascii=False)
+    jobs = sum(len(company['jobs']) for company in sample) * args.scale
+    print(f"📄 {len(sample) * args.scale} companies, {jobs} jobs, {len(encoded.encode('utf-8')) * args.scale} bytes JSON")
+
+    dicts, dict_bytes, dict_seconds = measure(lambda: load_companies(encoded, args.scale))
+    del dicts
+    records, record_bytes, record_seconds = measure(
+        lambda: [Company.from_dict(company) for company in load_companies(encoded, args.scale)])
+
+    started = time.perf_counter()
+    restored = [record.to_dict() for record in records]
+    to_dict_seconds = time.perf_counter() - started
+    lossless = restored == load_companies(encoded, args.scale)
+
+    print(f"{'dạng':<8} {'bytes':>14} {'bytes/job':>10} {'giây':>8}")
+    print(f"{'dict':<8} {dict_bytes:>14} {dict_bytes // max(jobs, 1):>10} {dict_seconds:>8.3f}")
+    print(f"{'record':<8} {record_bytes:>14} {record_bytes // max(jobs, 1):>10} {record_seconds:>8.3f}")
+    print(f"💾 Tiết kiệm {1 - record_bytes / dict_bytes:.1%} bộ nhớ, to_dict() mất {to_dict_seconds:.3f}s")
+    print(f"{'✅' if lossless else '❌'} Chuyển đổi dict -> record -> dict {'không' if lossless else 'bị'} mất dữ liệu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+
+import json_stream
+from json_stream import OUTPUT_MODES, iter_array_items, open_writer, output_path
+from transform_structure import transform_company
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def zstd_available():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_all(companies, path, mode, compression):
+    started = time.perf_counter()
+    with open_writer(path, mode, compression) as writer:
+        for company in companies:
+            writer.write(company)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh số byte ghi ra và thời gian của các chế độ ghi file")
+    parser.add_argument("input", nargs="?", default=os.path.join(ROOT_DIR, 'jobsgo', 'data.json'),
+                        help="File companies (dữ liệu crawl) dùng làm mẫu")
+    parser.add_argument("--scale", type=int, default=10, help="Nhân bản dữ liệu mẫu bao nhiêu lần")
+    args = parser.parse_args()
+
+    companies = [transform_company(company) for company in iter_array_items(args.input)] * args.scale
+    print(f"📄 {len(companies)} companies, {sum(len(c['jobs']) for c in companies)} jobs")
+
+    compressions = [None, 'gzip'] + (['zstd'] if zstd_available() else [])
+    backends = ['json'] + (['orjson'] if json_stream.orjson is not None else [])
+    fast_encoder = json_stream.orjson
+
+    print(f"{'mode':<8} {'nén':<5} {'encoder':<7} {'bytes':>12} {'giây':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in OUTPUT_MODES:
+            for compression in compressions:
+                # Chế độ pretty luôn dùng json của thư viện chuẩn để giữ nguyên định dạng cũ
+                for backend in (['json'] if mode == 'pretty' else backends):
+                    json_stream.orjson = fast_encoder if backend == 'orjson' else None
+                    path = output_path(os.path.join(tmp_dir, f"out-{mode}-{backend}"), mode, compression)
+                    seconds = write_all(companies, path, mode, compression)
+                    size = os.path.getsize(path)
+                    print(f"{mode:<8} {compression or '-':<5} {backend:<7} {size:>12} {seconds:>8.3f}")
+    json_stream.orjson = fast_encoder
+
+    if not zstd_available():
+        print("ℹ️  Chưa cài 'zstandard' nên bỏ qua chế độ nén zstd")
+
+
+if __name__ == "__main__":
+    main()
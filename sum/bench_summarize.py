@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+from summarized_jobs import summarize_text
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FILES = [os.path.join(ROOT_DIR, 'zippia-jobs.json'), os.path.join(ROOT_DIR, 'result12123.json')]
+
+
+def summarize_text_legacy(text, max_length=200):
+    """Bản summarize_text cũ, giữ lại để so sánh kết quả và tốc độ."""
+    if len(text) <= max_length:
+        return text
+
+    sentences = re.split(r'[.;]\s+|- |\n', text.strip())
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    summary = ''
+    for sentence in sentences:
+        if len(summary + sentence) < max_length - 2:
+            summary += sentence + '. '
+        else:
+            break
+
+    if not summary:
+        summary = text[:max_length].rsplit(' ', 1)[0]
+
+    return summary.rstrip('. ')
+
+
+def collect_texts(value, texts, min_length=50):
+    """Lấy tất cả chuỗi dài hơn min_length ký tự trong dữ liệu (description, overview, ...)."""
+    if isinstance(value, str):
+        if len(value) > min_length:
+            texts.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            collect_texts(item, texts, min_length)
+    elif isinstance(value, list):
+        for item in value:
+            collect_texts(item, texts, min_length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarize_text cũ và mới")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES, help="Các file JSON lấy văn bản mẫu")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Số lần lặp khi đo thời gian")
+    parser.add_argument("--max-length", type=int, default=200)
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            collect_texts(json.load(f), texts)
+    print(f"📄 Đã lấy {len(texts)} đoạn văn bản từ {len(args.files)} file")
+
+    # Kiểm tra kết quả giống hệt bản cũ
+    mismatches = [t for t in texts
+                  if summarize_text(t, args.max_length) != summarize_text_legacy(t, args.max_length)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} đoạn văn bản cho kết quả khác bản cũ, vd: {mismatches[0][:100]!r}")
+        sys.exit(1)
+    print("✅ Kết quả giống hệt bản cũ")
+
+    results = {}
+    for name, func in (('legacy', summarize_text_legacy), ('optimized', summarize_text)):
+        seconds = min(timeit.repeat(lambda: [func(t, args.max_length) for t in texts],
+                                    number=1, repeat=args.repeat))
+        results[name] = seconds
+        print(f"⏱️  {name:<9}: {seconds * 1000:.1f} ms ({len(texts) / seconds:.0f} văn bản/s)")
+
+    print(f"🚀 Nhanh hơn {results['legacy'] / results['optimized']:.2f} lần")
+
+
+if __name__ == "__main__":
+    main()
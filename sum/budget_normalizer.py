@@ -0,0 +1,175 @@
+import argparse
+import json
+import re
+from functools import lru_cache
+
+from json_stream import iter_records
+
+# Hệ số nhân theo đơn vị viết tắt / chữ
+MULTIPLIERS = {
+    'k': 1_000, 'nghìn': 1_000, 'ngàn': 1_000, 'ngan': 1_000, 'nghin': 1_000,
+    'tr': 1_000_000, 'triệu': 1_000_000, 'trieu': 1_000_000, 'm': 1_000_000, 'million': 1_000_000,
+    'tỷ': 1_000_000_000, 'tỉ': 1_000_000_000, 'ty': 1_000_000_000, 'billion': 1_000_000_000,
+}
+
+NUMBER_RE = re.compile(
+    r'(\d+(?:[.,]\d+)*)\s*(k|nghìn|ngàn|ngan|nghin|triệu|trieu|tr|tỷ|tỉ|ty|million|billion|m)?(?![a-zà-ỹ])',
+    re.IGNORECASE)
+NEGOTIABLE_RE = re.compile(r'thỏa thuận|thoả thuận|thoa thuan|thương lượng|negotia|competitive|cạnh tranh', re.IGNORECASE)
+USD_RE = re.compile(r'\$|\busd\b|\bus\$', re.IGNORECASE)
+VND_RE = re.compile(r'vnđ|vnd|đồng|\bđ\b|₫', re.IGNORECASE)
+MIN_ONLY_RE = re.compile(r'^\s*(từ|tu|trên|tren|hơn|hon|from|over|above|at least|min(?:imum)?)\b', re.IGNORECASE)
+MAX_ONLY_RE = re.compile(r'^\s*(đến|den|tới|toi|lên đến|len den|lên tới|up to|upto|dưới|duoi|under|below|max(?:imum)?)\b',
+                         re.IGNORECASE)
+PERIOD_PATTERNS = [
+    ('hour', re.compile(r'/\s*(giờ|gio|h|hr|hour)\b|per hour|an hour|hourly|mỗi giờ|một giờ', re.IGNORECASE)),
+    ('day', re.compile(r'/\s*(ngày|ngay|day)\b|per day|a day|daily|mỗi ngày|một ngày', re.IGNORECASE)),
+    ('week', re.compile(r'/\s*(tuần|tuan|week|wk)\b|per week|a week|weekly', re.IGNORECASE)),
+    ('year', re.compile(r'/\s*(năm|nam|year|yr)\b|per year|a year|yearly|annual|per annum|mỗi năm', re.IGNORECASE)),
+    ('month', re.compile(r'/\s*(tháng|thang|month|mo)\b|per month|a month|monthly|mỗi tháng', re.IGNORECASE)),
+]
+
+# Lương VND không có đơn vị (triệu/k) mà nhỏ hơn mức này thì coi là dữ liệu lỗi (vd: "2 Đ")
+MIN_PLAIN_VND = 1_000
+
+EMPTY_BUDGET = ('', '', '', '')
+
+
+def parse_number(token, has_multiplier):
+    """
+    '12' -> 12, '12.5' / '12,5' (có đơn vị triệu/k) -> 12.5,
+    '500,000' / '1.500.000' (không đơn vị) -> dấu phân cách hàng nghìn.
+    """
+    separators = re.findall(r'[.,]', token)
+    if not separators:
+        return float(token)
+    groups = re.split(r'[.,]', token)
+    thousands = (len(separators) > 1 and len(set(separators)) == 1) or (not has_multiplier and len(groups[-1]) == 3)
+    if thousands and all(len(group) == 3 for group in groups[1:]):
+        return float(''.join(groups))
+    if len(separators) == 1:
+        return float(token.replace(',', '.'))
+    # Kiểu 1,500.50: ',' phân cách nghìn, '.' thập phân
+    return float(token.replace(',', ''))
+
+
+def as_number(value):
+    return int(value) if value == int(value) else value
+
+
+@lru_cache(maxsize=65536)
+def parse_budget(raw):
+    """
+    Phân tích chuỗi lương thô thành (min, max, currency, period).
+    - min/max: số tiền tuyệt đối (vd: '10 - 15 triệu VNĐ' -> 10000000, 15000000), '' nếu không có
+    - currency: 'VND' | 'USD' | ''
+    - period: 'hour' | 'day' | 'week' | 'month' | 'year' | ''
+    Chuỗi 'Thỏa thuận', không đọc được hoặc không có đơn vị tiền / hệ số / kỳ trả lương
+    (vd: '3 - 5 năm kinh nghiệm') trả về toàn ''. Số kết thúc bằng '+' ('$100k+') là mức tối thiểu, không có max.
+    Kết quả được memoize vì cùng một chuỗi lương lặp lại rất nhiều.
+    """
+    if not raw or NEGOTIABLE_RE.search(raw):
+        return EMPTY_BUDGET
+
+    text = raw.strip()
+    found = list(NUMBER_RE.finditer(text))
+    if not found:
+        return EMPTY_BUDGET
+    matches = [match.groups() for match in found]
+
+    # Đơn vị viết sau số cuối (vd: '10 - 15 triệu') áp dụng cho cả khoảng
+    shared_unit = next((unit for _, unit in reversed(matches) if unit), '')
+    values = []
+    for token, unit in matches[:2]:
+        unit = (unit or shared_unit).lower()
+        multiplier = MULTIPLIERS.get(unit, 1)
+        values.append(parse_number(token, bool(unit)) * multiplier)
+
+    if USD_RE.search(text):
+        currency = 'USD'
+    elif VND_RE.search(text) or shared_unit.lower() in ('triệu', 'trieu', 'tr', 'tỷ', 'tỉ', 'ty', 'nghìn', 'ngàn', 'ngan', 'nghin'):
+        currency = 'VND'
+    else:
+        currency = ''
+
+    if currency == 'VND' and not shared_unit and max(values) < MIN_PLAIN_VND:
+        return EMPTY_BUDGET
+
+    period = next((name for name, pattern in PERIOD_PATTERNS if pattern.search(text)), '')
+    if not currency and not shared_unit and not period:
+        # Số không kèm tiền tệ / đơn vị / kỳ trả lương thì không phải lương
+        return EMPTY_BUDGET
+    if not period and currency == 'VND':
+        # Tin tuyển dụng trong nước mặc định lương theo tháng
+        period = 'month'
+
+    if len(values) >= 2:
+        low, high = sorted(values[:2])
+    elif MAX_ONLY_RE.search(text):
+        low, high = '', values[0]
+    elif MIN_ONLY_RE.search(text) or text[found[0].end():].lstrip().startswith('+'):
+        low, high = values[0], ''
+    else:
+        low = high = values[0]
+
+    return (as_number(low) if low != '' else '', as_number(high) if high != '' else '', currency, period)
+
+
+def raw_budget(job):
+    """Chuỗi lương thô của job đã transform (trường budget), hoặc '' nếu không có."""
+    value = job.get('budget')
+    return value if isinstance(value, str) else ''
+
+
+def normalize_budgets(jobs):
+    """
+    Chuẩn hóa lương cho cả danh sách jobs (đã transform) trong một lượt:
+    gom các chuỗi khác nhau, phân tích mỗi chuỗi một lần rồi gán lại budgetMin/budgetMax/budgetCurrency/budgetPeriod.
+    Job có chuỗi không đọc được giữ nguyên budgetMin/budgetMax cũ.
+    Trả về số job đã có khoảng lương.
+    """
+    parsed = {raw: parse_budget(raw) for raw in {raw_budget(job) for job in jobs}}
+    normalized = 0
+    for job in jobs:
+        low, high, currency, period = parsed[raw_budget(job)]
+        if low == '' and high == '':
+            continue
+        job['budgetMin'] = low
+        job['budgetMax'] = high
+        job['budgetCurrency'] = currency
+        job['budgetPeriod'] = period
+        normalized += 1
+    return normalized
+
+
+def budget_stage(companies, totals=None):
+    """Stage chuẩn hóa lương cho pipeline: xử lý theo từng company (tất cả jobs cùng lúc)."""
+    for company in companies:
+        count = normalize_budgets(company.get('jobs') or [])
+        if totals is not None:
+            totals['budgets'] = totals.get('budgets', 0) + count
+        yield company
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thống kê kết quả chuẩn hóa lương (budget) của một file đã transform")
+    parser.add_argument("input", nargs="?", default='transformed_companies.json',
+                        help="File transformed_companies.json hoặc .jsonl")
+    parser.add_argument("--show", type=int, default=20, help="Số chuỗi lương phổ biến nhất cần in ra")
+    args = parser.parse_args()
+
+    counts = {}
+    for company in iter_records(args.input):
+        for job in company.get('jobs') or []:
+            raw = raw_budget(job)
+            counts[raw] = counts.get(raw, 0) + 1
+
+    total = sum(counts.values())
+    parsed_jobs = sum(count for raw, count in counts.items() if parse_budget(raw) != EMPTY_BUDGET)
+    print(f"📊 {total} jobs, {len(counts)} chuỗi lương khác nhau, {parsed_jobs} jobs có khoảng lương")
+    for raw, count in sorted(counts.items(), key=lambda item: -item[1])[:args.show]:
+        print(f"   {count:>6}  {raw!r:<35} -> {json.dumps(parse_budget(raw), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+from json_stream import iter_array_items
+
+GRAPH_MAGIC = b'CPG2'
+DEFAULT_MAX_DEPTH = 4
+
+# Thứ tự các mảng khi ghi file
+ARRAY_NAMES = ('out_offsets', 'out_targets', 'in_offsets', 'in_sources',
+               'down_offsets', 'down_nodes', 'down_depths', 'up_offsets', 'up_nodes', 'up_depths')
+# Offsets là int64 (tổng số phần tử của bao đóng có thể vượt 2^31), id node và độ sâu là int32
+ARRAY_TYPECODES = {name: 'q' if name.endswith('_offsets') else 'i' for name in ARRAY_NAMES}
+
+
+def normalize_name(name):
+    """Khóa của node: tên job chữ thường, gộp khoảng trắng (giống nameNorm của JobTitleAlias)."""
+    return ' '.join((name or '').lower().split())
+
+
+def iter_edges(node):
+    """
+    Các cạnh (tên nguồn, tên đích) của một node career path (result.json / zippia-jobs.json):
+    parents -> node, node -> children, node -> nextId.
+    Dùng tên thay vì jobid vì dữ liệu crawl có nhiều job khác nhau trùng jobid.
+    """
+    job_name = node.get('job_name', '')
+    for parent in node.get('parents') or []:
+        yield parent.get('jobtitle', ''), job_name
+    for child in (node.get('children') or []) + (node.get('nextId') or []):
+        if isinstance(child, dict):
+            yield job_name, child.get('jobtitle', '')
+
+
+def build_csr(count, pairs):
+    """CSR từ danh sách cặp (nguồn, đích) đã bỏ trùng: offsets[i]:offsets[i+1] là các đích của i."""
+    offsets = array('q', [0]) * (count + 1)
+    for source, _ in pairs:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    targets = array('i', [0]) * len(pairs)
+    cursor = offsets[:-1]
+    for source, target in sorted(pairs):
+        targets[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, targets
+
+
+def build_closure(count, offsets, targets, max_depth):
+    """
+    Bao đóng bắc cầu giới hạn độ sâu (giống bảng JobClosure trong zippia/career-path.md):
+    với mỗi node, các node đi tới được trong 1..max_depth bước kèm khoảng cách ngắn nhất, sắp theo khoảng cách.
+    """
+    closure_offsets = array('q', [0])
+    nodes = array('i')
+    depths = array('i')
+    for start in range(count):
+        seen = {start}
+        frontier = [start]
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for target in targets[offsets[node]:offsets[node + 1]]:
+                    if target not in seen:
+                        seen.add(target)
+                        next_frontier.append(target)
+            if not next_frontier:
+                break
+            next_frontier.sort()
+            nodes.extend(next_frontier)
+            depths.extend([depth] * len(next_frontier))
+            frontier = next_frontier
+        closure_offsets.append(len(nodes))
+    return closure_offsets, nodes, depths
+
+
+class CareerGraph:
+    """
+    Đồ thị career path gọn: mỗi job (theo tên đã chuẩn hóa) được đổi thành số nguyên, cạnh lưu dạng CSR
+    (offsets int64, id node int32) theo cả hai chiều, kèm bao đóng tổ tiên/hậu duệ đã tính sẵn tới max_depth bước.
+    """
+
+    def __init__(self, names, job_ids, arrays, max_depth):
+        self.names = names
+        self.job_ids = job_ids
+        self.max_depth = max_depth
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.name_index = {normalize_name(name): i for i, name in enumerate(names)}
+        self.job_id_index = {}
+        for i, job_id in enumerate(job_ids):
+            if job_id:
+                self.job_id_index.setdefault(job_id, []).append(i)
+
+    @classmethod
+    def from_files(cls, paths, max_depth=DEFAULT_MAX_DEPTH):
+        """Build từ một hoặc nhiều file node career path (đọc dần, không load cả file)."""
+        names = []
+        job_ids = []
+        name_index = {}
+        edges = set()
+
+        def node_id(name):
+            key = normalize_name(name)
+            i = name_index.get(key)
+            if i is None:
+                i = name_index[key] = len(names)
+                names.append(name.strip())
+                job_ids.append('')
+            return i
+
+        for path in paths:
+            for node in iter_array_items(path):
+                if not normalize_name(node.get('job_name')):
+                    continue
+                i = node_id(node['job_name'])
+                job_ids[i] = job_ids[i] or node.get('job_id') or ''
+                for from_name, to_name in iter_edges(node):
+                    if normalize_name(from_name) and normalize_name(to_name):
+                        edge = (node_id(from_name), node_id(to_name))
+                        if edge[0] != edge[1]:
+                            edges.add(edge)
+
+        count = len(names)
+        arrays = {}
+        arrays['out_offsets'], arrays['out_targets'] = build_csr(count, edges)
+        arrays['in_offsets'], arrays['in_sources'] = build_csr(count, {(b, a) for a, b in edges})
+        arrays['down_offsets'], arrays['down_nodes'], arrays['down_depths'] = build_closure(
+            count, arrays['out_offsets'], arrays['out_targets'], max_depth)
+        arrays['up_offsets'], arrays['up_nodes'], arrays['up_depths'] = build_closure(
+            count, arrays['in_offsets'], arrays['in_sources'], max_depth)
+        return cls(names, job_ids, arrays, max_depth)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.out_targets)
+
+    def save(self, path):
+        """
+        Ghi đồ thị ra một file nhị phân: magic, độ dài header,
+        header JSON (names, job_ids, độ dài và typecode từng mảng), các mảng theo thứ tự ARRAY_NAMES.
+        """
+        header = json.dumps({'names': self.names, 'job_ids': self.job_ids, 'max_depth': self.max_depth,
+                             'arrays': {name: len(getattr(self, name)) for name in ARRAY_NAMES},
+                             'typecodes': ARRAY_TYPECODES},
+                            ensure_ascii=False).encode('utf-8')
+        with open(path + '.partial', 'wb') as f:
+            f.write(GRAPH_MAGIC + struct.pack('<I', len(header)) + header)
+            for name in ARRAY_NAMES:
+                values = getattr(self, name)
+                if values.typecode != ARRAY_TYPECODES[name]:
+                    raise ValueError(f"Mảng {name} phải có typecode '{ARRAY_TYPECODES[name]}'")
+                f.write(values.tobytes())
+        os.replace(path + '.partial', path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(4) != GRAPH_MAGIC:
+                raise ValueError(f"'{path}' không phải file career graph")
+            header_length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length))
+            arrays = {}
+            for name in ARRAY_NAMES:
+                values = array(header['typecodes'][name])
+                values.frombytes(f.read(header['arrays'][name] * values.itemsize))
+                arrays[name] = values
+        return cls(header['names'], header['job_ids'], arrays, header['max_depth'])
+
+    def find(self, query):
+        """Node theo tên (không phân biệt hoa thường) hoặc theo job_id (một job_id có thể ứng với nhiều node)."""
+        key = normalize_name(query)
+        if key in self.name_index:
+            return [self.name_index[key]]
+        return self.job_id_index.get(query, [])
+
+    def successors(self, node):
+        return self.out_targets[self.out_offsets[node]:self.out_offsets[node + 1]].tolist()
+
+    def predecessors(self, node):
+        return self.in_sources[self.in_offsets[node]:self.in_offsets[node + 1]].tolist()
+
+    def _closure(self, node, k, offsets, nodes, depths, step):
+        if k > self.max_depth:
+            return self._bfs(node, k, step)
+        start, end = offsets[node], offsets[node + 1]
+        # Bao đóng đã sắp theo độ sâu -> cắt bằng tìm kiếm nhị phân
+        end = bisect_right(depths, k, start, end)
+        return list(zip(nodes[start:end].tolist(), depths[start:end].tolist()))
+
+    def _bfs(self, node, k, step):
+        seen = {node: 0}
+        queue = deque([node])
+        result = []
+        while queue:
+            current = queue.popleft()
+            depth = seen[current]
+            if depth == k:
+                continue
+            for other in step(current):
+                if other not in seen:
+                    seen[other] = depth + 1
+                    result.append((other, depth + 1))
+                    queue.append(other)
+        return result
+
+    def descendants(self, node, k=1):
+        """Các vai trò có thể chuyển tới từ node trong tối đa k bước: list (node, số bước ngắn nhất)."""
+        return self._closure(node, k, self.down_offsets, self.down_nodes, self.down_depths, self.successors)
+
+    def ancestors(self, node, k=1):
+        """Các vai trò dẫn tới node trong tối đa k bước: list (node, số bước ngắn nhất)."""
+        return self._closure(node, k, self.up_offsets, self.up_nodes, self.up_depths, self.predecessors)
+
+    def shortest_path(self, source, target):
+        """Đường đi ngắn nhất source -> target (list node), hoặc None nếu không có."""
+        if source == target:
+            return [source]
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for other in self.successors(current):
+                if other in previous:
+                    continue
+                previous[other] = current
+                if other == target:
+                    path = [other]
+                    while previous[path[-1]] is not None:
+                        path.append(previous[path[-1]])
+                    return path[::-1]
+                queue.append(other)
+        return None
+
+    def describe(self, node):
+        return self.names[node]
+
+
+def resolve(graph, query):
+    nodes = graph.find(query)
+    if not nodes:
+        raise ValueError(f"Không tìm thấy job '{query}' trong đồ thị")
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đồ thị career path (CSR) với bao đóng tính sẵn")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build đồ thị từ các file node career path")
+    build_parser.add_argument("inputs", nargs="*", default=['result.json'], help="result.json, zippia-jobs.json, ...")
+    build_parser.add_argument("-o", "--output", default='career_graph.bin', help="File đồ thị đã build")
+    build_parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH, help="Độ sâu bao đóng tính sẵn")
+
+    for command, help_text in (("from", "Các vai trò có thể chuyển tới từ một job trong k bước"),
+                               ("to", "Các vai trò dẫn tới một job trong k bước")):
+        query_parser = subparsers.add_parser(command, help=help_text)
+        query_parser.add_argument("job", help="Tên hoặc job_id")
+        query_parser.add_argument("-k", type=int, default=2, help="Số bước tối đa")
+        query_parser.add_argument("-g", "--graph", default='career_graph.bin')
+
+    path_parser = subparsers.add_parser("path", help="Đường chuyển nghề ngắn nhất giữa hai job")
+    path_parser.add_argument("source")
+    path_parser.add_argument("target")
+    path_parser.add_argument("-g", "--graph", default='career_graph.bin')
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            started = time.monotonic()
+            graph = CareerGraph.from_files(args.inputs, args.max_depth)
+            graph.save(args.output)
+            print(f"✅ Đã build {len(graph)} node, {graph.edge_count} cạnh trong {time.monotonic() - started:.2f}s "
+                  f"-> {args.output}")
+            return
+
+        graph = CareerGraph.load(args.graph)
+        if args.command == "path":
+            for source in resolve(graph, args.source):
+                for target in resolve(graph, args.target):
+                    path = graph.shortest_path(source, target)
+                    if path:
+                        print(" -> ".join(graph.describe(node) for node in path))
+                        return
+            print("❌ Không có đường đi")
+            return
+
+        for node in resolve(graph, args.job):
+            related = graph.descendants(node, args.k) if args.command == "from" else graph.ancestors(node, args.k)
+            print(f"🔍 {graph.describe(node)}: {len(related)} vai trò trong {args.k} bước")
+            for other, depth in related:
+                print(f"   {depth}  {graph.describe(other)}")
+    except FileNotFoundError as e:
+        print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+    except ValueError as e:
+        print(f"❌ Lỗi: {e}")
+
+
+if __name__ == "__main__":
+    main()
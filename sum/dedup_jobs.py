@@ -0,0 +1,296 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+import zlib
+
+from json_stream import COMPRESSIONS, OUTPUT_MODES, iter_records, open_writer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUM_PERM = 128
+BANDS = 16  # 16 band x 8 dòng -> ngưỡng LSH khoảng 0.7
+SEED = 1
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+# Số tham số tối đa mỗi câu IN (...) của SQLite
+SQL_CHUNK = 500
+# Commit chỉ mục sau mỗi chừng này jobs (WAL, synchronous=NORMAL)
+COMMIT_EVERY = 2000
+
+_WORD_RE = re.compile(r'\w+')
+
+DEDUP_MODES = ('flag', 'collapse')
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Dedup cần cài gói 'numpy' (pip install numpy)")
+
+
+def normalize_text(text):
+    """Chữ thường, chuẩn Unicode NFC (dữ liệu crawl trộn dựng sẵn/tổ hợp), bỏ dấu câu."""
+    text = unicodedata.normalize('NFC', text or '').lower()
+    return _WORD_RE.findall(text)
+
+
+def shingles(job, company_name):
+    """Tập shingle (3 từ liên tiếp) của title + description + tên company."""
+    words = normalize_text(' '.join([job.get('title') or '', job.get('description') or '', company_name or '']))
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return set(map(' '.join, zip(*(words[i:] for i in range(SHINGLE_SIZE)))))
+
+
+class MinHasher:
+    """MinHash NUM_PERM hoán vị, tính vector hóa bằng numpy trên toàn bộ shingle của một job."""
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        require_numpy()
+        if num_perm % bands:
+            raise ValueError("num_perm phải chia hết cho bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter(map(zlib.crc32, map(str.encode, shingle_set)), dtype=np.uint64, count=len(shingle_set))
+        # Tràn số uint64 là chủ ý (giống datasketch)
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature):
+        """Khóa bucket của từng band (int64 có dấu để lưu SQLite)."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'little', signed=True))
+        return keys
+
+
+def chunks(items, size=SQL_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def job_ref(job, company_name):
+    """Định danh ổn định của job: jobUrl, hoặc hash nội dung nếu không có URL."""
+    if job.get('jobUrl'):
+        return job['jobUrl']
+    payload = json.dumps([company_name, job.get('title'), job.get('description')], ensure_ascii=False)
+    return 'sha1:' + hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class DedupIndex:
+    """
+    Chỉ mục LSH lưu trên đĩa (SQLite), giữ qua các lần chạy để dedup với mọi job đã thấy trước đó.
+    - jobs: ref, chữ ký MinHash, ref của bản gốc nếu là bản trùng
+    - buckets: khóa band -> job (chỉ job gốc mới được đưa vào bucket)
+    """
+
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD):
+        self.hasher = MinHasher()
+        self.threshold = threshold
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, ref TEXT UNIQUE NOT NULL, "
+                          "signature BLOB NOT NULL, duplicate_of TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, job_id INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket)")
+        self.conn.commit()
+        # Job có id từ first_id trở đi được thêm trong lần chạy này (thay cho một dict ref -> kết luận trong RAM)
+        self.next_id = (self.conn.execute("SELECT MAX(id) FROM jobs").fetchone()[0] or 0) + 1
+        self.first_id = self.next_id
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def check(self, job, company_name):
+        """Như check_many cho một job."""
+        return self.check_many([job], company_name)[0]
+
+    def _known(self, refs):
+        """ref -> (id, duplicate_of) của các ref đã có trong chỉ mục."""
+        known = {}
+        for chunk in chunks(list(set(refs))):
+            rows = self.conn.execute(f"SELECT ref, id, duplicate_of FROM jobs WHERE ref IN ({','.join('?' * len(chunk))})",
+                                     chunk)
+            known.update((ref, (job_id, duplicate_of)) for ref, job_id, duplicate_of in rows)
+        return known
+
+    def _candidates(self, bucket_keys):
+        """Khóa band -> list (ref, chữ ký) các job gốc đã có trong bucket đó."""
+        candidates = {}
+        for chunk in chunks(list(set(bucket_keys))):
+            rows = self.conn.execute(
+                f"SELECT buckets.bucket, jobs.ref, jobs.signature FROM buckets JOIN jobs ON jobs.id = buckets.job_id "
+                f"WHERE buckets.bucket IN ({','.join('?' * len(chunk))})", chunk)
+            for bucket, ref, signature in rows:
+                candidates.setdefault(bucket, []).append((ref, np.frombuffer(signature, dtype=np.uint32)))
+        return candidates
+
+    def check_many(self, jobs, company_name):
+        """
+        Kiểm tra các jobs của một company: mỗi job nhận ref của job gốc nếu là bản trùng gần đúng
+        của một job đã có trong chỉ mục (hoặc của job đứng trước trong cùng lô), ngược lại None.
+        Job mới được thêm vào chỉ mục; tra cứu và ghi SQLite được gộp cho cả lô.
+        Job lặp lại trong cùng một lần chạy (cùng jobUrl, hoặc không có URL mà trùng nội dung) là bản trùng
+        của lần xuất hiện đầu tiên; job đã gặp ở lần chạy trước giữ nguyên kết luận cũ.
+        """
+        refs = [job_ref(job, company_name) for job in jobs]
+        known = self._known(refs)
+        results = [None] * len(jobs)
+        first_position = {}
+        repeats = []
+        new = []
+        for position, ref in enumerate(refs):
+            if ref in known:
+                job_id, duplicate_of = known[ref]
+                results[position] = (duplicate_of or ref) if job_id >= self.first_id else duplicate_of
+            elif ref in first_position:
+                repeats.append(position)
+            else:
+                first_position[ref] = position
+                new.append(position)
+
+        signatures = [self.hasher.signature(shingles(jobs[position], company_name)) for position in new]
+        keys = [self.hasher.band_keys(signature) for signature in signatures]
+        candidates = self._candidates([key for job_keys in keys for key in job_keys])
+
+        job_rows = []
+        bucket_rows = []
+        for position, signature, job_keys in zip(new, signatures, keys):
+            ref = refs[position]
+            matches = {}
+            for key in job_keys:
+                for candidate_ref, candidate_signature in candidates.get(key, ()):
+                    matches[candidate_ref] = candidate_signature
+            duplicate_of = None
+            if matches:
+                similarity = (np.stack(list(matches.values())) == signature).mean(axis=1)
+                best = int(similarity.argmax())
+                if similarity[best] >= self.threshold:
+                    duplicate_of = list(matches)[best]
+
+            job_id = self.next_id
+            self.next_id += 1
+            job_rows.append((job_id, ref, signature.tobytes(), duplicate_of))
+            if duplicate_of is None:
+                bucket_rows.extend((key, job_id) for key in job_keys)
+                # Job gốc mới cũng là ứng viên cho các job sau trong cùng lô
+                for key in job_keys:
+                    candidates.setdefault(key, []).append((ref, signature))
+            results[position] = duplicate_of
+
+        for position in repeats:
+            ref = refs[position]
+            results[position] = results[first_position[ref]] or ref
+
+        self.conn.executemany("INSERT INTO jobs (id, ref, signature, duplicate_of) VALUES (?, ?, ?, ?)", job_rows)
+        self.conn.executemany("INSERT INTO buckets (bucket, job_id) VALUES (?, ?)", bucket_rows)
+        return results
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def dedup_stage(companies, index, mode='flag', totals=None):
+    """
+    Stage dedup cho pipeline (companies đã transform).
+    - flag: thêm trường duplicateOf (ref job gốc, '' nếu không trùng) cho mọi job
+    - collapse: bỏ các job trùng khỏi đầu ra
+    """
+    if totals is None:
+        totals = {}
+    uncommitted = 0
+    for company in companies:
+        jobs = company.get('jobs') or []
+        kept = []
+        for job, duplicate_of in zip(jobs, index.check_many(jobs, company.get('name'))):
+            if duplicate_of:
+                totals['duplicates'] = totals.get('duplicates', 0) + 1
+                if mode == 'collapse':
+                    continue
+            if mode == 'flag':
+                job['duplicateOf'] = duplicate_of or ''
+            kept.append(job)
+        totals['dedupJobs'] = totals.get('dedupJobs', 0) + len(jobs)
+        company['jobs'] = kept
+        uncommitted += len(jobs)
+        if uncommitted >= COMMIT_EVERY:
+            index.commit()
+            uncommitted = 0
+        yield company
+    index.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phát hiện job trùng gần đúng giữa các nguồn (MinHash/LSH)")
+    parser.add_argument("-i", "--input", default='transformed_companies.json',
+                        help="File transformed_companies.json hoặc .jsonl")
+    parser.add_argument("-o", "--output", default='deduped_companies.json', help="File kết quả")
+    parser.add_argument("--index", default='dedup_index.sqlite', help="File chỉ mục LSH (giữ qua các lần chạy)")
+    parser.add_argument("--mode", choices=DEDUP_MODES, default='flag',
+                        help="flag: đánh dấu duplicateOf, collapse: bỏ job trùng")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Ngưỡng Jaccard ước lượng để coi là trùng")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty', help="Chế độ ghi file đầu ra")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    args = parser.parse_args()
+
+    print(f"🔄 Đang dedup {args.input} (chỉ mục: {args.index}, chế độ: {args.mode})")
+    started = time.monotonic()
+    totals = {}
+    try:
+        with DedupIndex(args.index, args.threshold) as index:
+            partial_file = args.output + '.partial'
+            with open_writer(partial_file, args.format, args.compress) as writer:
+                for company in dedup_stage(iter_records(args.input), index, args.mode, totals):
+                    writer.write(company)
+            os.replace(partial_file, args.output)
+    except FileNotFoundError:
+        print(f"❌ Lỗi: Không tìm thấy file '{args.input}'")
+        return
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Lỗi: {e}")
+        return
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    jobs = totals.get('dedupJobs', 0)
+    duplicates = totals.get('duplicates', 0)
+    print(f"✅ Hoàn thành trong {elapsed:.1f}s")
+    print(f"\n📊 Thống kê:")
+    print(f"   - Tổng số jobs: {jobs}")
+    print(f"   - Jobs trùng: {duplicates} ({duplicates / jobs:.1%})" if jobs else "   - Jobs trùng: 0")
+    print(f"   - Tốc độ: {jobs / elapsed:.0f} jobs/s")
+    print(f"   - File đầu ra: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from array import array
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Chuẩn hóa text trước khi băm: Unicode NFC, chữ thường, gộp khoảng trắng."""
+    return _SPACE_RE.sub(' ', unicodedata.normalize('NFC', text)).strip().lower()
+
+
+def text_key(text, namespace=''):
+    """Khóa cache: hash của namespace (URL API) + text đã chuẩn hóa, để vector của API khác không bị dùng lẫn."""
+    return hashlib.sha1(f"{namespace}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+def encode_vector(vector):
+    return array('f', vector).tobytes()
+
+
+def decode_vector(blob):
+    values = array('f')
+    values.frombytes(blob)
+    return values.tolist()
+
+
+def quantize(vector):
+    """Làm tròn vector về float32, để kết quả giống nhau dù lấy từ API hay từ cache."""
+    return decode_vector(encode_vector(vector))
+
+
+class EmbeddingCache:
+    """
+    Cache text -> vector trên đĩa (SQLite), vector lưu dạng blob float32.
+    Giới hạn max_entries theo LRU: mỗi lần dùng cập nhật last_used, khi vượt giới hạn thì xóa các vector lâu không dùng nhất.
+    """
+
+    def __init__(self, path, namespace='', max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                          "last_used INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)")
+        row = self.conn.execute("SELECT MAX(last_used) FROM vectors").fetchone()
+        self.clock = row[0] or 0
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def key(self, text):
+        return text_key(text, self.namespace)
+
+    def get_many(self, keys):
+        """Trả về dict key -> vector đã cache; các khóa trúng cache được đánh dấu vừa dùng."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # SQLite giới hạn số tham số trong một câu lệnh
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT key, vector FROM vectors WHERE key IN ({placeholders})", chunk)
+            for key, blob in rows:
+                found[key] = decode_vector(blob)
+        self.clock += 1
+        if found:
+            self.conn.executemany("UPDATE vectors SET last_used = ? WHERE key = ?",
+                                  [(self.clock, key) for key in found])
+        self.hits += len(found)
+        self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Lưu các cặp (key, vector) rồi xóa bớt theo LRU nếu vượt max_entries."""
+        self.conn.executemany("INSERT OR REPLACE INTO vectors (key, vector, last_used) VALUES (?, ?, ?)",
+                              [(key, encode_vector(vector), self.clock) for key, vector in items])
+        if self.max_entries:
+            count = self.conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            if count > self.max_entries:
+                cursor = self.conn.execute(
+                    "DELETE FROM vectors WHERE key IN (SELECT key FROM vectors ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,))
+                self.evicted += cursor.rowcount
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,567 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from embedding_cache import DEFAULT_MAX_ENTRIES, EmbeddingCache, quantize, text_key
+from json_stream import COMPRESSIONS, OUTPUT_MODES, iter_records, open_writer, output_path
+
+CONFIG_FILE = 'embedding-config.json'
+
+# Trường của company được embed thêm ngoài config (config chỉ mô tả trường của job)
+COMPANY_FIELDS = [{'source': 'name', 'target': 'nameEmbedding'}]
+
+# Mã lỗi coi là quá tải: giảm concurrency rồi thử lại
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class EmbeddingAuthError(RuntimeError):
+    pass
+
+
+class MalformedResponseError(ConnectionError):
+    """Response HTTP sai khung (status line, Content-Length, chunk size): kết nối bị đóng, request được thử lại."""
+
+
+def load_config(path=CONFIG_FILE):
+    """Đọc embedding-config.json (cùng file với các script Node)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config.setdefault('rateLimiting', {})
+    config.setdefault('fields', [])
+    return config
+
+
+def auth_headers(api):
+    """Header xác thực theo api.authMethod, giống getAuthHeaders() bên Node."""
+    method = (api.get('authMethod') or 'bearer').lower()
+    key = api.get('key', '')
+    if method == 'api-key':
+        return {'API-Key': key}
+    if method == 'x-api-key':
+        return {'X-API-Key': key}
+    if method == 'plain':
+        return {'Authorization': key}
+    if method == 'body':
+        return {}
+    return {'Authorization': f'Bearer {key}'}
+
+
+def request_body(api, text):
+    body = {'text': text.strip()}
+    if (api.get('authMethod') or '').lower() == 'body':
+        body['apikey'] = api.get('key', '')
+    return json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+
+class HttpResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def parse_int(token, base, what):
+    """Số nguyên không âm trong khung HTTP (status, Content-Length, chunk size), MalformedResponseError nếu sai."""
+    try:
+        value = int(token, base)
+    except (TypeError, ValueError):
+        value = -1
+    if value < 0:
+        raise MalformedResponseError(f"{what} không hợp lệ: {token!r:.80}")
+    return value
+
+
+class ConnectionPool:
+    """
+    Pool kết nối HTTP/1.1 keep-alive tới một host, chỉ dùng asyncio (không cần thư viện ngoài).
+    Kết nối rảnh được giữ lại cho request sau thay vì mở TCP/TLS mới mỗi lần.
+    """
+
+    def __init__(self, url, max_idle=64):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.host_header = parts.netloc
+        self.ssl_context = ssl.create_default_context() if self.secure else None
+        self.max_idle = max_idle
+        self.idle = []
+        self.opened = 0
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl_context)
+
+    def _release(self, conn, reusable):
+        if reusable and len(self.idle) < self.max_idle:
+            self.idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def post(self, body, headers):
+        """POST body tới URL của pool. Kết nối rảnh bị server đóng được thay bằng kết nối mới."""
+        while True:
+            reused = bool(self.idle)
+            conn = self.idle.pop() if reused else await self._connect()
+            try:
+                response, reusable = await self._send(conn, body, headers)
+            except MalformedResponseError:
+                # Server trả response hỏng: không thử lại ngầm trên kết nối khác, để embed() đếm và thử lại
+                conn[1].close()
+                raise
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                # Timeout/hủy giữa chừng: kết nối không còn dùng lại được
+                conn[1].close()
+                raise
+            self._release(conn, reusable)
+            return response
+
+    async def _send(self, conn, body, headers):
+        reader, writer = conn
+        lines = [f'POST {self.path} HTTP/1.1', f'Host: {self.host_header}', 'Content-Type: application/json',
+                 f'Content-Length: {len(body)}', 'Connection: keep-alive']
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Server đã đóng kết nối')
+        parts = status_line.split()
+        status = parse_int(parts[1] if len(parts) > 1 else status_line, 10, 'Status line')
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        reusable = response_headers.get('connection', '').lower() != 'close'
+        if 'content-length' in response_headers:
+            length = parse_int(response_headers['content-length'], 10, 'Content-Length')
+            payload = await reader.readexactly(length)
+        elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = parse_int((await reader.readline()).split(b';')[0], 16, 'Chunk size')
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            payload = b''.join(chunks)
+        else:
+            payload = await reader.read()
+            reusable = False
+        return HttpResponse(status, response_headers, payload), reusable
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+class AdaptiveLimiter:
+    """
+    Giới hạn số request đồng thời theo AIMD:
+    mỗi request thành công tăng giới hạn thêm 1/limit (tức +1 sau mỗi "vòng"),
+    gặp 429/timeout thì giảm một nửa (tối đa một lần mỗi cooldown giây để một đợt lỗi không làm giảm nhiều lần).
+    """
+
+    def __init__(self, initial, maximum, cooldown=1.0):
+        self.limit = float(max(1, initial))
+        self.maximum = max(maximum, initial)
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak = self.limit
+        self.last_decrease = 0.0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def increase(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.peak = max(self.peak, self.limit)
+
+    def decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease >= self.cooldown:
+            self.limit = max(1.0, self.limit / 2)
+            self.last_decrease = now
+
+
+def parse_embedding(response):
+    """Vector trong body {embedding: [...]} (hoặc body là mảng). ValueError/KeyError/TypeError nếu body sai."""
+    data = response.json()
+    vector = data['embedding'] if isinstance(data, dict) else data
+    if not isinstance(vector, list) or not vector:
+        raise TypeError("Body không có vector embedding")
+    return vector
+
+
+class EmbeddingClient:
+    """
+    Client embedding bất đồng bộ: API nhận một text mỗi request và trả về {embedding: [...]},
+    nên thông lượng đến từ việc gửi nhiều request song song trên pool kết nối keep-alive,
+    với số request đồng thời tự điều chỉnh theo phản hồi của server.
+    """
+
+    def __init__(self, config, max_concurrency=64, max_retries=5):
+        self.api = config['api']
+        rate = config.get('rateLimiting', {})
+        self.timeout = rate.get('requestTimeout', 30000) / 1000
+        self.headers = auth_headers(self.api)
+        self.pool = ConnectionPool(self.api['url'], max_idle=max_concurrency)
+        self.limiter = AdaptiveLimiter(rate.get('batchSize', 10), max_concurrency)
+        self.max_retries = max_retries
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'timeouts': 0, 'invalid': 0, 'failed': 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def embed(self, text, max_retries=None):
+        """Vector embedding của text, hoặc None nếu thất bại sau max_retries lần thử."""
+        body = request_body(self.api, text)
+        retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+            retry_after = None
+            async with self.limiter:
+                self.stats['requests'] += 1
+                try:
+                    response = await asyncio.wait_for(self.pool.post(body, self.headers), self.timeout)
+                except asyncio.TimeoutError:
+                    self.stats['timeouts'] += 1
+                    self.limiter.decrease()
+                    response = None
+                except MalformedResponseError:
+                    self.stats['invalid'] += 1
+                    self.limiter.decrease()
+                    response = None
+                except OSError:
+                    self.limiter.decrease()
+                    response = None
+
+                if response is not None and response.status == 200:
+                    try:
+                        vector = parse_embedding(response)
+                    except (ValueError, KeyError, TypeError):
+                        # Body lỗi (JSON hỏng, thiếu embedding) coi như request thất bại, thử lại
+                        self.stats['invalid'] += 1
+                        response = None
+                    else:
+                        self.limiter.increase()
+                        return vector
+
+                if response is not None:
+                    if response.status == 401:
+                        raise EmbeddingAuthError(
+                            f"Xác thực thất bại (authMethod: {self.api.get('authMethod')}) - kiểm tra api.key")
+                    if response.status not in RETRY_STATUSES:
+                        self.stats['failed'] += 1
+                        return None
+                    self.stats['throttled'] += 1
+                    self.limiter.decrease()
+                    retry_after = response.headers.get('retry-after')
+
+            if attempt == retries:
+                break
+            # Chờ ngoài limiter để không giữ chỗ của request khác
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else min(30, 0.5 * 2 ** attempt)
+            await asyncio.sleep(delay * (0.5 + random.random()))
+        self.stats['failed'] += 1
+        return None
+
+    async def validate(self):
+        """Gửi thử một text trước khi chạy (giống validateAPI() bên Node)."""
+        if await self.embed("Software Engineer", max_retries=0) is None:
+            raise RuntimeError(f"Không kết nối được API embedding {self.api['url']}")
+
+    def close(self):
+        self.pool.close()
+
+
+def embedding_targets(record, fields):
+    """
+    (source, target) cần embed của record. Tên target trong config (vd: titleEmbed) được đổi sang
+    tên trường theo dataschema.json (titleEmbedding) nếu record đã có sẵn trường đó.
+    Trường đã có vector (lần chạy trước) được bỏ qua.
+    """
+    for field in fields:
+        source, target = field['source'], field['target']
+        if target not in record:
+            schema_target = re.sub(r'Sum$', '', source) + 'Embedding'
+            if schema_target in record:
+                target = schema_target
+        text = record.get(source)
+        if isinstance(text, str) and text.strip() and not record.get(target):
+            yield source, target
+
+
+def collect_requests(companies, job_fields):
+    """Danh sách (record, target, text) cần embed của một nhóm companies, gộp tất cả jobs và trường."""
+    requests = []
+    for company in companies:
+        for source, target in embedding_targets(company, COMPANY_FIELDS):
+            requests.append((company, target, company[source]))
+        for job in company.get('jobs') or []:
+            for source, target in embedding_targets(job, job_fields):
+                requests.append((job, target, job[source]))
+    return requests
+
+
+def iter_windows(companies, batch_size, job_fields):
+    """Gom companies thành từng nhóm có khoảng batch_size text cần embed."""
+    window = []
+    pending = 0
+    for company in companies:
+        window.append(company)
+        pending += len(company.get('jobs') or []) * len(job_fields) + 1
+        if pending >= batch_size:
+            yield window
+            window = []
+            pending = 0
+    if window:
+        yield window
+
+
+async def fill_embeddings(companies, client, job_fields, batch_size=512, totals=None, cache=None):
+    """
+    Điền các trường *Embedding còn rỗng của companies (đã transform).
+    Text của nhiều jobs/trường được gửi song song theo từng nhóm, thứ tự companies được giữ nguyên.
+    Các text giống nhau (sau chuẩn hóa) trong một nhóm chỉ được gửi một lần; nếu có cache (EmbeddingCache),
+    text đã embed ở các lần chạy trước được lấy lại từ cache.
+    Async generator trả về từng company đã điền xong.
+    """
+    if totals is None:
+        totals = {}
+    for window in iter_windows(companies, batch_size, job_fields):
+        requests = collect_requests(window, job_fields)
+        keys = [cache.key(text) if cache is not None else text_key(text) for _, _, text in requests]
+        unique = dict(zip(keys, (text for _, _, text in requests)))
+        vectors = cache.get_many(list(unique)) if cache is not None else {}
+        missing = [key for key in unique if key not in vectors]
+
+        results = await asyncio.gather(*(client.embed(unique[key]) for key in missing))
+        fresh = [(key, vector) for key, vector in zip(missing, results) if vector]
+        if cache is not None:
+            fresh = [(key, quantize(vector)) for key, vector in fresh]
+            cache.put_many(fresh)
+        vectors.update(fresh)
+
+        totals['texts'] = totals.get('texts', 0) + len(requests)
+        totals['apiCalls'] = totals.get('apiCalls', 0) + len(missing)
+        for (record, target, _), key in zip(requests, keys):
+            vector = vectors.get(key)
+            if vector:
+                record[target] = vector
+                totals['embedded'] = totals.get('embedded', 0) + 1
+            else:
+                totals['failed'] = totals.get('failed', 0) + 1
+        for company in window:
+            yield company
+
+
+async def run_embeddings(input_file, output_file, config, output_format='pretty', compression=None,
+                         max_concurrency=64, batch_size=512, cache=None):
+    totals = {}
+    partial_file = output_file + '.partial'
+    async with EmbeddingClient(config, max_concurrency) as client:
+        await client.validate()
+        with open_writer(partial_file, output_format, compression) as writer:
+            async for company in fill_embeddings(iter_records(input_file), client, config['fields'], batch_size, totals,
+                                                 cache):
+                writer.write(company)
+        totals.update(client.stats)
+        totals['connections'] = client.pool.opened
+        totals['peakConcurrency'] = int(client.limiter.peak)
+    os.replace(partial_file, output_file)
+    totals['companies'] = writer.count
+    return totals
+
+
+# Response hỏng mà stub server có thể trả về (để thử client)
+STUB_FAULTS = {
+    'status': b'garbage\r\n\r\n',
+    'chunk': b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n',
+}
+
+
+async def start_stub_server(port, dim, capacity, delay, faults=()):
+    """
+    Server giả lập API embedding để thử client: trả về vector xác định từ text,
+    trả 429 khi số request đang xử lý vượt capacity.
+    faults: tên lỗi trong STUB_FAULTS trả về lần lượt cho các request đầu tiên (rồi đóng kết nối).
+    Trả về asyncio.Server (port=0: lấy port trống, xem server.sockets).
+    """
+    import hashlib
+
+    active = 0
+    faults = list(faults)
+
+    async def handle(reader, writer):
+        nonlocal active
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin1').partition(':')
+                    if name.strip().lower() == 'content-length':
+                        length = int(value)
+                text = json.loads(await reader.readexactly(length)).get('text', '')
+                if faults:
+                    writer.write(STUB_FAULTS[faults.pop(0)])
+                    await writer.drain()
+                    break
+                active += 1
+                try:
+                    if active > capacity:
+                        status, payload = 429, b'{"error": "rate limited"}'
+                    else:
+                        await asyncio.sleep(delay)
+                        digest = hashlib.sha256(text.encode('utf-8')).digest()
+                        vector = [round(digest[i % len(digest)] / 255, 4) for i in range(dim)]
+                        status, payload = 200, json.dumps({'embedding': vector}).encode('utf-8')
+                finally:
+                    active -= 1
+                reason = 'OK' if status == 200 else 'Too Many Requests'
+                writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n'
+                             f'Content-Length: {len(payload)}\r\n\r\n'.encode('latin1') + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+
+def run_stub_server(port, dim, capacity, delay, faults=()):
+    async def serve():
+        server = await start_stub_server(port, dim, capacity, delay, faults)
+        print(f"🧪 Stub embedding server: http://127.0.0.1:{port}/embeds (dim={dim}, capacity={capacity})")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Điền các trường *Embedding bằng client bất đồng bộ")
+    subparsers = parser.add_subparsers(dest="command")
+
+    stub_parser = subparsers.add_parser("stub", help="Chạy server embedding giả lập để thử")
+    stub_parser.add_argument("--port", type=int, default=8089)
+    stub_parser.add_argument("--dim", type=int, default=8, help="Số chiều vector trả về")
+    stub_parser.add_argument("--capacity", type=int, default=32, help="Số request đồng thời trước khi trả 429")
+    stub_parser.add_argument("--delay", type=float, default=0.01, help="Thời gian xử lý mỗi request (giây)")
+    stub_parser.add_argument("--faults", default='', help=f"Response hỏng trả cho các request đầu tiên, "
+                                                         f"vd: status,chunk ({', '.join(STUB_FAULTS)})")
+
+    parser.add_argument("-i", "--input", default='transformed_companies.json',
+                        help="File transformed_companies.json hoặc .jsonl")
+    parser.add_argument("-o", "--output", help="File kết quả (mặc định: embedded_companies.json/.jsonl)")
+    parser.add_argument("-c", "--config", default=CONFIG_FILE, help="File cấu hình embedding")
+    parser.add_argument("--url", help="Ghi đè api.url trong config (vd: stub server)")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Số request đồng thời tối đa")
+    parser.add_argument("--batch-size", type=int, default=512, help="Số text gom mỗi nhóm gửi song song")
+    parser.add_argument("--cache", help="File SQLite cache text -> vector (bỏ trống = không dùng cache)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Số vector tối đa giữ trong cache (LRU)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty', help="Chế độ ghi file đầu ra")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    args = parser.parse_args()
+
+    if args.command == "stub":
+        faults = [fault for fault in args.faults.split(',') if fault]
+        unknown = [fault for fault in faults if fault not in STUB_FAULTS]
+        if unknown:
+            print(f"❌ Lỗi: Không có lỗi giả lập {', '.join(unknown)}")
+            return
+        run_stub_server(args.port, args.dim, args.capacity, args.delay, faults)
+        return
+
+    try:
+        config = load_config(args.config)
+    except FileNotFoundError:
+        print(f"❌ Lỗi: Không tìm thấy file cấu hình '{args.config}'")
+        return
+    if args.url:
+        config['api']['url'] = args.url
+    output_file = args.output or output_path('embedded_companies', args.format, args.compress)
+
+    print(f"🚀 Đang embed {args.input} -> {output_file} ({config['api']['url']})")
+    started = time.monotonic()
+    cache = EmbeddingCache(args.cache, config['api']['url'], args.cache_size) if args.cache else None
+    try:
+        totals = asyncio.run(run_embeddings(args.input, output_file, config, args.format, args.compress,
+                                            args.max_concurrency, args.batch_size, cache))
+    except FileNotFoundError:
+        print(f"❌ Lỗi: Không tìm thấy file '{args.input}'")
+        return
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"❌ Lỗi: {e}")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
+    elapsed = max(time.monotonic() - started, 1e-9)
+
+    print(f"✅ Hoàn thành trong {elapsed:.1f}s")
+    print(f"\n📊 Thống kê:")
+    print(f"   - Tổng số companies: {totals['companies']}")
+    print(f"   - Embedding thành công: {totals.get('embedded', 0)} ({totals.get('embedded', 0) / elapsed:.0f}/s)")
+    print(f"   - Embedding thất bại: {totals.get('failed', 0)}")
+    print(f"   - Requests: {totals['requests']} ({totals['retries']} thử lại, {totals['throttled']} bị 429/5xx, "
+          f"{totals['timeouts']} timeout, {totals['invalid']} body lỗi)")
+    texts = totals.get('texts', 0)
+    saved = texts - totals.get('apiCalls', 0)
+    print(f"   - Text cần embed: {texts}, gọi API: {totals.get('apiCalls', 0)} (tiết kiệm {saved} lần gọi"
+          f"{f', {saved / texts:.1%}' if texts else ''})")
+    if cache is not None:
+        looked_up = cache.hits + cache.misses
+        hit_rate = cache.hits / looked_up if looked_up else 0
+        print(f"   - Cache: {cache.hits} hit, {cache.misses} miss ({hit_rate:.1%}), {cache.evicted} vector đã xóa (LRU)")
+    print(f"   - Kết nối đã mở: {totals['connections']}, concurrency cao nhất: {totals['peakConcurrency']}")
+    print(f"   - File đầu ra: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import struct
+from array import array
+
+from json_stream import iter_records
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Header .npy giữ cố định 128 bytes để ghi lại số dòng thật sau khi ghi xong dữ liệu
+NPY_HEADER_SIZE = 128
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Embedding store cần cài gói 'numpy' (pip install numpy)")
+
+
+def npy_header(rows, dim):
+    """Header .npy (v1.0) float32 C-order cho mảng (rows, dim), độ dài cố định NPY_HEADER_SIZE."""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (rows, dim)
+    padding = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError("Số dòng quá lớn cho header .npy")
+    header = header + ' ' * padding + '\n'
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def store_paths(prefix):
+    return {
+        'vectors': prefix + '.npy',
+        'ids': prefix + '.ids.npy',
+        'norms': prefix + '.norms.npy',
+        'meta': prefix + '.meta.json',
+    }
+
+
+def build_store(input_file, prefix, field='titleEmbedding', batch_size=4096):
+    """
+    Gom toàn bộ vector `field` của các job trong input_file (transformed_companies.json/.jsonl)
+    thành một file float32 liên tục <prefix>.npy, ghi dần theo batch nên không cần giữ hết trong RAM.
+    Kèm theo:
+    - <prefix>.ids.npy: int64 (n, 2) = (vị trí company, vị trí job trong company) của từng dòng
+    - <prefix>.norms.npy: độ dài (L2) của từng vector, dùng cho cosine
+    - <prefix>.meta.json: field, dim, số dòng
+    Job không có vector bị bỏ qua. Trả về (số dòng, dim).
+    """
+    require_numpy()
+    paths = store_paths(prefix)
+    dim = None
+    rows = 0
+    ids = array('q')  # (company, job) xếp liền nhau, gọn hơn list tuple
+    norms = []
+    batch = []
+
+    with open(paths['vectors'] + '.partial', 'wb') as f:
+        f.write(npy_header(0, 0))
+
+        def flush():
+            block = np.asarray(batch, dtype=np.float32)
+            f.write(block.tobytes())
+            norms.append(np.linalg.norm(block, axis=1).astype(np.float32))
+            batch.clear()
+
+        for company_index, company in enumerate(iter_records(input_file)):
+            for job_index, job in enumerate(company.get('jobs') or []):
+                vector = job.get(field)
+                if not vector:
+                    continue
+                if dim is None:
+                    dim = len(vector)
+                elif len(vector) != dim:
+                    raise ValueError(f"{field}: vector có {len(vector)} chiều, mong đợi {dim}")
+                batch.append(vector)
+                ids.extend((company_index, job_index))
+                rows += 1
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+
+        # Ghi lại header với số dòng thật
+        f.seek(0)
+        f.write(npy_header(rows, dim or 0))
+    os.replace(paths['vectors'] + '.partial', paths['vectors'])
+
+    np.save(paths['ids'], np.frombuffer(ids, dtype=np.int64).reshape(-1, 2))
+    np.save(paths['norms'], np.concatenate(norms) if norms else np.zeros(0, dtype=np.float32))
+    with open(paths['meta'], 'w', encoding='utf-8') as f:
+        json.dump({'field': field, 'dim': dim or 0, 'rows': rows, 'source': input_file}, f, ensure_ascii=False, indent=2)
+    return rows, dim or 0
+
+
+class EmbeddingStore:
+    """
+    Đọc store bằng memory map và tìm top-k theo cosine cho một batch query vector.
+    Dữ liệu được quét theo từng block nên số vector có thể lớn hơn RAM.
+    """
+
+    def __init__(self, prefix):
+        require_numpy()
+        paths = store_paths(prefix)
+        with open(paths['meta'], 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(paths['vectors'], mmap_mode='r')
+        self.ids = np.load(paths['ids'], mmap_mode='r')
+        self.norms = np.load(paths['norms'], mmap_mode='r')
+        self.dim = self.meta['dim']
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search(self, queries, k=10, block_size=65536):
+        """
+        Trả về (scores, rows): hai mảng (số query, k) sắp xếp giảm dần theo cosine similarity.
+        rows là chỉ số dòng trong store, dùng lookup() để đổi sang (company, job).
+        Nếu store có ít hơn k vector, các ô thừa có score -inf và row -1.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query có {queries.shape[1]} chiều, store có {self.dim} chiều")
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(query_norms == 0, 1, query_norms)
+
+        n_queries = queries.shape[0]
+        best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+        best_rows = np.full((n_queries, k), -1, dtype=np.int64)
+
+        for start in range(0, len(self), block_size):
+            block = np.asarray(self.vectors[start:start + block_size])
+            norms = np.asarray(self.norms[start:start + block_size])
+            # (query, block) cosine; vector độ dài 0 cho score 0
+            scores = (queries @ block.T) / np.where(norms == 0, np.inf, norms)
+            rows = np.broadcast_to(np.arange(start, start + block.shape[0]), scores.shape)
+
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_rows = np.concatenate([best_rows, rows], axis=1)
+            if merged_scores.shape[1] > k:
+                top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(merged_scores, top, axis=1)
+                best_rows = np.take_along_axis(merged_rows, top, axis=1)
+            else:
+                best_scores, best_rows = merged_scores, merged_rows
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_rows, order, axis=1)
+
+    def lookup(self, rows):
+        """Đổi chỉ số dòng thành (vị trí company, vị trí job) trong file nguồn."""
+        return [tuple(int(value) for value in self.ids[row]) if row >= 0 else None for row in rows]
+
+
+def load_queries(path):
+    """Query vector từ file .npy hoặc file JSON (một vector hay danh sách vector)."""
+    if path.endswith('.npy'):
+        return np.load(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return np.asarray(json.load(f), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding store dạng memory map và tìm kiếm cosine top-k")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Gom vector của jobs vào một file .npy")
+    build_parser.add_argument("-i", "--input", default='transformed_companies.json',
+                              help="File transformed_companies.json hoặc .jsonl")
+    build_parser.add_argument("-f", "--field", default='titleEmbedding', help="Trường embedding của job")
+    build_parser.add_argument("-o", "--output", help="Tiền tố file store (mặc định: <field>_store)")
+
+    search_parser = subparsers.add_parser("search", help="Tìm top-k job gần nhất cho các query vector")
+    search_parser.add_argument("store", help="Tiền tố file store")
+    search_parser.add_argument("queries", help="File .npy hoặc .json chứa query vector")
+    search_parser.add_argument("-k", type=int, default=10)
+    search_parser.add_argument("--block-size", type=int, default=65536, help="Số vector quét mỗi block")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            prefix = args.output or f"{args.field}_store"
+            print(f"🔄 Đang gom {args.field} từ {args.input}...")
+            rows, dim = build_store(args.input, prefix, args.field)
+            print(f"✅ Đã lưu {rows} vector ({dim} chiều) vào {prefix}.npy")
+        else:
+            store = EmbeddingStore(args.store)
+            scores, rows = store.search(load_queries(args.queries), args.k, args.block_size)
+            for query_index in range(scores.shape[0]):
+                print(f"🔍 Query {query_index + 1}:")
+                for score, position in zip(scores[query_index], store.lookup(rows[query_index])):
+                    if position is not None:
+                        print(f"   - company {position[0]}, job {position[1]}: {score:.4f}")
+    except FileNotFoundError as e:
+        print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Lỗi: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import os
+import time
+
+from json_stream import iter_records
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+JOB_EMBEDDING_FIELDS = ['titleEmbedding', 'locationEmbedding', 'skillsEmbedding',
+                        'requirementsEmbedding', 'descriptionEmbedding']
+COMPANY_EMBEDDING_FIELDS = ['nameEmbedding']
+
+COMPANY_STRING_FIELDS = ['name', 'website', 'description', 'size', 'industry', 'email', 'phone']
+JOB_STRING_FIELDS = ['title', 'source', 'location', 'workArrangement', 'jobType', 'budget', 'budgetCurrency',
+                     'budgetPeriod', 'status', 'jobUrl',
+                     'descriptionRaw', 'titleSum', 'locationSum', 'skillsSum', 'requirementsSum', 'descriptionSum']
+# Các trường ngày có thể là timestamp (ms) hoặc chuỗi ngày tùy nguồn crawl -> lưu dạng chuỗi
+JOB_DATE_FIELDS = ['applicationDeadline', 'postedDate']
+JOB_NUMBER_FIELDS = ['budgetMin', 'budgetMax']
+
+FORMATS = ('parquet', 'arrow')
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Xuất Parquet/Arrow cần cài gói 'pyarrow' (pip install pyarrow)")
+
+
+def to_text(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def to_number(value):
+    """budgetMin/budgetMax: số hoặc chuỗi số -> float, chuỗi rỗng/không hợp lệ -> null."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and value.strip():
+        try:
+            return float(value.replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+
+def to_text_list(value):
+    if isinstance(value, list):
+        return [to_text(item) for item in value]
+    if value in (None, ''):
+        return []
+    return [to_text(value)]
+
+
+def embedding_type(dim):
+    """Vector float32 cố định dim chiều; dim chưa biết thì dùng list float32 độ dài thay đổi."""
+    if dim:
+        return pa.list_(pa.float32(), dim)
+    return pa.list_(pa.float32())
+
+
+def first_dim(record, fields):
+    """Số chiều của vector đầu tiên có trong các trường fields của record, None nếu chưa có."""
+    for field in fields:
+        vector = record.get(field)
+        if vector:
+            return len(vector)
+    return None
+
+
+def embedding_array(rows, field, dim):
+    """Chuyển vector của các dòng thành mảng Arrow; vector rỗng -> null."""
+    vectors = []
+    for row in rows:
+        vector = row.get(field)
+        if not vector:
+            vectors.append(None)
+            continue
+        if dim and len(vector) != dim:
+            raise ValueError(f"{field}: vector có {len(vector)} chiều, mong đợi {dim}")
+        vectors.append(vector)
+    return pa.array(vectors, type=embedding_type(dim))
+
+
+class ColumnarTableWriter:
+    """Ghi dần một bảng ra file Parquet hoặc Arrow IPC theo từng record batch."""
+
+    def __init__(self, path, schema, file_format, dictionary_fields=()):
+        self.path = path
+        self.schema = schema
+        self.file_format = file_format
+        self.rows = 0
+        if file_format == 'parquet':
+            # Parquet tự dictionary-encode các cột này trên đĩa (từ điển riêng theo từng row group, bộ nhớ có giới hạn)
+            self._writer = pq.ParquetWriter(path, schema, compression='zstd',
+                                            use_dictionary=list(dictionary_fields) or False)
+        else:
+            # Arrow IPC: đọc lại bằng memory map, không cần parse.
+            # File IPC chỉ cho một từ điển mỗi cột cho cả file nên không dictionary-encode ở đây
+            self._writer = pa_ipc.new_file(path, schema)
+
+    def write(self, columns):
+        batch = pa.record_batch(columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        self._writer.close()
+
+
+class ColumnarExporter:
+    """
+    Làm phẳng companies/jobs (cấu trúc của transform_company_structure) thành hai bảng cột:
+    - companies: company_id, các trường company, nameEmbedding
+    - jobs: job_id, company_id (khóa ngoại), các trường job, *Embedding (float32 cố định chiều)
+    Mọi trường embedding dùng chung một số chiều (cùng một API embedding). Nếu không truyền embedding_dim,
+    các dòng được giữ lại cho tới khi gặp vector đầu tiên rồi mới tạo schema; cả file không có vector nào
+    thì cột embedding là list float32 toàn null.
+    """
+
+    def __init__(self, output_dir, file_format='parquet', batch_size=10000, embedding_dim=None):
+        require_pyarrow()
+        if file_format not in FORMATS:
+            raise ValueError(f"Định dạng không hỗ trợ: {file_format}")
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.embedding_dim = embedding_dim
+        self.company_rows = []
+        self.job_rows = []
+        self.company_count = 0
+        self.job_count = 0
+        self.companies_writer = None
+        self.jobs_writer = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def table_path(self, name):
+        return os.path.join(self.output_dir, f"{name}.{self.file_format}")
+
+    def add_company(self, company):
+        company_id = self.company_count
+        self.company_count += 1
+        self.company_rows.append(dict(company, company_id=company_id))
+        if self.embedding_dim is None:
+            self.embedding_dim = first_dim(company, COMPANY_EMBEDDING_FIELDS)
+        for job in company.get('jobs') or []:
+            self.job_rows.append(dict(job, job_id=self.job_count, company_id=company_id))
+            self.job_count += 1
+            if self.embedding_dim is None:
+                self.embedding_dim = first_dim(job, JOB_EMBEDDING_FIELDS)
+        if self.embedding_dim is None:
+            # Chưa biết số chiều: giữ các dòng lại thay vì ghi schema list độ dài thay đổi
+            return
+        if len(self.company_rows) >= self.batch_size:
+            self.flush_companies()
+        if len(self.job_rows) >= self.batch_size:
+            self.flush_jobs()
+
+    def batches(self, rows):
+        """Các dòng đang giữ được ghi thành nhiều batch (có thể nhiều hơn batch_size khi chờ số chiều)."""
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start:start + self.batch_size]
+
+    def flush_companies(self):
+        rows = self.company_rows
+        if not rows and self.companies_writer is not None:
+            return
+        if self.companies_writer is None:
+            fields = [pa.field('company_id', pa.int64())]
+            fields += [pa.field(name, pa.string()) for name in COMPANY_STRING_FIELDS]
+            fields.append(pa.field('location', pa.list_(pa.string())))
+            fields += [pa.field(name, embedding_type(self.embedding_dim)) for name in COMPANY_EMBEDDING_FIELDS]
+            self.companies_writer = ColumnarTableWriter(self.table_path('companies'), pa.schema(fields),
+                                                        self.file_format)
+        for batch in self.batches(rows):
+            columns = [pa.array([row['company_id'] for row in batch], type=pa.int64())]
+            columns += [pa.array([to_text(row.get(name)) for row in batch], type=pa.string())
+                        for name in COMPANY_STRING_FIELDS]
+            columns.append(pa.array([to_text_list(row.get('location')) for row in batch],
+                                    type=pa.list_(pa.string())))
+            columns += [embedding_array(batch, name, self.embedding_dim) for name in COMPANY_EMBEDDING_FIELDS]
+            self.companies_writer.write(columns)
+        self.company_rows = []
+
+    def flush_jobs(self):
+        rows = self.job_rows
+        if not rows and self.jobs_writer is not None:
+            return
+        if self.jobs_writer is None:
+            fields = [pa.field('job_id', pa.int64()), pa.field('company_id', pa.int64()),
+                      pa.field('description', pa.string())]
+            fields += [pa.field(name, pa.string()) for name in JOB_STRING_FIELDS]
+            fields += [pa.field(name, pa.float64()) for name in JOB_NUMBER_FIELDS]
+            fields += [pa.field(name, pa.string()) for name in JOB_DATE_FIELDS]
+            fields += [pa.field('skills', pa.list_(pa.string())), pa.field('requirements', pa.list_(pa.string()))]
+            fields += [pa.field(name, embedding_type(self.embedding_dim)) for name in JOB_EMBEDDING_FIELDS]
+            self.jobs_writer = ColumnarTableWriter(self.table_path('jobs'), pa.schema(fields), self.file_format,
+                                                   dictionary_fields=['description'])
+        for batch in self.batches(rows):
+            columns = [pa.array([row['job_id'] for row in batch], type=pa.int64()),
+                       pa.array([row['company_id'] for row in batch], type=pa.int64()),
+                       pa.array([to_text(row.get('description')) for row in batch], type=pa.string())]
+            columns += [pa.array([to_text(row.get(name)) for row in batch], type=pa.string())
+                        for name in JOB_STRING_FIELDS]
+            columns += [pa.array([to_number(row.get(name)) for row in batch], type=pa.float64())
+                        for name in JOB_NUMBER_FIELDS]
+            columns += [pa.array([to_text(row.get(name)) for row in batch], type=pa.string())
+                        for name in JOB_DATE_FIELDS]
+            columns += [pa.array([to_text_list(row.get(name)) for row in batch], type=pa.list_(pa.string()))
+                        for name in ('skills', 'requirements')]
+            columns += [embedding_array(batch, name, self.embedding_dim) for name in JOB_EMBEDDING_FIELDS]
+            self.jobs_writer.write(columns)
+        self.job_rows = []
+
+    def close(self):
+        self.flush_companies()
+        self.flush_jobs()
+        self.companies_writer.close()
+        self.jobs_writer.close()
+
+
+def export_columnar(input_file, output_dir, file_format='parquet', batch_size=10000, embedding_dim=None):
+    """Xuất file transformed_companies.json/.jsonl thành companies.<fmt> và jobs.<fmt> trong output_dir."""
+    exporter = ColumnarExporter(output_dir, file_format, batch_size, embedding_dim)
+    for company in iter_records(input_file):
+        exporter.add_company(company)
+    exporter.close()
+    return exporter
+
+
+def embedding_chunk(chunk):
+    """
+    View numpy (n, dim) float32 trên buffer giá trị của một chunk fixed_size_list, không copy,
+    kèm mask các dòng có vector (hàng của job chưa có vector chứa giá trị bất kỳ).
+    """
+    dim = chunk.type.list_size
+    child = chunk.values
+    start = child.offset + chunk.offset * dim
+    values = np.frombuffer(child.buffers()[1], dtype=np.float32, count=len(chunk) * dim,
+                           offset=start * 4).reshape(-1, dim)
+    if chunk.null_count:
+        valid = chunk.is_valid().to_numpy(zero_copy_only=False)
+    else:
+        valid = np.ones(len(chunk), dtype=bool)
+    return values, valid
+
+
+def load_job_embeddings(path, field='titleEmbedding'):
+    """
+    Đọc một cột embedding của bảng jobs: trả về (vectors (n, dim) float32, valid (n,) bool).
+    - .arrow: dữ liệu được memory-map; nếu cột chỉ có một chunk (file ghi với --batch-size >= số jobs)
+      thì vectors là view trên file, không copy; nhiều chunk thì ghép lại (copy một lần)
+    - .parquet: giải nén cột đó rồi ghép các chunk
+    Hàng có valid = False là job chưa có vector, giá trị trong hàng đó không có nghĩa.
+    File xuất khi chưa có vector nào: vectors có dạng (n, 0), valid toàn False.
+    """
+    require_pyarrow()
+    if path.endswith('.arrow'):
+        table = pa_ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    else:
+        table = pq.read_table(path, columns=['job_id', field])
+    column = table.column(field)
+    if not pa.types.is_fixed_size_list(column.type):
+        if column.null_count == len(column):
+            # File xuất khi chưa có vector nào: mọi job đều chưa có vector
+            return np.empty((len(column), 0), dtype=np.float32), np.zeros(len(column), dtype=bool)
+        raise ValueError(f"Cột {field} không phải vector cố định chiều")
+    chunks = [embedding_chunk(chunk) for chunk in column.chunks]
+    if len(chunks) == 1:
+        return chunks[0]
+    if not chunks:
+        return np.empty((0, column.type.list_size), dtype=np.float32), np.empty(0, dtype=bool)
+    return np.concatenate([values for values, _ in chunks]), np.concatenate([valid for _, valid in chunks])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xuất companies/jobs ra bảng cột Parquet hoặc Arrow IPC")
+    parser.add_argument("-i", "--input", default='transformed_companies.json',
+                        help="File transformed_companies.json hoặc .jsonl")
+    parser.add_argument("-o", "--output-dir", default='columnar', help="Thư mục chứa companies.* và jobs.*")
+    parser.add_argument("-f", "--format", choices=FORMATS, default='parquet', help="Định dạng bảng cột")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Số dòng mỗi record batch")
+    parser.add_argument("--embedding-dim", type=int,
+                        help="Số chiều vector embedding (mặc định: tự nhận từ vector đầu tiên)")
+    args = parser.parse_args()
+
+    print(f"🔄 Đang xuất {args.input} -> {args.output_dir}/ ({args.format})")
+    started = time.monotonic()
+    try:
+        exporter = export_columnar(args.input, args.output_dir, args.format, args.batch_size, args.embedding_dim)
+    except FileNotFoundError:
+        print(f"❌ Lỗi: Không tìm thấy file '{args.input}'")
+        return
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Lỗi: {e}")
+        return
+
+    print(f"✅ Hoàn thành trong {time.monotonic() - started:.1f}s")
+    print(f"\n📊 Thống kê:")
+    print(f"   - companies: {exporter.company_count} dòng -> {exporter.table_path('companies')}")
+    print(f"   - jobs: {exporter.job_count} dòng -> {exporter.table_path('jobs')}")
+    print(f"   - Embedding: {f'{exporter.embedding_dim} chiều' if exporter.embedding_dim else 'chưa có vector'}")
+
+
+if __name__ == "__main__":
+    main()
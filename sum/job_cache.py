@@ -0,0 +1,85 @@
+import hashlib
+import json
+import sqlite3
+
+# Tăng số này khi thay đổi logic tóm tắt/chuyển đổi để toàn bộ cache cũ bị bỏ qua
+CACHE_VERSION = 2
+
+
+def job_key(job):
+    """Hash nội dung job gốc (toàn bộ trường nguồn: description, *Sum, budget, ...) làm khóa cache."""
+    payload = json.dumps(job, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(f"{CACHE_VERSION}:{payload}".encode('utf-8')).hexdigest()
+
+
+class JobCache:
+    """
+    Cache trên đĩa (SQLite) lưu kết quả đã tóm tắt + chuyển đổi của từng job, khóa theo hash nội dung.
+
+    Mỗi lần chạy có một run id; các khóa được dùng trong lần chạy được đánh dấu bằng run id đó.
+    Sau khi chạy xong, evict_stale() xóa các job không còn xuất hiện trong dữ liệu.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, result TEXT NOT NULL, run_id INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'run_id'").fetchone()
+        self.run_id = (row[0] if row else 0) + 1
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('run_id', ?)", (self.run_id,))
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_many(self, keys):
+        """Trả về dict key -> kết quả đã cache, đồng thời đánh dấu các khóa trúng cache thuộc lần chạy này."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # SQLite giới hạn số tham số trong một câu lệnh
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT key, result FROM jobs WHERE key IN ({placeholders})", chunk)
+            for key, result in rows:
+                found[key] = json.loads(result)
+        if found:
+            self.conn.executemany("UPDATE jobs SET run_id = ? WHERE key = ?",
+                                  [(self.run_id, key) for key in found])
+        for key in keys:
+            if key in found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def put_many(self, items):
+        """Lưu các cặp (key, kết quả) vào cache."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO jobs (key, result, run_id) VALUES (?, ?, ?)",
+            [(key, json.dumps(result, ensure_ascii=False), self.run_id) for key, result in items])
+
+    def commit(self):
+        self.conn.commit()
+
+    def evict_stale(self):
+        """Xóa các job không xuất hiện trong lần chạy này. Chỉ gọi khi đã chạy hết dữ liệu."""
+        cursor = self.conn.execute("DELETE FROM jobs WHERE run_id < ?", (self.run_id,))
+        self.evicted = cursor.rowcount
+        self.conn.commit()
+        return self.evicted
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,326 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+from json_stream import iter_records
+
+DEFAULT_INDEX = 'search_index.sqlite'
+# Trọng số bm25 của các cột FTS: title, skills, requirements, description, location
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 3.0)
+FACET_LIMIT = 10
+BATCH_SIZE = 2000
+
+
+def build_fold_table():
+    """Bảng str.translate bỏ dấu tiếng Việt: 'ế' -> 'e', 'đ' -> 'd', bỏ dấu tổ hợp (text dạng NFD)."""
+    table = {0x0110: 'D', 0x0111: 'd'}
+    for code in range(0x00C0, 0x1F00):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFD', char) if not unicodedata.combining(c))
+        if base != char and len(base) == 1:
+            table[code] = base
+    for code in range(0x0300, 0x0370):
+        table[code] = None
+    return str.maketrans(table)
+
+
+FOLD_TABLE = build_fold_table()
+_QUERY_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w+')
+# Tách địa chỉ theo ',' hoặc ' - ' / ' – ' ('Ngã Tư Sở - Đống Đa - Hà Nội')
+_LOCATION_SPLIT_RE = re.compile(r'\s*(?:,|\s[-–]\s)\s*')
+_CITY_PREFIX_RE = re.compile(r'^(?:\d+\.\s*)?(?:thành phố|tp\.?|tỉnh)\s*', re.IGNORECASE)
+# Phần trong ngoặc và thẻ HTML sót lại không phải địa danh
+_NOISE_RE = re.compile(r'\([^)]*\)|<[^>]*>')
+COUNTRY_NAMES = frozenset(('viet nam', 'vietnam', 'vn'))
+# Tên viết tắt (đã bỏ dấu, bỏ khoảng trắng và dấu chấm) -> tên tỉnh/thành
+CITY_ALIASES = {'hcm': 'Hồ Chí Minh', 'hcmc': 'Hồ Chí Minh', 'hochiminh': 'Hồ Chí Minh', 'hochiminhcity': 'Hồ Chí Minh',
+                'saigon': 'Hồ Chí Minh', 'hn': 'Hà Nội'}
+
+
+def fold(text):
+    """Chữ thường, bỏ dấu: 'Kế Toán Hà Nội' -> 'ke toan ha noi' (dùng cho cả lúc index và lúc tìm)."""
+    return text.translate(FOLD_TABLE).lower()
+
+
+def as_text(value):
+    """Chuỗi của trường (danh sách như skills, location nhiều địa chỉ được nối bằng ', ')."""
+    if isinstance(value, list):
+        return ', '.join(item for item in value if isinstance(item, str))
+    return value if isinstance(value, str) else ''
+
+
+def city_key(city):
+    """Khóa gộp facet tỉnh/thành: 'Hà Nội' và 'ha noi' là cùng một địa điểm."""
+    return fold(city)
+
+
+def city_of(location):
+    """
+    Tỉnh/thành của địa chỉ job, dùng để đếm facet: phần cuối không phải tên nước, bỏ 'Thành phố'/'TP.'/'Tỉnh'
+    ('Cầu Giấy, Hà Nội.' -> 'Hà Nội', 'TP.HCM, Việt Nam' -> 'Hồ Chí Minh').
+    """
+    for part in reversed(_LOCATION_SPLIT_RE.split(_NOISE_RE.sub('', as_text(location)))):
+        city = _CITY_PREFIX_RE.sub('', part.strip(' .;')).strip(' .;')
+        key = city_key(city)
+        if city and key not in COUNTRY_NAMES:
+            return CITY_ALIASES.get(key.replace(' ', '').replace('.', ''), city)
+    return ''
+
+
+def match_expression(query='', skills=(), location=None):
+    """
+    Câu MATCH của FTS5 từ câu tìm kiếm: các từ (hoặc "cụm từ" trong ngoặc kép) đều phải có,
+    kèm điều kiện theo cột skills / location. Trả về '' nếu không có điều kiện nào.
+    """
+    parts = []
+    for phrase, word in _QUERY_TERM_RE.findall(query or ''):
+        words = _WORD_RE.findall(fold(phrase or word))
+        if words:
+            parts.append('"' + ' '.join(words) + '"')
+    for column, values in (('skills', skills or ()), ('location', [location] if location else ())):
+        for value in values:
+            words = _WORD_RE.findall(fold(value))
+            if words:
+                parts.append(f'{column} : "' + ' '.join(words) + '"')
+    return ' AND '.join(parts)
+
+
+class JobSearchIndex:
+    """
+    Index tìm kiếm toàn văn (SQLite FTS5) trên title, skills, requirements, description, location của jobs đã transform.
+    Text được bỏ dấu trước khi index nên tìm 'ke toan' hay 'kế toán' đều ra cùng kết quả.
+    Cập nhật theo từng shard: shard không đổi được bỏ qua, shard đổi được index lại, job trùng jobUrl giữ bản mới nhất
+    (jobUrl thuộc về shard được index sau cùng có chứa nó).
+    """
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+                              "title, skills, requirements, description, location, tokenize='unicode61')")
+        except sqlite3.OperationalError as e:
+            self.conn.close()
+            raise RuntimeError(f"SQLite của Python không hỗ trợ FTS5: {e}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS shards (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                          "mtime_ns INTEGER NOT NULL, jobs INTEGER NOT NULL, indexed_at REAL NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, shard TEXT NOT NULL, job_url TEXT, "
+                          "title TEXT, company TEXT, industry TEXT, location TEXT, city TEXT, budget TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_shard ON jobs (shard)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_url ON jobs (job_url)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_industry ON jobs (industry)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def _delete(self, where, params):
+        self.conn.execute(f"DELETE FROM jobs_fts WHERE rowid IN (SELECT id FROM jobs WHERE {where})", params)
+        return self.conn.execute(f"DELETE FROM jobs WHERE {where}", params).rowcount
+
+    def _insert(self, shard, rows):
+        """Thêm một lô jobs; job trùng jobUrl (trong lô hoặc đã có trong index) giữ bản sau cùng. Trả về các shard bị lấy job."""
+        latest = {}
+        for position, row in enumerate(rows):
+            key = row[1] or position
+            latest.pop(key, None)
+            latest[key] = row
+        rows = list(latest.values())
+        urls = [row[1] for row in rows if row[1]]
+        displaced = set()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            where = f"job_url IN ({','.join('?' * len(chunk))})"
+            displaced.update(other for other, in self.conn.execute(
+                f"SELECT DISTINCT shard FROM jobs WHERE {where} AND shard != ?", chunk + [shard]))
+            self._delete(where, chunk)
+        next_id = (self.conn.execute("SELECT MAX(id) FROM jobs").fetchone()[0] or 0) + 1
+        ids = range(next_id, next_id + len(rows))
+        self.conn.executemany("INSERT INTO jobs (id, shard, job_url, title, company, industry, location, city, budget) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              [(job_id, shard) + row[1:] for job_id, row in zip(ids, rows)])
+        self.conn.executemany("INSERT INTO jobs_fts (rowid, title, skills, requirements, description, location) "
+                              "VALUES (?, ?, ?, ?, ?, ?)",
+                              [(job_id,) + row[0] for job_id, row in zip(ids, rows)])
+        return displaced
+
+    def add_shard(self, path, force=False):
+        """
+        Index (lại) một file companies đã transform (.json/.jsonl). Trả về số jobs của shard còn lại trong index
+        (sau khi bỏ trùng jobUrl), hoặc None nếu shard không đổi kể từ lần index trước.
+        Một jobUrl thuộc về shard được index sau cùng có chứa nó: job đó bị xóa khỏi shard cũ (số jobs của shard cũ
+        được cập nhật lại).
+        """
+        shard = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime_ns FROM shards WHERE path = ?", (shard,)).fetchone()
+        if not force and row == (stat.st_size, stat.st_mtime_ns):
+            return None
+
+        self._delete("shard = ?", (shard,))
+        displaced = set()
+        rows = []
+        for company in iter_records(path):
+            company_name = as_text(company.get('name'))
+            industry = as_text(company.get('industry'))
+            for job in company.get('jobs') or []:
+                location = as_text(job.get('location'))
+                text = tuple(fold(as_text(job.get(field)))
+                             for field in ('title', 'skills', 'requirements', 'description', 'location'))
+                rows.append((text, as_text(job.get('jobUrl')), as_text(job.get('title')), company_name, industry,
+                             location, city_of(location), as_text(job.get('budget'))))
+                if len(rows) >= BATCH_SIZE:
+                    displaced |= self._insert(shard, rows)
+                    rows = []
+        displaced |= self._insert(shard, rows)
+        count = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE shard = ?", (shard,)).fetchone()[0]
+        self.conn.execute("INSERT OR REPLACE INTO shards (path, size, mtime_ns, jobs, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                          (shard, stat.st_size, stat.st_mtime_ns, count, time.time()))
+        self.conn.executemany("UPDATE shards SET jobs = (SELECT COUNT(*) FROM jobs WHERE shard = ?) WHERE path = ?",
+                              [(other, other) for other in displaced])
+        self.conn.commit()
+        return count
+
+    def remove_shard(self, path):
+        """
+        Xóa các jobs đang thuộc shard khỏi index. Trả về số jobs đã xóa.
+        Job mà shard này đã lấy từ shard cũ (trùng jobUrl) không tự quay lại shard cũ: index lại shard cũ với --force.
+        """
+        shard = os.path.abspath(path)
+        removed = self._delete("shard = ?", (shard,))
+        self.conn.execute("DELETE FROM shards WHERE path = ?", (shard,))
+        self.conn.commit()
+        return removed
+
+    def optimize(self):
+        """Gộp các segment của FTS5 (nên chạy sau khi index nhiều shard) để truy vấn nhanh hơn."""
+        self.conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+        self.conn.commit()
+
+    def search(self, query='', skills=(), location=None, industry=None, limit=20, offset=0):
+        """
+        Tìm jobs theo từ khóa / skill / địa điểm (không phân biệt dấu) và ngành (khớp chính xác).
+        Trả về dict: total, results (sắp theo bm25, title nặng nhất), facets {'industry': [...], 'city': [...]}.
+        """
+        expression = match_expression(query, skills, location)
+        conditions = []
+        params = []
+        if expression:
+            # CROSS JOIN: luôn duyệt kết quả FTS trước rồi mới lọc theo ngành (không để SQLite chọn index industry)
+            source = "jobs_fts CROSS JOIN jobs ON jobs.id = jobs_fts.rowid"
+            conditions.append("jobs_fts MATCH ?")
+            params.append(expression)
+            order = f"bm25(jobs_fts, {', '.join(map(str, COLUMN_WEIGHTS))})"
+        else:
+            source = "jobs"
+            order = "jobs.id"
+        if industry:
+            conditions.append("jobs.industry = ?")
+            params.append(industry)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        # Tổng số và hai facet lấy trong cùng một lượt duyệt kết quả (gộp theo cặp ngành, tỉnh/thành)
+        industries = {}
+        cities = {}
+        for industry_value, city, count in self.conn.execute(
+                f"SELECT jobs.industry, jobs.city, COUNT(*) FROM {source} {where} GROUP BY jobs.industry, jobs.city",
+                params):
+            industries[industry_value] = industries.get(industry_value, 0) + count
+            # Gộp theo dạng bỏ dấu, hiển thị cách viết gặp nhiều nhất
+            labels = cities.setdefault(city_key(city), {})
+            labels[city] = labels.get(city, 0) + count
+        city_counts = {max(labels, key=labels.get): sum(labels.values()) for labels in cities.values()}
+        facets = {facet: sorted(counts.items(), key=lambda item: -item[1])[:FACET_LIMIT]
+                  for facet, counts in (('industry', industries), ('city', city_counts))}
+        rows = self.conn.execute(
+            f"SELECT jobs.title, jobs.company, jobs.industry, jobs.location, jobs.budget, jobs.job_url "
+            f"FROM {source} {where} ORDER BY {order} LIMIT ? OFFSET ?", params + [limit, offset])
+        results = [dict(zip(('title', 'company', 'industry', 'location', 'budget', 'jobUrl'), row)) for row in rows]
+        return {'total': sum(industries.values()), 'results': results, 'facets': facets}
+
+    def shards(self):
+        return self.conn.execute("SELECT path, jobs, indexed_at FROM shards ORDER BY path").fetchall()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tìm kiếm toàn văn jobs/companies đã transform (SQLite FTS5, bỏ dấu tiếng Việt)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Index (thêm/cập nhật) các shard companies đã transform")
+    index_parser.add_argument("inputs", nargs="+", help="transformed_companies.json, các shard .json/.jsonl, ...")
+    index_parser.add_argument("--force", action="store_true", help="Index lại cả shard không đổi")
+    index_parser.add_argument("--optimize", action="store_true", help="Gộp segment FTS sau khi index (truy vấn nhanh hơn)")
+
+    remove_parser = subparsers.add_parser("remove", help="Xóa các shard khỏi index (job trùng jobUrl với shard khác "
+                                                         "chỉ có lại khi index lại shard đó với --force)")
+    remove_parser.add_argument("inputs", nargs="+")
+
+    search_parser = subparsers.add_parser("search", help="Tìm jobs")
+    search_parser.add_argument("query", nargs="?", default='', help='Từ khóa, vd: \'"kế toán" tổng hợp\'')
+    search_parser.add_argument("-s", "--skill", action="append", default=[], help="Skill bắt buộc (lặp lại được)")
+    search_parser.add_argument("-l", "--location", help="Địa điểm, vd: 'ha noi'")
+    search_parser.add_argument("--industry", help="Ngành (khớp chính xác, xem danh sách ở facet)")
+    search_parser.add_argument("-n", "--limit", type=int, default=10)
+    search_parser.add_argument("--offset", type=int, default=0)
+
+    for sub in (index_parser, remove_parser, search_parser):
+        sub.add_argument("--index", default=DEFAULT_INDEX, help="File index SQLite")
+    args = parser.parse_args()
+
+    try:
+        with JobSearchIndex(args.index) as index:
+            if args.command == "index":
+                started = time.monotonic()
+                total = 0
+                for path in args.inputs:
+                    shard_started = time.monotonic()
+                    count = index.add_shard(path, args.force)
+                    if count is None:
+                        print(f"⏭️  {path}: không đổi, bỏ qua")
+                    else:
+                        total += count
+                        print(f"✅ {path}: {count} jobs ({time.monotonic() - shard_started:.1f}s)")
+                if args.optimize:
+                    index.optimize()
+                elapsed = time.monotonic() - started
+                print(f"📊 Đã index {total} jobs trong {elapsed:.1f}s, index có {len(index)} jobs -> {args.index}")
+            elif args.command == "remove":
+                for path in args.inputs:
+                    print(f"🗑️  {path}: đã xóa {index.remove_shard(path)} jobs")
+            else:
+                started = time.perf_counter()
+                found = index.search(args.query, args.skill, args.location, args.industry, args.limit, args.offset)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                print(f"🔍 {found['total']} jobs ({elapsed_ms:.1f} ms)")
+                for position, job in enumerate(found['results'], args.offset + 1):
+                    print(f"   {position:>3}. {job['title']} - {job['company']}")
+                    print(f"        {job['location']} | {job['budget'] or 'N/A'} | {job['jobUrl']}")
+                for facet, label in (('industry', 'Ngành'), ('city', 'Địa điểm')):
+                    if found['facets'][facet]:
+                        print(f"   {label}: " + ', '.join(f"{value or '(trống)'} ({count})"
+                                                      for value, count in found['facets'][facet]))
+    except FileNotFoundError as e:
+        print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Lỗi: {e}")
+
+
+if __name__ == "__main__":
+    main()
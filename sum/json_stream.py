@@ -0,0 +1,265 @@
+import codecs
+import json
+import re
+
+# Kích thước mỗi lần đọc file (bytes)
+CHUNK_SIZE = 1 << 20
+
+_WS_RE = re.compile(r'\s*')
+_SKIP_RE = re.compile(r'[\s,]*')
+
+
+def iter_array_spans(path, chunk_size=CHUNK_SIZE, start_offset=None):
+    """
+    Đọc dần một file JSON có dạng mảng ở top-level (vd: danh sách companies)
+    và trả về từng phần tử ngay khi parse xong, không load cả file vào RAM.
+
+    Yield tuple (byte_offset, byte_length, item):
+    - byte_offset: vị trí byte bắt đầu của phần tử trong file
+    - byte_length: số byte của phần tử
+    - item: object đã được parse
+
+    start_offset: nếu có, bắt đầu đọc ngay tại byte này (phải là vị trí giữa
+    hai phần tử của mảng, vd: byte_offset + byte_length của phần tử trước đó).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    with open(path, 'rb') as f:
+        buf = ''
+        pos = 0
+        byte_pos = 0
+        eof = False
+        read_size = chunk_size
+
+        def read_more():
+            nonlocal buf, pos, eof
+            data = f.read(read_size)
+            if not data:
+                eof = True
+                buf += utf8.decode(b'', final=True)
+                return
+            # Bỏ phần đã xử lý để buffer không phình to
+            if pos:
+                buf = buf[pos:]
+                pos = 0
+            buf += utf8.decode(data)
+
+        if start_offset is not None:
+            f.seek(start_offset)
+            byte_pos = start_offset
+        else:
+            # Bỏ qua BOM nếu có
+            if f.read(3) == codecs.BOM_UTF8:
+                byte_pos = 3
+            else:
+                f.seek(0)
+
+            # Tìm dấu '[' mở đầu
+            while True:
+                match = _WS_RE.match(buf, pos)
+                byte_pos += match.end() - pos
+                pos = match.end()
+                if pos < len(buf) or eof:
+                    break
+                read_more()
+
+            if pos >= len(buf) or buf[pos] != '[':
+                raise json.JSONDecodeError("Expected top-level JSON array", buf, pos)
+            pos += 1
+            byte_pos += 1
+
+        while True:
+            # Bỏ qua khoảng trắng và dấu phẩy giữa các phần tử
+            match = _SKIP_RE.match(buf, pos)
+            byte_pos += match.end() - pos
+            pos = match.end()
+            if pos >= len(buf):
+                if eof:
+                    raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+                read_more()
+                continue
+            if buf[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Phần tử chưa đọc hết -> đọc thêm, tăng dần kích thước đọc
+                read_more()
+                read_size = min(read_size * 2, chunk_size * 64)
+                continue
+
+            if not eof:
+                # Phần tử có thể bị cắt ngang (vd: số '12' của '12.5' ở cuối buffer):
+                # chỉ nhận khi đã thấy ',' hoặc ']' ngay sau nó
+                after = _WS_RE.match(buf, end).end()
+                if after >= len(buf) or buf[after] not in ',]':
+                    read_more()
+                    read_size = min(read_size * 2, chunk_size * 64)
+                    continue
+
+            read_size = chunk_size
+            byte_length = len(buf[pos:end].encode('utf-8'))
+            yield byte_pos, byte_length, item
+            byte_pos += byte_length
+            pos = end
+
+
+def iter_array_items(path, chunk_size=CHUNK_SIZE):
+    """Đọc dần từng phần tử của một mảng JSON top-level."""
+    for _, _, item in iter_array_spans(path, chunk_size):
+        yield item
+
+
+# Encoder nhanh (tùy chọn): dùng orjson nếu đã cài, nếu không thì dùng json của thư viện chuẩn
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Các chế độ ghi file đầu ra
+# - pretty: giống json.dump(..., ensure_ascii=False, indent=2) như trước đây
+# - compact: mảng JSON không thụt lề, không khoảng trắng
+# - jsonl: JSON Lines, mỗi company một dòng
+OUTPUT_MODES = ('pretty', 'compact', 'jsonl')
+COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def dumps_compact(item):
+    """Encode gọn một object thành bytes UTF-8 (orjson nếu có)."""
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encode_item(item, mode='pretty'):
+    """Encode một phần tử thành bytes theo chế độ ghi (pretty đã thụt lề sẵn như trong mảng)."""
+    if mode == 'pretty':
+        return b'  ' + json.dumps(item, ensure_ascii=False, indent=2).replace('\n', '\n  ').encode('utf-8')
+    return dumps_compact(item)
+
+
+def output_path(stem, mode='pretty', compression=None):
+    """Tên file đầu ra theo chế độ ghi, vd: transformed_companies.jsonl.gz"""
+    path = stem + ('.jsonl' if mode == 'jsonl' else '.json')
+    if compression:
+        path += COMPRESSION_EXTENSIONS[compression]
+    return path
+
+
+def open_binary_output(path, compression=None):
+    """Mở file để ghi bytes, có thể nén gzip hoặc zstd (cần cài gói zstandard)."""
+    if compression is None:
+        return open(path, 'wb')
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Nén zstd cần cài gói 'zstandard' (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+    raise ValueError(f"Kiểu nén không hỗ trợ: {compression}")
+
+
+class JsonArrayWriter:
+    """
+    Ghi dần một mảng JSON ra file, từng phần tử một.
+    Chế độ 'pretty' cho đầu ra giống hệt json.dump(list, ensure_ascii=False, indent=2),
+    chế độ 'compact' ghi mảng JSON gọn trên một dòng.
+    bytes_written là số byte JSON (trước khi nén).
+    """
+
+    def __init__(self, path, mode='pretty', compression=None):
+        self.path = path
+        self.mode = mode
+        self.compression = compression
+        self.count = 0
+        self.bytes_written = 0
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        self._file = open_binary_output(self.path, self.compression)
+        return self
+
+    def encode(self, item):
+        """Chuyển một phần tử thành bytes JSON theo chế độ ghi."""
+        return encode_item(item, self.mode)
+
+    def write(self, item):
+        self.write_encoded(self.encode(item))
+
+    def write_encoded(self, data):
+        if self.mode == 'pretty':
+            prefix = b'[\n' if self.count == 0 else b',\n'
+        else:
+            prefix = b'[' if self.count == 0 else b','
+        self._write(prefix)
+        self._write(data)
+        self.count += 1
+
+    def _write(self, data):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def _closing_bytes(self):
+        if not self.count:
+            return b'[]'
+        return b'\n]' if self.mode == 'pretty' else b']'
+
+    def close(self):
+        if self._file is None:
+            return
+        self._write(self._closing_bytes())
+        self._file.close()
+        self._file = None
+
+
+class JsonLinesWriter(JsonArrayWriter):
+    """Ghi dần dạng JSON Lines: mỗi phần tử một dòng JSON gọn."""
+
+    def __init__(self, path, mode='jsonl', compression=None):
+        super().__init__(path, 'jsonl', compression)
+
+    def write_encoded(self, data):
+        self._write(data)
+        self._write(b'\n')
+        self.count += 1
+
+    def _closing_bytes(self):
+        return b''
+
+
+def open_writer(path, mode='pretty', compression=None):
+    """Tạo writer phù hợp với chế độ ghi (pretty/compact/jsonl) và kiểu nén."""
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Chế độ ghi không hỗ trợ: {mode}")
+    writer_class = JsonLinesWriter if mode == 'jsonl' else JsonArrayWriter
+    return writer_class(path, mode, compression)
+
+
+def iter_json_lines(path):
+    """Đọc dần từng dòng của một file JSON Lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path):
+    """Đọc dần companies từ file .json (mảng) hoặc .jsonl."""
+    if path.endswith('.jsonl'):
+        return iter_json_lines(path)
+    return iter_array_items(path)
@@ -0,0 +1,225 @@
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    # Windows không có module resource
+    resource = None
+
+
+def peak_rss_bytes():
+    """RSS cao nhất của tiến trình (bytes), None nếu hệ điều hành không hỗ trợ."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Stage:
+    def __init__(self, name, upstream=None):
+        self.name = name
+        self.upstream = upstream
+        self.seconds = 0.0
+        self.records = 0
+
+    @property
+    def self_seconds(self):
+        """Thời gian của riêng stage (trừ thời gian chờ stage phía trước trong chuỗi generator)."""
+        return max(0.0, self.seconds - (self.upstream.seconds if self.upstream else 0.0))
+
+
+class Metrics:
+    """
+    Thu thập số liệu của một lần chạy: thời gian và số record mỗi stage, bộ đếm, bytes đọc/ghi,
+    RSS cao nhất và (tùy chọn) ảnh chụp tracemalloc.
+    """
+
+    def __init__(self, name, trace_memory=False, top_allocations=10):
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stage(self, name, upstream=None):
+        if name not in self.stages:
+            self.stages[name] = Stage(name, upstream)
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, records=0):
+        """Đo thời gian một khối lệnh: with metrics.stage('parse'): ..."""
+        stage = self._stage(name)
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - started
+            stage.records += records
+
+    def wrap(self, iterable, name, upstream=None, size=None):
+        """
+        Bọc một stage dạng generator: đo thời gian lấy từng phần tử và đếm số phần tử.
+        upstream: tên stage phía trước trong chuỗi, để tính thời gian riêng của stage này.
+        size: hàm đếm số record trong một phần tử (vd: len khi stage trả về từng batch).
+        """
+        # Tạo stage ngay (không đợi lần next() đầu tiên) để stage sau tìm được upstream
+        stage = self._stage(name, self.stages.get(upstream))
+        return self._timed(iter(iterable), stage, size)
+
+    @staticmethod
+    def _timed(iterator, stage, size):
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stage.seconds += time.perf_counter() - started
+                return
+            stage.seconds += time.perf_counter() - started
+            stage.records += size(item) if size else 1
+            yield item
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def read_file(self, path):
+        """Cộng kích thước file đầu vào (đã đọc hết) vào bytes_read."""
+        if path and os.path.isfile(path):
+            self.bytes_read += os.path.getsize(path)
+
+    def wrote_file(self, path):
+        """Cộng kích thước file đầu ra trên đĩa vào bytes_written."""
+        if path and os.path.isfile(path):
+            self.bytes_written += os.path.getsize(path)
+
+    def report(self):
+        """Báo cáo dạng dict (ghi ra JSON)."""
+        elapsed = time.perf_counter() - self.started
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = {
+                'seconds': round(stage.seconds, 6),
+                'selfSeconds': round(stage.self_seconds, 6),
+                'records': stage.records,
+                'recordsPerSecond': round(stage.records / stage.seconds, 2) if stage.seconds else None,
+            }
+        memory = {'peakRssBytes': peak_rss_bytes()}
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            memory['tracemallocCurrentBytes'] = current
+            memory['tracemallocPeakBytes'] = peak
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap>')])
+            memory['topAllocations'] = [
+                {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 'bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top_allocations]]
+        return {
+            'name': self.name,
+            'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started_at)),
+            'elapsedSeconds': round(elapsed, 6),
+            'stages': stages,
+            'counters': dict(self.counters),
+            'bytes': {'read': self.bytes_read, 'written': self.bytes_written},
+            'memory': memory,
+        }
+
+    def prometheus(self, report=None):
+        """Báo cáo dạng text exposition của Prometheus (dùng cho node_exporter textfile collector)."""
+        report = report or self.report()
+        job = re.sub(r'[^a-zA-Z0-9_]', '_', self.name)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ','.join(f'{key}="{val}"' for key, val in [('job', job)] + labels)
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric('pipeline_elapsed_seconds', 'gauge', 'Tổng thời gian chạy', [([], report['elapsedSeconds'])])
+        stages = report['stages']
+        metric('pipeline_stage_seconds', 'gauge', 'Thời gian mỗi stage',
+               [([('stage', name)], stage['seconds']) for name, stage in stages.items()])
+        metric('pipeline_stage_self_seconds', 'gauge', 'Thời gian riêng mỗi stage',
+               [([('stage', name)], stage['selfSeconds']) for name, stage in stages.items()])
+        metric('pipeline_stage_records', 'counter', 'Số record mỗi stage',
+               [([('stage', name)], stage['records']) for name, stage in stages.items()])
+        metric('pipeline_stage_records_per_second', 'gauge', 'Thông lượng mỗi stage',
+               [([('stage', name)], stage['recordsPerSecond']) for name, stage in stages.items()])
+        metric('pipeline_counter', 'counter', 'Bộ đếm của pipeline',
+               [([('name', name)], value) for name, value in report['counters'].items()])
+        metric('pipeline_bytes', 'counter', 'Bytes đọc/ghi',
+               [([('direction', direction)], value) for direction, value in report['bytes'].items()])
+        memory = report['memory']
+        metric('pipeline_peak_rss_bytes', 'gauge', 'RSS cao nhất', [([], memory.get('peakRssBytes'))])
+        metric('pipeline_tracemalloc_peak_bytes', 'gauge', 'Bộ nhớ Python cao nhất (tracemalloc)',
+               [([], memory.get('tracemallocPeakBytes'))])
+        return '\n'.join(lines) + '\n'
+
+
+def measure(metrics, iterable, name, upstream=None, size=None):
+    """metrics.wrap(...) nếu có metrics, ngược lại trả nguyên iterable (để hàm thư viện không bắt buộc đo)."""
+    return iterable if metrics is None else metrics.wrap(iterable, name, upstream, size)
+
+
+def timer(metrics, name, records=0):
+    """metrics.stage(...) nếu có metrics, ngược lại là context rỗng."""
+    return nullcontext() if metrics is None else metrics.stage(name, records)
+
+
+def add_arguments(parser):
+    """Thêm các tùy chọn đo đạc dùng chung cho các script."""
+    group = parser.add_argument_group("đo đạc")
+    group.add_argument("--metrics", metavar="FILE", help="Ghi báo cáo số liệu (JSON) ra FILE")
+    group.add_argument("--prometheus", metavar="FILE", help="Ghi số liệu dạng Prometheus text ra FILE")
+    group.add_argument("--tracemalloc", action="store_true", help="Theo dõi cấp phát bộ nhớ Python (chậm hơn)")
+    group.add_argument("--profile", metavar="FILE", help="Chạy với cProfile và ghi kết quả ra FILE (xem bằng pstats/snakeviz)")
+    return group
+
+
+@contextmanager
+def instrument(args, name):
+    """
+    Bọc phần chạy chính của một script: tạo Metrics, bật cProfile nếu có --profile,
+    và ghi báo cáo JSON/Prometheus khi kết thúc (kể cả khi script return sớm).
+    """
+    metrics = Metrics(name, trace_memory=getattr(args, 'tracemalloc', False))
+    profiler = None
+    if getattr(args, 'profile', None):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"🧪 Đã ghi cProfile: {args.profile}")
+        if getattr(args, 'metrics', None) or getattr(args, 'prometheus', None):
+            report = metrics.report()
+            if args.metrics:
+                with open(args.metrics, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                print(f"📈 Đã ghi số liệu: {args.metrics}")
+            if args.prometheus:
+                with open(args.prometheus, 'w', encoding='utf-8') as f:
+                    f.write(metrics.prometheus(report))
+                print(f"📈 Đã ghi số liệu Prometheus: {args.prometheus}")
@@ -0,0 +1,208 @@
+import argparse
+import copy
+import json
+import os
+import time
+
+from array_index import ArrayIndex
+from budget_normalizer import budget_stage
+from dedup_jobs import DEDUP_MODES, DedupIndex, dedup_stage
+from job_cache import JobCache, job_key
+from json_stream import COMPRESSIONS, OUTPUT_MODES, iter_array_items, open_writer, output_path
+from metrics import add_arguments, instrument, measure, timer
+from schema_validator import SchemaValidator, validate_stage
+from summarized_jobs import new_stats, summarize_company, summarize_job
+from transform_structure import transform_company, transform_job
+
+
+def summarize_stage(companies, totals):
+    """Tóm tắt các trường *Sum / descriptionSum của từng company."""
+    for company in companies:
+        stats = summarize_company(company)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        yield company
+
+
+def transform_stage(companies):
+    """Chuyển đổi cấu trúc company theo dataschema.json."""
+    for company in companies:
+        yield transform_company(company)
+
+
+def cached_stage(companies, cache, totals):
+    """
+    Tóm tắt + chuyển đổi bằng cache theo hash nội dung job:
+    chỉ các job mới hoặc đã thay đổi mới phải xử lý lại.
+    totals: jobs (mọi job đã qua stage), cacheHits / cacheMisses (job lấy lại từ cache / phải xử lý lại).
+    """
+    for company in companies:
+        jobs = company.get("jobs") or []
+        keys = [job_key(job) for job in jobs]
+        cached = cache.get_many(keys)
+
+        stats = new_stats()
+        transformed_jobs = []
+        new_results = []
+        used = set()
+        for key, job in zip(keys, jobs):
+            result = cached.get(key)
+            if result is None:
+                summarize_job(job, stats)
+                result = transform_job(job)
+                cached[key] = result
+                new_results.append((key, result))
+            elif key in used:
+                # Job giống hệt job trước trong cùng company: mỗi job một bản riêng vì các stage sau sửa job tại chỗ
+                result = copy.deepcopy(result)
+            used.add(key)
+            transformed_jobs.append(result)
+        cache.put_many(new_results)
+
+        # summarize_job chỉ đếm các job phải xử lý lại
+        stats['jobs'] = len(jobs)
+        stats['cacheMisses'] = len(new_results)
+        stats['cacheHits'] = len(jobs) - len(new_results)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+        transformed_company = transform_company(dict(company, jobs=[]))
+        transformed_company["jobs"] = transformed_jobs
+        yield transformed_company
+
+
+def run_pipeline(input_file, output_file, output_format='pretty', cache=None, compression=None, dedup_index=None,
+                 dedup_mode='flag', start=0, stop=None, metrics=None, validator=None, quarantine=None):
+    """
+    Đọc dần companies từ input_file, tóm tắt rồi chuyển đổi cấu trúc và ghi thẳng ra output_file.
+    Mỗi thời điểm chỉ giữ một company trong bộ nhớ, không tạo file summarized_companies.json trung gian.
+    Nếu có cache (JobCache), các job không thay đổi từ lần chạy trước được lấy lại từ cache.
+    Nếu có validator (SchemaValidator), record sai schema được ép kiểu hoặc tách ra quarantine (writer JSON Lines).
+    Nếu có dedup_index (DedupIndex), các job trùng gần đúng với job đã thấy được đánh dấu hoặc bỏ đi.
+    start/stop: chỉ xử lý các company [start, stop) qua index byte của input_file (array_index.py build),
+    để chạy tiếp từ giữa file hoặc chia file cho nhiều tiến trình.
+    metrics (metrics.Metrics, tùy chọn): đo thời gian từng stage và thời gian ghi file.
+    Trả về thống kê (companies, jobs, fields, descriptions, bytes).
+    """
+    totals = {}
+    partial_file = output_file + '.partial'
+
+    partial_run = bool(start) or stop is not None
+    array_index = ArrayIndex(input_file) if partial_run else None
+    try:
+        if partial_run:
+            companies = (company for _, company in array_index.iter_range(start, stop))
+        else:
+            companies = iter_array_items(input_file)
+        companies = measure(metrics, companies, 'parse')
+        if cache is None:
+            companies = measure(metrics, summarize_stage(companies, totals), 'summarize', 'parse')
+            companies = measure(metrics, transform_stage(companies), 'transform', 'summarize')
+            last_stage = 'transform'
+        else:
+            companies = measure(metrics, cached_stage(companies, cache, totals), 'cached', 'parse')
+            last_stage = 'cached'
+        companies = measure(metrics, budget_stage(companies, totals), 'budget', last_stage)
+        last_stage = 'budget'
+        if validator is not None:
+            companies = measure(metrics, validate_stage(companies, validator, quarantine, totals), 'validate', last_stage)
+            last_stage = 'validate'
+        if dedup_index is not None:
+            companies = measure(metrics, dedup_stage(companies, dedup_index, dedup_mode, totals), 'dedup', last_stage)
+
+        with open_writer(partial_file, output_format, compression) as writer:
+            for company in companies:
+                with timer(metrics, 'write', 1):
+                    writer.write(company)
+        os.replace(partial_file, output_file)
+    finally:
+        if array_index is not None:
+            array_index.close()
+
+    if not partial_run and cache is not None:
+        # Chỉ dọn cache khi đã chạy hết dữ liệu
+        cache.evict_stale()
+
+    totals['companies'] = writer.count
+    totals['bytes'] = writer.bytes_written
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tóm tắt và chuyển đổi cấu trúc companies trong một lượt đọc")
+    parser.add_argument("-i", "--input", default='companies.json', help="File JSON đầu vào (dữ liệu crawl)")
+    parser.add_argument("-o", "--output", help="File kết quả (mặc định: transformed_companies.json/.jsonl)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty', help="Chế độ ghi file đầu ra")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    parser.add_argument("--cache", help="File SQLite cache kết quả theo hash nội dung job (bỏ trống = không dùng cache)")
+    parser.add_argument("--quarantine", help="Kiểm tra theo dataschema.json, ghi record lỗi ra file JSON Lines này "
+                                             "(bỏ trống = không kiểm tra)")
+    parser.add_argument("--dedup-index", help="File chỉ mục LSH để phát hiện job trùng (bỏ trống = không dedup)")
+    parser.add_argument("--dedup-mode", choices=DEDUP_MODES, default='flag',
+                        help="flag: đánh dấu duplicateOf, collapse: bỏ job trùng")
+    parser.add_argument("--start", type=int, default=0, help="Bắt đầu từ company thứ n (cần index: array_index.py build)")
+    parser.add_argument("--stop", type=int, help="Dừng trước company thứ n (cần index)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    output_file = args.output or output_path('transformed_companies', args.format, args.compress)
+
+    with instrument(args, 'pipeline') as metrics:
+        print(f"🚀 Bắt đầu pipeline: {args.input} -> {output_file}")
+        started = time.monotonic()
+        cache = JobCache(args.cache) if args.cache else None
+        dedup_index = None
+        validator = quarantine = None
+        try:
+            dedup_index = DedupIndex(args.dedup_index) if args.dedup_index else None
+            if args.quarantine:
+                validator = SchemaValidator.from_file()
+                quarantine = open_writer(args.quarantine, 'jsonl').open()
+            totals = run_pipeline(args.input, output_file, args.format, cache, args.compress, dedup_index, args.dedup_mode,
+                                  args.start, args.stop, metrics, validator, quarantine)
+        except FileNotFoundError as e:
+            print(f"❌ Lỗi: Không tìm thấy file '{e.filename or args.input}'")
+            return
+        except json.JSONDecodeError as e:
+            print(f"❌ Lỗi: File '{args.input}' không đúng định dạng JSON: {e}")
+            return
+        except (ValueError, RuntimeError) as e:
+            print(f"❌ Lỗi: {e}")
+            return
+        finally:
+            if cache is not None:
+                cache.close()
+            if dedup_index is not None:
+                dedup_index.close()
+            if quarantine is not None:
+                quarantine.close()
+        elapsed = time.monotonic() - started
+        if not (args.start or args.stop is not None):
+            metrics.read_file(args.input)
+        metrics.wrote_file(output_file)
+        for key, value in totals.items():
+            metrics.count(key, value)
+
+        print(f"✅ Hoàn thành trong {elapsed:.1f}s")
+        print(f"\n📊 Thống kê:")
+        print(f"   - Tổng số companies: {totals['companies']}")
+        print(f"   - Tổng số jobs: {totals.get('jobs', 0)}")
+        print(f"   - Trường *Sum đã tóm tắt: {totals.get('fields', 0)}")
+        print(f"   - descriptionSum đã tạo: {totals.get('descriptions', 0)}")
+        print(f"   - Jobs có khoảng lương: {totals.get('budgets', 0)}")
+        print(f"   - File đầu ra: {output_file} ({totals['bytes']} bytes)")
+        if cache is not None:
+            print(f"   - Cache: {totals.get('cacheHits', 0)} jobs lấy từ cache, "
+                  f"{totals.get('cacheMisses', 0)} jobs xử lý lại, {cache.evicted} job cũ đã xóa ({args.cache})")
+        if validator is not None:
+            print(f"   - Schema: {validator.invalid_jobs} jobs / {validator.invalid_companies} companies lỗi, "
+                  f"{sum(validator.coerced.values())} giá trị đã ép kiểu -> {args.quarantine}")
+        if dedup_index is not None:
+            jobs = totals.get('dedupJobs', 0)
+            duplicates = totals.get('duplicates', 0)
+            ratio = duplicates / jobs if jobs else 0
+            print(f"   - Dedup: {duplicates}/{jobs} jobs trùng ({ratio:.1%}), {jobs / max(elapsed, 1e-9):.0f} jobs/s")
+
+
+if __name__ == "__main__":
+    main()
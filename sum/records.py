@@ -0,0 +1,141 @@
+import sys
+from collections.abc import MutableMapping
+
+# Các layout (thứ tự khóa) dùng chung giữa các record: hầu hết record có cùng một layout
+_layouts = {}
+
+
+def shared_layout(keys):
+    layout = tuple(keys)
+    return _layouts.setdefault(layout, layout)
+
+
+def intern_value(value):
+    """Intern chuỗi, hoặc từng chuỗi trong danh sách (vd: skills, location của company)."""
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return [sys.intern(item) if type(item) is str else item for item in value]
+    return value
+
+
+class Record(MutableMapping):
+    """
+    Record gọn thay cho dict: giá trị các trường đã biết nằm trong __slots__, thứ tự khóa là một tuple dùng chung,
+    trường lạ (vd: duplicateOf) nằm trong dict _extra. Các trường phân loại lặp lại nhiều được intern.
+    Dùng được như dict (job['title'], job.get(...), 'x' in job) nên các stage hiện có chạy được không cần sửa;
+    to_dict() trả lại đúng dict ban đầu (cùng khóa, cùng thứ tự).
+    """
+
+    __slots__ = ('_layout', '_extra')
+    FIELDS = ()
+    INTERNED = frozenset()
+    # Trường chứa danh sách record con: tên trường -> class
+    NESTED = {}
+    FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELD_SET = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        record._layout = shared_layout(data)
+        record._extra = None
+        for key, value in data.items():
+            record._set(key, value)
+        return record
+
+    def _set(self, key, value):
+        if key in self.NESTED and type(value) is list:
+            nested = self.NESTED[key]
+            value = [nested.from_dict(item) if type(item) is dict else item for item in value]
+        elif key in self.INTERNED:
+            value = intern_value(value)
+        if key in self.FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def to_dict(self):
+        result = {}
+        extra = self._extra
+        for key in self._layout:
+            value = extra[key] if extra is not None and key in extra else getattr(self, key)
+            if key in self.NESTED and type(value) is list:
+                value = [item.to_dict() if isinstance(item, Record) else item for item in value]
+            result[key] = value
+        return result
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._layout = shared_layout(self._layout + (key,))
+        self._set(key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._layout = shared_layout(k for k in self._layout if k != key)
+        if key in self.FIELD_SET:
+            delattr(self, key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        if key in self.FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+JOB_FIELDS = ('title', 'source', 'location', 'workArrangement', 'jobType', 'description', 'budget', 'budgetMin',
+              'budgetMax', 'budgetCurrency', 'budgetPeriod', 'skills', 'requirements', 'status', 'jobUrl',
+              'applicationDeadline', 'descriptionRaw', 'postedDate', 'titleSum', 'locationSum', 'skillsSum',
+              'requirementsSum', 'descriptionSum', 'titleEmbedding', 'locationEmbedding', 'skillsEmbedding',
+              'requirementsEmbedding', 'descriptionEmbedding')
+COMPANY_FIELDS = ('name', 'nameEmbedding', 'website', 'description', 'size', 'industry', 'location', 'email', 'phone',
+                  'jobs')
+
+
+class Job(Record):
+    """Job đã transform (dataschema.json)."""
+    __slots__ = JOB_FIELDS
+    FIELDS = JOB_FIELDS
+    INTERNED = frozenset(('source', 'location', 'workArrangement', 'jobType', 'budget', 'budgetCurrency',
+                          'budgetPeriod', 'skills', 'status', 'locationSum'))
+
+
+class Company(Record):
+    """Company đã transform (dataschema.json), jobs là danh sách Job."""
+    __slots__ = COMPANY_FIELDS
+    FIELDS = COMPANY_FIELDS
+    INTERNED = frozenset(('size', 'industry', 'location'))
+    NESTED = {'jobs': Job}
+
+
+def to_dict(record):
+    """Hàm default cho json/orjson khi encode trực tiếp danh sách record."""
+    if isinstance(record, Record):
+        return record.to_dict()
+    raise TypeError(f"Không encode được {type(record).__name__}")
@@ -0,0 +1,352 @@
+import argparse
+import json
+import math
+import os
+import re
+import time
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from json_stream import COMPRESSIONS, OUTPUT_MODES, iter_records, open_writer
+from metrics import add_arguments, instrument, measure, timer
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dataschema.json')
+
+# Trường số có thể để trống: dataschema.json ghi "" làm ví dụ nhưng budget_normalizer điền số
+NUMBER_FIELDS = ('budgetMin', 'budgetMax')
+
+DATE_FORMATS = ('%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d', '%d/%m/%Y %H:%M', '%Y-%m-%dT%H:%M:%S')
+_NUMBER_RE = re.compile(r'^-?\d+(?:\.\d+)?$')
+
+MISSING = object()
+
+
+class FieldError(ValueError):
+    pass
+
+
+def coerce_string(value):
+    if value is None:
+        return ''
+    if type(value) in (int, float):
+        return str(value)
+    if type(value) is list and all(type(item) is str for item in value):
+        return ', '.join(value)
+    raise FieldError(f"cần chuỗi, nhận {type(value).__name__}")
+
+
+def coerce_strings(value):
+    if type(value) is list:
+        if all(type(item) is str for item in value):
+            return value
+        result = []
+        for item in value:
+            if type(item) is str:
+                result.append(item)
+            elif type(item) in (int, float):
+                result.append(str(item))
+            elif item is not None:
+                raise FieldError(f"phần tử của danh sách chuỗi là {type(item).__name__}")
+        return result
+    if value is None:
+        return []
+    if type(value) is str:
+        return [value] if value.strip() else []
+    raise FieldError(f"cần danh sách chuỗi, nhận {type(value).__name__}")
+
+
+def coerce_vector(value):
+    if type(value) is list:
+        # Đường nhanh: kiểm tra cả vector ở tầng C; chỉ duyệt bằng Python khi có phần tử không phải float (vd: 0 là int)
+        if all(map(float.__instancecheck__, value)):
+            return value
+        for item in value:
+            if type(item) is not float and type(item) is not int:
+                raise FieldError(f"phần tử của vector là {type(item).__name__}")
+        return value
+    if value is None:
+        return []
+    raise FieldError(f"cần vector số, nhận {type(value).__name__}")
+
+
+def coerce_number(value):
+    """Số hoặc "" (chưa có giá trị)."""
+    if value == '' or value is None:
+        return ''
+    if type(value) is int or type(value) is float:
+        return value
+    if type(value) is str:
+        text = value.strip().replace(',', '')
+        if _NUMBER_RE.match(text):
+            number = float(text)
+            return int(number) if number == int(number) else number
+    raise FieldError(f"cần số hoặc chuỗi rỗng, nhận {value!r:.40}")
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(text):
+    """Chuỗi ngày ('27/10/2025', '2025-10-27', epoch dạng chuỗi) -> epoch milliseconds (UTC)."""
+    text = text.strip()
+    # isdigit() còn nhận chữ số Unicode ('²', '١') mà int() / strptime không đọc được
+    if text.isascii() and text.isdigit():
+        return int(text)
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+        return int(parsed.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    raise FieldError(f"không đọc được ngày {text!r:.40}")
+
+
+def coerce_timestamp(value):
+    if type(value) is int:
+        return value
+    if type(value) is float and math.isfinite(value) and value == int(value):
+        return int(value)
+    if type(value) is str:
+        return parse_timestamp(value)
+    raise FieldError(f"cần epoch milliseconds, nhận {type(value).__name__}")
+
+
+# kiểu -> (kiểu Python đi nhanh, phải gọi coerce kể cả khi đúng kiểu, hàm coerce, giá trị mặc định)
+FIELD_KINDS = {
+    'string': (str, False, coerce_string, str),
+    'strings': (list, True, coerce_strings, list),
+    'vector': (list, True, coerce_vector, list),
+    'number': (int, True, coerce_number, str),
+    'timestamp': (int, False, coerce_timestamp, None),
+}
+
+
+def field_kind(name, example):
+    """Suy ra kiểu của trường từ giá trị ví dụ trong dataschema.json."""
+    if name in NUMBER_FIELDS:
+        return 'number'
+    if isinstance(example, bool):
+        raise ValueError(f"Schema: không hỗ trợ kiểu bool ({name})")
+    if isinstance(example, int):
+        return 'timestamp'
+    if isinstance(example, str):
+        return 'string'
+    if isinstance(example, list):
+        if not example:
+            return 'vector'
+        if all(isinstance(item, str) for item in example):
+            return 'strings'
+    raise ValueError(f"Schema: không suy ra được kiểu của trường {name}")
+
+
+def compile_fields(template, prefix, strict):
+    """
+    Dịch một bản ghi mẫu của schema thành hàm kiểm tra riêng cho bản ghi đó.
+    Hàm trả về danh sách lỗi (đường dẫn trường, thông báo); giá trị sửa được thì sửa ngay trên record.
+    Các trường con dạng danh sách bản ghi (jobs) được bỏ qua ở đây và kiểm tra riêng.
+    """
+    fields = []
+    for name, example in template.items():
+        if isinstance(example, list) and example and isinstance(example[0], dict):
+            continue
+        kind = field_kind(name, example)
+        fast_type, always, coerce, default = FIELD_KINDS[kind]
+        if default is None:
+            default = (lambda value: lambda: value)(example)
+        fields.append((name, prefix + name, fast_type, always, coerce, default))
+    known = frozenset(template)
+    fields = tuple(fields)
+
+    def check(record, coerced):
+        errors = []
+        for name, path, fast_type, always, coerce, default in fields:
+            value = record.get(name, MISSING)
+            if type(value) is fast_type and not always:
+                continue
+            if value is MISSING:
+                record[name] = default()
+                coerced[path] = coerced.get(path, 0) + 1
+                continue
+            try:
+                new_value = coerce(value)
+            except FieldError as e:
+                errors.append((path, str(e)))
+                continue
+            if new_value is not value:
+                record[name] = new_value
+                coerced[path] = coerced.get(path, 0) + 1
+        if strict and len(record) > len(known):
+            for name in record.keys() - known:
+                errors.append((prefix + name, "trường không có trong schema"))
+        return errors
+
+    return check
+
+
+def load_schema(path=SCHEMA_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    template = schema[0] if isinstance(schema, list) else schema
+    if not isinstance(template, dict):
+        raise ValueError(f"Schema '{path}' phải là một object (hoặc mảng chứa một object mẫu)")
+    return template
+
+
+class SchemaValidator:
+    """
+    Kiểm tra và ép kiểu companies đã transform theo dataschema.json.
+    Schema được dịch một lần thành các hàm kiểm tra theo từng trường; mỗi record chỉ chạy qua các hàm đó.
+    - giá trị sửa được (ngày dạng chuỗi, số dạng chuỗi, None, chuỗi thay cho danh sách...) được ép kiểu tại chỗ
+    - job lỗi bị tách khỏi company, company lỗi (trường của company) bị tách nguyên cả company
+    Đếm số lỗi / số giá trị đã ép kiểu theo từng trường (vd: jobs[].applicationDeadline).
+    """
+
+    def __init__(self, template, strict=False):
+        self.check_company = compile_fields(template, '', strict)
+        self.nested = []
+        for name, example in template.items():
+            if isinstance(example, list) and example and isinstance(example[0], dict):
+                self.nested.append((name, compile_fields(example[0], f'{name}[].', strict)))
+        self.errors = {}
+        self.coerced = {}
+        self.companies = 0
+        self.jobs = 0
+        self.invalid_companies = 0
+        self.invalid_jobs = 0
+
+    @classmethod
+    def from_file(cls, path=SCHEMA_FILE, strict=False):
+        return cls(load_schema(path), strict)
+
+    def _count_errors(self, errors):
+        for path, _ in errors:
+            self.errors[path] = self.errors.get(path, 0) + 1
+
+    def validate(self, company):
+        """
+        Kiểm tra một company. Trả về (company hoặc None nếu company lỗi, list các record bị loại).
+        Record bị loại: {'kind', 'company', 'errors', 'record'} để ghi ra file quarantine.
+        """
+        self.companies += 1
+        rejected = []
+        if not isinstance(company, MutableMapping):
+            self.invalid_companies += 1
+            self._count_errors([('(record)', '')])
+            return None, [{'kind': 'company', 'company': None,
+                           'errors': [{'field': '(record)', 'error': 'record không phải object'}], 'record': company}]
+        errors = self.check_company(company, self.coerced)
+        for name, check_item in self.nested:
+            items = company.get(name)
+            if items is None:
+                items = company[name] = []
+            elif not isinstance(items, list):
+                errors.append((name, f"cần danh sách, nhận {type(items).__name__}"))
+                continue
+            kept = []
+            for item in items:
+                self.jobs += 1
+                if isinstance(item, MutableMapping):
+                    item_errors = check_item(item, self.coerced)
+                else:
+                    item_errors = [(f'{name}[]', 'không phải object')]
+                if item_errors:
+                    self.invalid_jobs += 1
+                    self._count_errors(item_errors)
+                    rejected.append({'kind': name, 'company': company.get('name'),
+                                     'errors': [{'field': path, 'error': message} for path, message in item_errors],
+                                     'record': item})
+                else:
+                    kept.append(item)
+            company[name] = kept
+        if errors:
+            self.invalid_companies += 1
+            self._count_errors(errors)
+            rejected.append({'kind': 'company', 'company': company.get('name'),
+                             'errors': [{'field': path, 'error': message} for path, message in errors],
+                             'record': company})
+            return None, rejected
+        return company, rejected
+
+
+def validate_stage(companies, validator, quarantine, totals=None):
+    """
+    Stage kiểm tra schema cho pipeline (companies đã transform):
+    record lỗi được ghi ra quarantine (writer JSON Lines), company hợp lệ đi tiếp.
+    """
+    for company in companies:
+        company, rejected = validator.validate(company)
+        for record in rejected:
+            quarantine.write(record)
+        if totals is not None and rejected:
+            totals['quarantined'] = totals.get('quarantined', 0) + len(rejected)
+        if company is not None:
+            yield company
+
+
+def print_report(validator, show=20):
+    print(f"   - Companies: {validator.companies} ({validator.invalid_companies} lỗi)")
+    print(f"   - Jobs: {validator.jobs} ({validator.invalid_jobs} lỗi)")
+    if validator.errors:
+        print("   - Lỗi theo trường:")
+        for path, count in sorted(validator.errors.items(), key=lambda item: -item[1])[:show]:
+            print(f"      {count:>8}  {path}")
+    if validator.coerced:
+        print("   - Đã ép kiểu theo trường:")
+        for path, count in sorted(validator.coerced.items(), key=lambda item: -item[1])[:show]:
+            print(f"      {count:>8}  {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiểm tra và ép kiểu companies đã transform theo dataschema.json")
+    parser.add_argument("-i", "--input", default='transformed_companies.json',
+                        help="File transformed_companies.json hoặc .jsonl")
+    parser.add_argument("-o", "--output", default='validated_companies.json', help="File kết quả (chỉ record hợp lệ)")
+    parser.add_argument("-q", "--quarantine", default='quarantine.jsonl', help="File JSON Lines chứa record lỗi")
+    parser.add_argument("--schema", default=SCHEMA_FILE, help="File schema (mặc định: dataschema.json)")
+    parser.add_argument("--strict", action="store_true", help="Coi trường không có trong schema là lỗi")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty', help="Chế độ ghi file đầu ra")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    parser.add_argument("--report", metavar="FILE", help="Ghi số lỗi / số giá trị ép kiểu theo trường ra FILE (JSON)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument(args, 'validate') as metrics:
+        try:
+            validator = SchemaValidator.from_file(args.schema, args.strict)
+            started = time.monotonic()
+            partial_file = args.output + '.partial'
+            companies = measure(metrics, iter_records(args.input), 'parse')
+            with open_writer(args.quarantine, 'jsonl') as quarantine:
+                companies = measure(metrics, validate_stage(companies, validator, quarantine), 'validate', 'parse')
+                with open_writer(partial_file, args.format, args.compress) as writer:
+                    for company in companies:
+                        with timer(metrics, 'write', 1):
+                            writer.write(company)
+            os.replace(partial_file, args.output)
+        except FileNotFoundError as e:
+            print(f"❌ Lỗi: Không tìm thấy file '{e.filename}'")
+            return
+        except json.JSONDecodeError as e:
+            print(f"❌ Lỗi: File không đúng định dạng JSON: {e}")
+            return
+        except ValueError as e:
+            print(f"❌ Lỗi: {e}")
+            return
+        elapsed = time.monotonic() - started
+        metrics.read_file(args.input)
+        metrics.wrote_file(args.output)
+        metrics.count('jobs', validator.jobs)
+        metrics.count('quarantined', quarantine.count)
+
+        print(f"✅ Đã kiểm tra {validator.jobs} jobs trong {elapsed:.1f}s ({validator.jobs / max(elapsed, 1e-9):.0f} jobs/s)")
+        print_report(validator)
+        print(f"   - File đầu ra: {args.output}")
+        print(f"   - Record lỗi: {quarantine.count} -> {args.quarantine}")
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump({'companies': validator.companies, 'jobs': validator.jobs,
+                           'invalidCompanies': validator.invalid_companies, 'invalidJobs': validator.invalid_jobs,
+                           'errors': validator.errors, 'coerced': validator.coerced}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import os
+
+from json_stream import (COMPRESSIONS, OUTPUT_MODES, encode_item, iter_array_items, open_writer,
+                         output_path)
+from metrics import add_arguments, instrument, measure, timer
+
+
+def split_companies_stream(input_file, output_pattern, companies_per_file=None,
+                           jobs_per_file=None, bytes_per_file=None, start_index=1,
+                           mode='pretty', compression=None, metrics=None):
+    """
+    Tách một file companies lớn thành nhiều file nhỏ, đọc và ghi dần từng company
+    nên bộ nhớ không phụ thuộc vào kích thước file input.
+
+    Chỉ dùng một trong ba tiêu chí:
+    - companies_per_file: số companies tối đa mỗi file
+    - jobs_per_file: số jobs tối đa mỗi file
+    - bytes_per_file: kích thước tối đa (bytes) mỗi file
+
+    Một company không bao giờ bị cắt ngang: nếu riêng nó đã vượt giới hạn
+    thì nó được ghi thành một file riêng.
+
+    output_pattern dạng 'ketquafinal-{}.json', {} được thay bằng số thứ tự file.
+    mode / compression: chế độ ghi (pretty/compact/jsonl) và kiểu nén (gzip/zstd), xem json_stream.
+    bytes_per_file tính theo số byte JSON trước khi nén.
+    metrics (metrics.Metrics, tùy chọn): đo thời gian parse / encode / write.
+    Trả về danh sách thống kê (file, companies, jobs, bytes) của từng file.
+    """
+    limits = [companies_per_file, jobs_per_file, bytes_per_file]
+    if sum(limit is not None for limit in limits) != 1:
+        raise ValueError("Cần chỉ định đúng một trong companies_per_file, jobs_per_file, bytes_per_file")
+    if any(limit is not None and limit <= 0 for limit in limits):
+        raise ValueError("Giới hạn tách file phải lớn hơn 0")
+
+    shards = []
+    writer = None
+    shard_jobs = 0
+
+    def close_shard():
+        nonlocal writer
+        writer.close()
+        shards.append((writer.path, writer.count, shard_jobs, writer.bytes_written))
+        print(f"✅ Đã lưu {writer.path}: {writer.count} companies, {shard_jobs} jobs, {writer.bytes_written} bytes")
+        writer = None
+
+    for company in measure(metrics, iter_array_items(input_file), 'parse'):
+        with timer(metrics, 'encode', 1):
+            encoded = encode_item(company, mode)
+        jobs_count = len(company.get("jobs") or [])
+
+        if writer is not None and writer.count:
+            if companies_per_file is not None:
+                full = writer.count >= companies_per_file
+            elif jobs_per_file is not None:
+                full = shard_jobs + jobs_count > jobs_per_file
+            else:
+                full = writer.bytes_written + len(encoded) + 4 > bytes_per_file
+            if full:
+                close_shard()
+
+        if writer is None:
+            output_file = output_pattern.format(start_index + len(shards))
+            writer = open_writer(output_file, mode, compression).open()
+            shard_jobs = 0
+            print(f"💾 Đang ghi {output_file}...")
+
+        with timer(metrics, 'write', 1):
+            writer.write_encoded(encoded)
+        shard_jobs += jobs_count
+
+    if writer is not None:
+        close_shard()
+
+    return shards
+
+
+def record_metrics(metrics, input_file, shards):
+    """Ghi số file / companies / jobs và kích thước các file vào metrics sau khi tách xong."""
+    metrics.read_file(input_file)
+    for output_file, companies, jobs, _ in shards:
+        metrics.wrote_file(output_file)
+        metrics.count('files')
+        metrics.count('companies', companies)
+        metrics.count('jobs', jobs)
+
+
+def print_summary(shards):
+    if not shards:
+        print("⚠️  Không có dữ liệu để tách")
+        return
+
+    print(f"\n🎉 Hoàn thành tách file!")
+    print(f"📊 Thống kê cuối:")
+    for output_file, companies, jobs, size in shards:
+        print(f"   - {output_file}: {companies} companies, {jobs} jobs, {size} bytes")
+    total_companies = sum(shard[1] for shard in shards)
+    total_jobs = sum(shard[2] for shard in shards)
+    print(f"   - Tổng đã xử lý: {total_companies} companies, {total_jobs} jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tách file companies JSON lớn thành nhiều file nhỏ (đọc dạng stream)")
+    parser.add_argument("input_file", help="File JSON đầu vào (mảng companies)")
+    parser.add_argument("-o", "--output-pattern",
+                        help="Mẫu tên file đầu ra, vd: 'ketquafinal-{}.json' (mặc định: <input>-{}.json)")
+    parser.add_argument("--start-index", type=int, default=1, help="Số thứ tự của file đầu tiên")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty', help="Chế độ ghi file đầu ra")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--companies", type=int, help="Số companies mỗi file")
+    group.add_argument("--jobs", type=int, help="Số jobs tối đa mỗi file")
+    group.add_argument("--bytes", type=int, help="Kích thước tối đa mỗi file (bytes)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    output_pattern = args.output_pattern
+    if output_pattern is None:
+        stem, ext = os.path.splitext(args.input_file)
+        output_pattern = output_path(stem + "-{}", args.format, args.compress)
+
+    print(f"🔄 Đang đọc file input: {args.input_file}")
+    with instrument(args, 'split') as metrics:
+        try:
+            shards = split_companies_stream(
+                args.input_file,
+                output_pattern,
+                companies_per_file=args.companies,
+                jobs_per_file=args.jobs,
+                bytes_per_file=args.bytes,
+                start_index=args.start_index,
+                mode=args.format,
+                compression=args.compress,
+                metrics=metrics,
+            )
+        except FileNotFoundError:
+            print(f"❌ Lỗi: Không tìm thấy file '{args.input_file}'")
+            return
+        except (ValueError, RuntimeError) as e:
+            # json.JSONDecodeError cũng là ValueError
+            print(f"❌ Lỗi: {e}")
+            return
+
+        record_metrics(metrics, args.input_file, shards)
+
+    print_summary(shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,129 +1,312 @@
+import argparse
 import json
 import re
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from json_stream import JsonArrayWriter, iter_array_spans
+from metrics import add_arguments, instrument, measure, timer
+
+# Tách câu theo các dấu phân cách ('. ', '; ', '- ', xuống dòng) - compile một lần cho cả module
+SENTENCE_SPLIT_RE = re.compile(r'[.;]\s+|- |\n')
+
+def iter_sentences(text):
+    """Sinh dần từng câu (đã strip, bỏ câu rỗng), tương đương re.split(SENTENCE_SPLIT_RE, text) nhưng lười."""
+    start = 0
+    for match in SENTENCE_SPLIT_RE.finditer(text):
+        sentence = text[start:match.start()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
 
 # Hàm tóm tắt văn bản nếu vượt quá max_length ký tự
 def summarize_text(text, max_length=200):
     if len(text) <= max_length:
         return text
-    
-    # Split text into sentences using multiple delimiters ('. ', '; ', ' - ')
-    sentences = re.split(r'[.;]\s+|- |\n', text.strip())  # Thêm '\n' để xử lý ngắt dòng
-    sentences = [s.strip() for s in sentences if s.strip()]  # Loại bỏ chuỗi rỗng hoặc chỉ có khoảng trắng
-    
-    summary = ''
-    for sentence in sentences:
-        if len(summary + sentence) < max_length - 2:  # Dành chỗ cho dấu '. '
-            summary += sentence + '. '
+
+    # Chỉ đếm độ dài bằng số nguyên, ghép chuỗi một lần ở cuối
+    parts = []
+    length = 0
+    limit = max_length - 2  # Dành chỗ cho dấu '. '
+    for sentence in iter_sentences(text.strip()):
+        if length + len(sentence) < limit:
+            parts.append(sentence)
+            length += len(sentence) + 2
         else:
             break
-    
+
     # Fallback: Nếu không tóm tắt được (summary rỗng), cắt ngắn đến max_length
-    if not summary:
-        summary = text[:max_length].rsplit(' ', 1)[0]  # Cắt ở khoảng trắng gần nhất trước max_length
-    
-    return summary.rstrip('. ')  # Loại bỏ dấu chấm và khoảng trắng thừa
-
-# Đọc JSON từ file
-try:
-    with open('summarized_companies.json', 'r', encoding='utf-8') as f:
-        companies_data = json.load(f)
-except FileNotFoundError:
-    print("Lỗi: Không tìm thấy file 'input.json'. Vui lòng kiểm tra lại.")
-    exit(1)
-except json.JSONDecodeError:
-    print("Lỗi: File 'input.json' không đúng định dạng JSON. Vui lòng kiểm tra cú pháp.")
-    exit(1)
-
-print(f"🚀 Bắt đầu xử lý {len(companies_data)} companies...")
-
-# File output tạm thời và cuối cùng
-OUTPUT_FILE = 'summarized_companies.json'
-TEMP_FILE = 'summarized_companies_temp.json'
-
-# Khởi tạo danh sách kết quả
-processed_companies = []
-
-# Kiểm tra xem có file tạm thời từ lần chạy trước không
-start_index = 0
-if os.path.exists(TEMP_FILE):
-    try:
-        with open(TEMP_FILE, 'r', encoding='utf-8') as f:
-            processed_companies = json.load(f)
-        start_index = len(processed_companies)
-        print(f"📁 Tìm thấy file tạm thời với {start_index} companies đã xử lý. Tiếp tục từ company {start_index + 1}...")
-    except:
-        print("⚠️  Không thể đọc file tạm thời. Bắt đầu lại từ đầu...")
-        processed_companies = []
-        start_index = 0
-
-# Xử lý từng company
-for company_index in range(start_index, len(companies_data)):
-    company = companies_data[company_index]
-    company_name = company.get('companyName', f'Company {company_index + 1}')
-    
-    print(f"\n📋 Đang xử lý company {company_index + 1}/{len(companies_data)}: {company_name}")
-    
-    # Đếm số job cần xử lý
-    jobs_count = len(company.get('jobs', []))
-    print(f"   Tìm thấy {jobs_count} jobs")
-    
-    processed_jobs = 0
-    
+    if not parts:
+        return text[:max_length].rsplit(' ', 1)[0].rstrip('. ')  # Cắt ở khoảng trắng gần nhất trước max_length
+
+    return '. '.join(parts).rstrip('. ')  # Loại bỏ dấu chấm và khoảng trắng thừa
+
+def summarize_job(job, stats):
+    """Tóm tắt các trường *Sum và tạo descriptionSum cho một job, cộng dồn vào stats."""
+    # Xử lý các trường có hậu tố 'Sum' hiện có
+    for key in list(job.keys()):  # Sử dụng list() để tránh lỗi khi thay đổi dict trong loop
+        if key.endswith('Sum') and isinstance(job[key], str):
+            if len(job[key]) > 50:
+                job[key] = summarize_text(job[key])
+                stats['fields'] += 1
+
+    # Tạo trường descriptionSum từ trường description (nếu có và dài hơn 50 ký tự)
+    if 'description' in job and isinstance(job['description'], str) and len(job['description']) > 50:
+        if 'descriptionSum' not in job:  # Chỉ tạo mới nếu chưa có
+            job['descriptionSum'] = summarize_text(job['description'])
+            stats['descriptions'] += 1
+
+    stats['jobs'] += 1
+
+def new_stats():
+    return {'jobs': 0, 'fields': 0, 'descriptions': 0}
+
+def summarize_company(company):
+    """
+    Tóm tắt các trường *Sum và tạo descriptionSum cho từng job của company.
+    Trả về bộ đếm thống kê: jobs, fields (số trường *Sum đã tóm tắt), descriptions (số descriptionSum đã tạo).
+    """
+    stats = new_stats()
+
     # Xử lý các trường có hậu tố 'Sum' và tạo trường descriptionSum trong từng job
     if 'jobs' in company and company['jobs']:
-        for job_index, job in enumerate(company['jobs']):
-            # Xử lý các trường có hậu tố 'Sum' hiện có
-            for key in list(job.keys()):  # Sử dụng list() để tránh lỗi khi thay đổi dict trong loop
-                if key.endswith('Sum') and isinstance(job[key], str):
-                    if len(job[key]) > 50:
-                        old_length = len(job[key])
-                        job[key] = summarize_text(job[key])
-                        new_length = len(job[key])
-                        print(f"     Job {job_index + 1}: Tóm tắt '{key}' từ {old_length} xuống {new_length} ký tự")
-            
-            # Tạo trường descriptionSum từ trường description (nếu có và dài hơn 50 ký tự)
-            if 'description' in job and isinstance(job['description'], str) and len(job['description']) > 50:
-                if 'descriptionSum' not in job:  # Chỉ tạo mới nếu chưa có
-                    old_length = len(job['description'])
-                    job['descriptionSum'] = summarize_text(job['description'])
-                    new_length = len(job['descriptionSum'])
-                    print(f"     Job {job_index + 1}: Tạo 'descriptionSum' từ 'description' - từ {old_length} xuống {new_length} ký tự")
-            
-            processed_jobs += 1
-    
-    print(f"   ✅ Hoàn thành {processed_jobs}/{jobs_count} jobs")
-    
-    # Thêm company đã xử lý vào danh sách
-    processed_companies.append(company)
-    
-    # Lưu file tạm thời sau mỗi company
-    try:
-        with open(TEMP_FILE, 'w', encoding='utf-8') as f:
-            json.dump(processed_companies, f, ensure_ascii=False, indent=2)
-        print(f"   💾 Đã lưu tiến trình: {len(processed_companies)}/{len(companies_data)} companies")
-    except Exception as e:
-        print(f"   ⚠️  Lỗi khi lưu file tạm thời: {e}")
-
-print(f"\n🎉 Hoàn thành xử lý tất cả {len(processed_companies)} companies!")
-
-# Lưu file kết quả cuối cùng
-try:
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(processed_companies, f, ensure_ascii=False, indent=2)
-    print(f"✅ Đã lưu kết quả cuối cùng vào file: {OUTPUT_FILE}")
-    
-    # Xóa file tạm thời sau khi hoàn thành
-    if os.path.exists(TEMP_FILE):
-        os.remove(TEMP_FILE)
-        print("🗑️  Đã xóa file tạm thời")
-        
-except Exception as e:
-    print(f"❌ Lỗi khi lưu file kết quả: {e}")
-
-# Thống kê tổng quan
-total_jobs = sum(len(company.get('jobs', [])) for company in processed_companies)
-print(f"\n📊 Thống kê:")
-print(f"   - Tổng số companies đã xử lý: {len(processed_companies)}")
-print(f"   - Tổng số jobs đã xử lý: {total_jobs}")
-print(f"   - File đầu ra: {OUTPUT_FILE}")
\ No newline at end of file
+        for job in company['jobs']:
+            summarize_job(job, stats)
+
+    return stats
+
+def process_company(task):
+    """
+    Xử lý một company (chạy được trong process con).
+    task = (index, nextOffset, company). Trả về (dòng journal đã encode, thống kê).
+    """
+    company_index, next_offset, company = task
+    stats = summarize_company(company)
+    record = {'index': company_index, 'nextOffset': next_offset, 'company': company}
+    return json.dumps(record, ensure_ascii=False) + '\n', stats
+
+def process_batch(tasks):
+    """Xử lý một nhóm companies trong cùng một lần gửi sang process con để giảm chi phí IPC."""
+    return [process_company(task) for task in tasks]
+
+def iter_batches(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def map_ordered(func, tasks, workers, window=None):
+    """
+    Chạy func trên các task bằng process pool, trả kết quả đúng thứ tự đầu vào.
+    Chỉ giữ tối đa `window` task đang chờ để bộ nhớ không phụ thuộc vào kích thước input.
+    workers <= 1 thì chạy tuần tự trong process hiện tại.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    window = window or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class ProgressReporter:
+    """Cộng dồn thống kê và chỉ in tiến trình định kỳ thay vì in từng job/field."""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.totals = {'companies': 0, 'jobs': 0, 'fields': 0, 'descriptions': 0}
+
+    def add(self, stats):
+        self.totals['companies'] += 1
+        for key, value in stats.items():
+            self.totals[key] += value
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        t = self.totals
+        print(f"   ⏱️  {t['companies']} companies | {t['jobs']} jobs ({t['jobs'] / elapsed:.0f} jobs/s) | "
+              f"{t['fields']} trường *Sum đã tóm tắt | {t['descriptions']} descriptionSum đã tạo")
+
+def input_signature(input_file):
+    """Kích thước và mtime của file input, ghi ở dòng đầu journal để không chạy tiếp trên một input khác."""
+    stat = os.stat(input_file)
+    return {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns}
+
+def start_journal(temp_file, source):
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'source': source}) + '\n')
+
+def load_checkpoint(temp_file, source):
+    """
+    Đọc lại journal (JSON Lines) từ lần chạy trước.
+    Dòng đầu: {"source": input_signature(input)}; journal của một input khác (hoặc input đã thay đổi) bị bỏ.
+    Mỗi dòng tiếp theo: {"index": i, "nextOffset": byte offset của company tiếp theo trong file input, "company": {...}}
+    Dòng cuối bị ghi dở (do crash) sẽ bị cắt bỏ khỏi journal.
+    Journal mới (chỉ có dòng đầu) được tạo nếu chưa có hoặc đã bị bỏ.
+    Trả về (số companies đã xử lý, offset để đọc tiếp hoặc None).
+    """
+    if not os.path.exists(temp_file):
+        start_journal(temp_file, source)
+        return 0, None
+
+    processed = 0
+    next_offset = None
+    good_bytes = 0
+    with open(temp_file, 'rb') as f:
+        header = f.readline()
+        try:
+            matches = header.endswith(b'\n') and json.loads(header).get('source') == source
+        except (json.JSONDecodeError, AttributeError):
+            matches = False
+        if matches:
+            good_bytes = len(header)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if record.get('index') != processed:
+                    break
+                processed += 1
+                next_offset = record['nextOffset']
+                good_bytes += len(line)
+
+    if not matches:
+        print(f"⚠️  Journal '{temp_file}' không khớp với file input hiện tại. Bắt đầu lại từ đầu...")
+        start_journal(temp_file, source)
+        return 0, None
+
+    # Cắt phần ghi dở để các lần ghi tiếp theo nối đúng vị trí
+    if good_bytes != os.path.getsize(temp_file):
+        with open(temp_file, 'r+b') as f:
+            f.truncate(good_bytes)
+        print(f"⚠️  Đã bỏ phần journal ghi dở sau company {processed}")
+
+    return processed, next_offset
+
+def iter_checkpoint_companies(temp_file):
+    with open(temp_file, 'r', encoding='utf-8') as f:
+        next(f, None)  # Dòng đầu: thông tin file input
+        for line in f:
+            yield json.loads(line)['company']
+
+def assemble_output(temp_file, output_file):
+    """Ghép journal thành file JSON cuối cùng trong một lượt đọc. Trả về (số companies, số jobs)."""
+    total_jobs = 0
+    partial_file = output_file + '.partial'
+    with JsonArrayWriter(partial_file) as writer:
+        for company in iter_checkpoint_companies(temp_file):
+            total_jobs += len(company.get('jobs', []))
+            writer.write(company)
+    os.replace(partial_file, output_file)
+    return writer.count, total_jobs
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tóm tắt các trường *Sum và description của jobs")
+    parser.add_argument("-i", "--input", default='summarized_companies.json', help="File JSON đầu vào")
+    parser.add_argument("-o", "--output", default='summarized_companies.json', help="File JSON kết quả")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Số process xử lý song song (1 = chạy tuần tự)")
+    parser.add_argument("--batch-size", type=int, default=16,
+                        help="Số companies gửi cho mỗi process con trong một lần")
+    parser.add_argument("--progress-interval", type=float, default=5.0,
+                        help="Số giây giữa hai lần in tiến trình")
+    add_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    # File input, output và journal tạm thời
+    INPUT_FILE = args.input
+    OUTPUT_FILE = args.output
+    TEMP_FILE = os.path.splitext(OUTPUT_FILE)[0] + '_temp.jsonl'
+
+    if not os.path.exists(INPUT_FILE):
+        print(f"Lỗi: Không tìm thấy file '{INPUT_FILE}'. Vui lòng kiểm tra lại.")
+        exit(1)
+
+    # Kiểm tra xem có journal từ lần chạy trước không
+    start_index, start_offset = load_checkpoint(TEMP_FILE, input_signature(INPUT_FILE))
+    if start_index:
+        print(f"📁 Tìm thấy journal với {start_index} companies đã xử lý. Tiếp tục từ company {start_index + 1}...")
+
+    print(f"🚀 Bắt đầu xử lý companies từ file {INPUT_FILE} với {args.workers} process...")
+
+    def tasks():
+        for company_index, (offset, length, company) in enumerate(
+                iter_array_spans(INPUT_FILE, start_offset=start_offset), start_index):
+            yield company_index, offset + length, company
+
+    with instrument(args, 'summarize') as metrics:
+        progress = ProgressReporter(args.progress_interval)
+        try:
+            with open(TEMP_FILE, 'a', encoding='utf-8') as journal:
+                batches = map_ordered(process_batch, iter_batches(tasks(), args.batch_size), args.workers)
+                # 'process': đọc input + tóm tắt (ở các process con), tính theo thời gian chờ kết quả
+                for results in measure(metrics, batches, 'process', size=len):
+                    with timer(metrics, 'journal', len(results)):
+                        for line, stats in results:
+                            # Ghi nối company đã xử lý vào journal (chỉ ghi phần mới, không ghi lại toàn bộ)
+                            journal.write(line)
+                            progress.add(stats)
+                        journal.flush()
+        except json.JSONDecodeError as e:
+            print(f"Lỗi: File '{INPUT_FILE}' không đúng định dạng JSON: {e}")
+            exit(1)
+        progress.report()
+        company_index = start_index + progress.totals['companies']
+        for key, value in progress.totals.items():
+            metrics.count(key, value)
+
+        print(f"\n🎉 Hoàn thành xử lý tất cả {company_index} companies!")
+
+        # Lưu file kết quả cuối cùng
+        try:
+            with timer(metrics, 'assemble', company_index):
+                total_companies, total_jobs = assemble_output(TEMP_FILE, OUTPUT_FILE)
+            print(f"✅ Đã lưu kết quả cuối cùng vào file: {OUTPUT_FILE}")
+            metrics.read_file(INPUT_FILE)
+            metrics.wrote_file(OUTPUT_FILE)
+
+            # Xóa journal sau khi hoàn thành
+            if os.path.exists(TEMP_FILE):
+                os.remove(TEMP_FILE)
+                print("🗑️  Đã xóa file tạm thời")
+
+        except Exception as e:
+            print(f"❌ Lỗi khi lưu file kết quả: {e}")
+            return
+
+    # Thống kê tổng quan
+    print(f"\n📊 Thống kê:")
+    print(f"   - Tổng số companies đã xử lý: {total_companies}")
+    print(f"   - Tổng số jobs đã xử lý: {total_jobs}")
+    print(f"   - File đầu ra: {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import argparse
 import json
 import os
 
+from budget_normalizer import normalize_budgets
+from json_stream import COMPRESSIONS, OUTPUT_MODES, dumps_compact, open_writer, output_path
+from metrics import add_arguments, instrument
+from records import Company
+
 def transform_company_structure(companies_data):
     """
     Transform company structure according to requirements:
@@ -11,104 +17,144 @@ def transform_company_structure(companies_data):
     - work_arrangement -> workArrangement
     - job_type -> jobType
     - budget object -> budgetMin, budgetMax
+    - budgetRaw (or raw budget string) -> budget
     - job_url -> jobUrl
     - application_deadline -> applicationDeadline
     - jobCreatedAt -> postedDate
     """
     
-    transformed_companies = []
+    return [transform_company(company) for company in companies_data]
+
+def transform_company(company):
+    """Transform a single company (and its jobs) - see transform_company_structure."""
+    # Transform company fields
+    transformed_company = {}
     
-    for company in companies_data:
-        # Transform company fields
-        transformed_company = {}
-        
-        # Required field mappings
-        transformed_company["name"] = company.get("companyName", "")
-        transformed_company["nameEmbedding"] = []  # Empty array as per requirements
-        transformed_company["website"] = company.get("companyUrl", "")
-        transformed_company["description"] = company.get("description", "")
-        transformed_company["size"] = company.get("size", "")
-        transformed_company["industry"] = company.get("industry", "")
-        transformed_company["location"] = company.get("location", [])
-        transformed_company["email"] = company.get("companyEmail", "")
-        transformed_company["phone"] = company.get("companyPhone", "")
-        
-        # Transform jobs
-        transformed_jobs = []
-        if "jobs" in company and company["jobs"]:
-            for job in company["jobs"]:
-                transformed_job = {}
-                
-                # Basic job fields
-                transformed_job["title"] = job.get("title", "")
-                transformed_job["source"] = job.get("source", "")
-                transformed_job["location"] = job.get("location", "")
-                
-                # Field name transformations
-                transformed_job["workArrangement"] = job.get("work_arrangement", "")
-                transformed_job["jobType"] = job.get("job_type", "")
-                
-                transformed_job["description"] = job.get("description", "")
-                
-                # Transform budget from object to separate fields
-                budget = job.get("budget", {})
-                # Set budget field from budgetRaw
-                transformed_job["budget"] = job.get("budgetRaw", "")
-                
-                if isinstance(budget, dict):
-                    transformed_job["budgetMin"] = budget.get("min", "")
-                    transformed_job["budgetMax"] = budget.get("max", "")
-                else:
-                    # If budget is not a dict, set empty values for min/max
-                    transformed_job["budgetMin"] = ""
-                    transformed_job["budgetMax"] = ""
-                
-                transformed_job["skills"] = job.get("skills", [])
-                transformed_job["requirements"] = job.get("requirements", [])
-                transformed_job["status"] = job.get("status", "")
-                
-                # Field name transformations
-                transformed_job["jobUrl"] = job.get("job_url", "")
-                transformed_job["applicationDeadline"] = job.get("application_deadline", 1758067200000)  # Default from requirements
-                
-                # Keep existing fields
-                transformed_job["descriptionRaw"] = job.get("descriptionRaw", "")
-                
-                # Transform jobCreatedAt to postedDate
-                transformed_job["postedDate"] = job.get("jobCreatedAt", 1701369600000)  # Default from requirements
-                
-                # Keep summary fields
-                transformed_job["titleSum"] = job.get("titleSum", "")
-                transformed_job["locationSum"] = job.get("locationSum", "")
-                transformed_job["skillsSum"] = job.get("skillsSum", "")
-                transformed_job["requirementsSum"] = job.get("requirementsSum", "")
-                transformed_job["descriptionSum"] = job.get("descriptionSum", "")
-                
-                # Add embedding fields as empty arrays
-                transformed_job["titleEmbedding"] = []
-                transformed_job["locationEmbedding"] = []
-                transformed_job["skillsEmbedding"] = []
-                transformed_job["requirementsEmbedding"] = []
-                transformed_job["descriptionEmbedding"] = []
-                
-                transformed_jobs.append(transformed_job)
-        
-        transformed_company["jobs"] = transformed_jobs
-        transformed_companies.append(transformed_company)
+    # Required field mappings
+    transformed_company["name"] = company.get("companyName", "")
+    transformed_company["nameEmbedding"] = []  # Empty array as per requirements
+    transformed_company["website"] = company.get("companyUrl", "")
+    transformed_company["description"] = company.get("description", "")
+    transformed_company["size"] = company.get("size", "")
+    transformed_company["industry"] = company.get("industry", "")
+    transformed_company["location"] = company.get("location", [])
+    transformed_company["email"] = company.get("companyEmail", "")
+    transformed_company["phone"] = company.get("companyPhone", "")
+    
+    # Transform jobs
+    transformed_jobs = []
+    if "jobs" in company and company["jobs"]:
+        for job in company["jobs"]:
+            transformed_jobs.append(transform_job(job))
+    
+    transformed_company["jobs"] = transformed_jobs
     
-    return transformed_companies
+    return transformed_company
+
+def transform_job(job):
+    """Transform a single job - see transform_company_structure."""
+    transformed_job = {}
+    
+    # Basic job fields
+    transformed_job["title"] = job.get("title", "")
+    transformed_job["source"] = job.get("source", "")
+    transformed_job["location"] = job.get("location", "")
+    
+    # Field name transformations
+    transformed_job["workArrangement"] = job.get("work_arrangement", "")
+    transformed_job["jobType"] = job.get("job_type", "")
+    
+    transformed_job["description"] = job.get("description", "")
+    
+    # Transform budget from object to separate fields
+    budget = job.get("budget", {})
+    # Set budget field from budgetRaw (or from budget itself when the crawler kept the raw string)
+    transformed_job["budget"] = job.get("budgetRaw") or (budget if isinstance(budget, str) else "")
+    
+    if isinstance(budget, dict):
+        transformed_job["budgetMin"] = budget.get("min", "")
+        transformed_job["budgetMax"] = budget.get("max", "")
+    else:
+        # If budget is not a dict, set empty values for min/max
+        transformed_job["budgetMin"] = ""
+        transformed_job["budgetMax"] = ""
+    # Filled in by budget_normalizer.normalize_budgets
+    transformed_job["budgetCurrency"] = ""
+    transformed_job["budgetPeriod"] = ""
+    
+    transformed_job["skills"] = job.get("skills", [])
+    transformed_job["requirements"] = job.get("requirements", [])
+    transformed_job["status"] = job.get("status", "")
+    
+    # Field name transformations
+    transformed_job["jobUrl"] = job.get("job_url", "")
+    transformed_job["applicationDeadline"] = job.get("application_deadline", 1758067200000)  # Default from requirements
+    
+    # Keep existing fields
+    transformed_job["descriptionRaw"] = job.get("descriptionRaw", "")
+    
+    # Transform jobCreatedAt to postedDate
+    transformed_job["postedDate"] = job.get("jobCreatedAt", 1701369600000)  # Default from requirements
+    
+    # Keep summary fields
+    transformed_job["titleSum"] = job.get("titleSum", "")
+    transformed_job["locationSum"] = job.get("locationSum", "")
+    transformed_job["skillsSum"] = job.get("skillsSum", "")
+    transformed_job["requirementsSum"] = job.get("requirementsSum", "")
+    transformed_job["descriptionSum"] = job.get("descriptionSum", "")
+    
+    # Add embedding fields as empty arrays
+    transformed_job["titleEmbedding"] = []
+    transformed_job["locationEmbedding"] = []
+    transformed_job["skillsEmbedding"] = []
+    transformed_job["requirementsEmbedding"] = []
+    transformed_job["descriptionEmbedding"] = []
+    
+    return transformed_job
+
+def append_checkpoint(path, companies, first):
+    """
+    Nối các companies vào file tạm (mảng JSON gọn): ghi đè dấu ']' cuối file bằng ',' + các phần tử mới + ']'.
+    File luôn là một mảng JSON hợp lệ sau mỗi lần ghi, để chạy tiếp bằng json.load như trước.
+    first: batch đầu tiên (tạo file mới). Trả về số bytes đã ghi.
+    """
+    data = b','.join(dumps_compact(company) for company in companies) + b']'
+    if first:
+        with open(path, 'wb') as f:
+            f.write(b'[' + data)
+    else:
+        with open(path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b',' + data)
+    return len(data) + 1
 
 def main():
+    parser = argparse.ArgumentParser(description="Chuyển đổi cấu trúc companies theo dataschema.json")
+    parser.add_argument("-f", "--format", choices=OUTPUT_MODES, default='pretty',
+                        help="Chế độ ghi: pretty (indent=2), compact hoặc jsonl (mỗi company một dòng)")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="Nén file đầu ra")
+    parser.add_argument("--compact-records", action="store_true",
+                        help="Giữ kết quả trong bộ nhớ dạng record gọn (records.Company) thay cho dict: ít RAM hơn, "
+                             "chậm hơn một chút, file đầu ra không đổi")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument(args, 'transform') as metrics:
+        run(args, metrics)
+
+def run(args, metrics):
     # Input and output file paths
     INPUT_FILE = 'summarized_companies.json'
-    OUTPUT_FILE = 'transformed_companies.json'
+    OUTPUT_FILE = output_path('transformed_companies', args.format, args.compress)
     TEMP_FILE = 'transformed_companies_temp.json'
     
     # Read input file
     try:
         print(f"🔄 Đang đọc file input: {INPUT_FILE}")
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        with metrics.stage('parse') as stage, open(INPUT_FILE, 'r', encoding='utf-8') as f:
             companies_data = json.load(f)
+            stage.records = len(companies_data)
+        metrics.read_file(INPUT_FILE)
         print(f"✅ Đã đọc thành công {len(companies_data)} companies")
     except FileNotFoundError:
         print(f"❌ Lỗi: Không tìm thấy file '{INPUT_FILE}'")
@@ -129,6 +175,8 @@ def main():
             with open(TEMP_FILE, 'r', encoding='utf-8') as f:
                 transformed_companies = json.load(f)
             start_index = len(transformed_companies)
+            if args.compact_records:
+                transformed_companies = [Company.from_dict(company) for company in transformed_companies]
             print(f"📁 Tìm thấy file tạm thời với {start_index} companies đã xử lý. Tiếp tục...")
         except:
             print("⚠️  Không thể đọc file tạm thời. Bắt đầu lại từ đầu...")
@@ -146,22 +194,35 @@ def main():
         print(f"🔄 Xử lý companies {i+1}-{end_index}/{total_companies}")
         
         # Transform batch
-        transformed_batch = transform_company_structure(batch)
-        transformed_companies.extend(transformed_batch)
+        with metrics.stage('transform', len(batch)):
+            transformed_batch = transform_company_structure(batch)
+        # Parse raw budget strings into numeric min/max/currency/period for the whole batch at once
+        with metrics.stage('budget', len(batch)):
+            normalize_budgets([job for company in transformed_batch for job in company["jobs"]])
         
-        # Save temporary file
+        # Save temporary file (chỉ nối batch mới vào cuối mảng JSON, không ghi lại toàn bộ)
         try:
-            with open(TEMP_FILE, 'w', encoding='utf-8') as f:
-                json.dump(transformed_companies, f, ensure_ascii=False, indent=2)
-            print(f"💾 Đã lưu tiến trình: {len(transformed_companies)}/{total_companies} companies")
+            with metrics.stage('checkpoint', len(batch)):
+                written = append_checkpoint(TEMP_FILE, transformed_batch, len(transformed_companies) == 0)
+            metrics.count('checkpointBytes', written)
+            print(f"💾 Đã lưu tiến trình: {len(transformed_companies) + len(transformed_batch)}/{total_companies} companies")
         except Exception as e:
             print(f"⚠️  Lỗi khi lưu file tạm thời: {e}")
+        
+        if args.compact_records:
+            transformed_batch = [Company.from_dict(company) for company in transformed_batch]
+        transformed_companies.extend(transformed_batch)
+        # Bỏ tham chiếu tới dict đầu vào đã xử lý để giải phóng bộ nhớ sớm
+        companies_data[i:end_index] = [None] * len(batch)
     
     # Save final output
     try:
         print(f"💾 Đang lưu file kết quả: {OUTPUT_FILE}")
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(transformed_companies, f, ensure_ascii=False, indent=2)
+        with metrics.stage('write', len(transformed_companies)):
+            with open_writer(OUTPUT_FILE, args.format, args.compress) as writer:
+                for company in transformed_companies:
+                    writer.write(company.to_dict() if args.compact_records else company)
+        metrics.wrote_file(OUTPUT_FILE)
         
         print(f"✅ Hoàn thành! Đã chuyển đổi {len(transformed_companies)} companies")
         print(f"📂 File đầu ra: {OUTPUT_FILE}")
@@ -177,6 +238,8 @@ def main():
     
     # Display statistics
     total_jobs = sum(len(company.get("jobs", [])) for company in transformed_companies)
+    metrics.count('companies', len(transformed_companies))
+    metrics.count('jobs', total_jobs)
     print(f"\n📊 Thống kê:")
     print(f"   - Tổng số companies: {len(transformed_companies)}")
     print(f"   - Tổng số jobs: {total_jobs}")
@@ -196,6 +259,8 @@ def main():
         print(f"   - budget: {sample_job.get('budget', 'N/A')}")
         print(f"   - budgetMin: {sample_job.get('budgetMin', 'N/A')}")
         print(f"   - budgetMax: {sample_job.get('budgetMax', 'N/A')}")
+        print(f"   - budgetCurrency: {sample_job.get('budgetCurrency', 'N/A')}")
+        print(f"   - budgetPeriod: {sample_job.get('budgetPeriod', 'N/A')}")
         print(f"   - jobUrl: {sample_job.get('jobUrl', 'N/A')}")
         print(f"   - applicationDeadline: {sample_job.get('applicationDeadline', 'N/A')}")
         print(f"   - postedDate: {sample_job.get('postedDate', 'N/A')}")
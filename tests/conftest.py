@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Các module Python nằm phẳng trong sum/ (import như script: from json_stream import ...)
+SUM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sum')
+sys.path.insert(0, SUM_DIR)
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from array_index import ArrayIndex, build_index
+from json_stream import iter_array_items, iter_array_spans
+
+COMPANIES = [{'name': f'Công ty {i}', 'jobs': [{'jobUrl': f'https://jobs/{i}/{j}'} for j in range(i % 3)]}
+             for i in range(10)]
+
+
+@pytest.fixture
+def indexed_file(tmp_path):
+    path = tmp_path / 'companies.json'
+    path.write_text(json.dumps(COMPANIES, ensure_ascii=False, indent=2), encoding='utf-8')
+    assert build_index(str(path)) == len(COMPANIES)
+    return str(path)
+
+
+def test_read_and_find(indexed_file):
+    with ArrayIndex(indexed_file) as index:
+        assert len(index) == len(COMPANIES)
+        assert index.read(7) == COMPANIES[7]
+        assert index.find('name', 'Công ty 4') == [4]
+        assert index.find('jobUrl', 'https://jobs/5/1') == [5]
+        assert index.find('name', 'không có') == []
+        with pytest.raises(IndexError):
+            index.read(10)
+
+
+def test_iter_range(indexed_file):
+    with ArrayIndex(indexed_file) as index:
+        assert [item for _, item in index.iter_range(3, 6)] == COMPANIES[3:6]
+        assert [position for position, _ in index.iter_range(8, 100)] == [8, 9]
+        assert list(index.iter_range(5, 5)) == []
+
+
+def test_resume_offset_continues_stream_at_every_position(indexed_file):
+    with ArrayIndex(indexed_file) as index:
+        for position in range(len(COMPANIES) + 2):
+            offset = index.resume_offset(position)
+            resumed = [item for _, _, item in iter_array_spans(indexed_file, 16, start_offset=offset)]
+            assert resumed == COMPANIES[position:]
+
+
+def test_resume_offset_of_empty_array(tmp_path):
+    path = tmp_path / 'empty.json'
+    path.write_text('  [\n]\n', encoding='utf-8')
+    build_index(str(path))
+    with ArrayIndex(str(path)) as index:
+        assert len(index) == 0
+        assert list(iter_array_spans(str(path), start_offset=index.resume_offset(0))) == []
+        assert index.ranges(4) == []
+
+
+@pytest.mark.parametrize('parts', [1, 3, 4, 20])
+def test_ranges_cover_every_element_once(indexed_file, parts):
+    data = open(indexed_file, 'rb').read()
+    with ArrayIndex(indexed_file) as index:
+        ranges = index.ranges(parts)
+    assert 1 <= len(ranges) <= min(parts, len(COMPANIES))
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(COMPANIES)
+    for (_, stop, _, _), (start, _, _, _) in zip(ranges, ranges[1:]):
+        assert stop == start
+    for start, stop, offset, length in ranges:
+        # Khoảng byte của mỗi phần đọc lại được thành đúng các phần tử của nó
+        assert json.loads(b'[' + data[offset:offset + length] + b']') == COMPANIES[start:stop]
+
+
+def test_stale_or_missing_index(indexed_file, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ArrayIndex(str(tmp_path / 'companies.json'), str(tmp_path / 'missing.idx'))
+    with open(indexed_file, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    with pytest.raises(ValueError):
+        ArrayIndex(indexed_file)
+
+
+def test_pipeline_processes_only_the_requested_range(indexed_file, tmp_path):
+    from pipeline import run_pipeline
+
+    output_file = str(tmp_path / 'out.json')
+    totals = run_pipeline(indexed_file, output_file, 'compact', start=2, stop=5)
+    assert totals['companies'] == 3
+    assert [len(company['jobs']) for company in iter_array_items(output_file)] == [2, 0, 1]
+    assert not os.path.exists(output_file + '.partial')
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from bench_pipeline import MIN_RSS_DELTA, check_schema, compare, generate_companies, generate_dataset, run_stage
+
+
+def test_generated_jobs_total_and_seed_are_deterministic():
+    companies = list(generate_companies(500, seed=3))
+    assert sum(len(company['jobs']) for company in companies) == 500
+    assert companies == list(generate_companies(500, seed=3))
+    assert companies != list(generate_companies(500, seed=4))
+
+    jobs = [job for company in companies for job in company['jobs']]
+    assert len({job['job_url'] for job in jobs}) == 500
+    # Tin đăng lại: cùng tiêu đề + mô tả, khác URL
+    reposts = len(jobs) - len({(job['title'], job['description']) for job in jobs})
+    assert 0.05 * 500 < reposts < 0.3 * 500
+    assert all(job['company_info'] == company['companyName'] for company in companies for job in company['jobs'])
+
+
+def test_generate_dataset_matches_schema(tmp_path):
+    path = str(tmp_path / 'bench.json')
+    companies, size = generate_dataset(path, 200)
+    assert len(json.load(open(path, encoding='utf-8'))) == companies
+    assert size == (tmp_path / 'bench.json').stat().st_size
+    check_schema(path)
+    with pytest.raises(ValueError):
+        generate_dataset(path, 0)
+
+
+def test_compare_flags_only_large_regressions():
+    baseline = {'10:pipeline': {'seconds': 10.0, 'peakRssBytes': 100 * MIN_RSS_DELTA, 'bytesWritten': 1000},
+                '10:split': {'seconds': 1.0, 'peakRssBytes': None, 'bytesWritten': 50}}
+    results = {'10:pipeline': {'seconds': 12.5, 'peakRssBytes': 110 * MIN_RSS_DELTA, 'bytesWritten': 1001},
+               # +40% nhưng chỉ 0.4s: coi là nhiễu
+               '10:split': {'seconds': 1.4, 'peakRssBytes': 123, 'bytesWritten': 70},
+               '20:split': {'seconds': 99.0, 'peakRssBytes': 1, 'bytesWritten': 1}}
+    regressions = compare(results, baseline, 0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('10:pipeline seconds: 10.0 -> 12.5')
+    assert regressions[1].startswith('10:split bytesWritten: 50 -> 70')
+
+
+def test_run_stage_reads_metrics_report(tmp_path):
+    data_file = str(tmp_path / 'bench.json')
+    generate_dataset(data_file, 50)
+    result = run_stage('pipeline', data_file, str(tmp_path), 1)
+    assert result['seconds'] > 0
+    assert result['bytesWritten'] == (tmp_path / 'pipeline_companies.json').stat().st_size
+    assert not (tmp_path / 'pipeline.metrics.json').exists()
@@ -0,0 +1,34 @@
+import pytest
+
+from budget_normalizer import normalize_budgets, parse_budget
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('10 - 15 triệu VNĐ', (10_000_000, 15_000_000, 'VND', 'month')),
+    ('12,5 triệu', (12_500_000, 12_500_000, 'VND', 'month')),
+    ('1.500.000 đ/ngày', (1_500_000, 1_500_000, 'VND', 'day')),
+    ('1,000 - 2,000 USD', (1000, 2000, 'USD', '')),
+    ('$20/hour', (20, 20, 'USD', 'hour')),
+    # Chỉ có mức tối thiểu
+    ('Hơn 15 triệu', (15_000_000, '', 'VND', 'month')),
+    ('hon 15 trieu', (15_000_000, '', 'VND', 'month')),
+    ('Trên 1.000 USD', (1000, '', 'USD', '')),
+    ('$100k+', (100_000, '', 'USD', '')),
+    # Chỉ có mức tối đa
+    ('Tới 20 triệu', ('', 20_000_000, 'VND', 'month')),
+    # Không phải lương
+    ('Thỏa thuận', ('', '', '', '')),
+    ('3 - 5 năm kinh nghiệm', ('', '', '', '')),
+    ('2 Đ', ('', '', '', '')),
+    ('', ('', '', '', '')),
+])
+def test_parse_budget(raw, expected):
+    assert parse_budget(raw) == expected
+
+
+def test_normalize_budgets_fills_job_fields():
+    jobs = [{'budget': 'Hơn 15 triệu', 'budgetMin': '', 'budgetMax': ''}]
+    normalize_budgets(jobs)
+    job = jobs[0]
+    assert (job['budgetMin'], job['budgetMax'], job['budgetCurrency'], job['budgetPeriod']) == \
+        (15_000_000, '', 'VND', 'month')
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from career_graph import ARRAY_NAMES, CareerGraph
+
+
+def node(name, job_id, parents=(), children=()):
+    return {'job_name': name, 'job_id': job_id, 'parents': [{'jobtitle': parent} for parent in parents],
+            'children': [{'jobtitle': child} for child in children]}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    # Chuỗi Intern -> Junior -> Senior -> Lead -> Manager -> Director, thêm nhánh Junior -> QA
+    nodes = [node('Junior', '1', parents=['Intern'], children=['Senior', 'QA']),
+             node('Senior', '2', children=['Lead']),
+             node('lead ', '3', children=['Manager']),
+             node('Manager', '4', children=['Director']),
+             # job_id trùng với Junior (dữ liệu crawl có nhiều job trùng jobid)
+             node('QA', '1')]
+    path = tmp_path / 'result.json'
+    path.write_text(json.dumps(nodes), encoding='utf-8')
+    return CareerGraph.from_files([str(path)], max_depth=2)
+
+
+def names(graph, pairs):
+    return sorted((graph.names[node], depth) for node, depth in pairs)
+
+
+def test_nodes_are_keyed_by_normalized_name(graph):
+    assert len(graph) == 7
+    assert graph.find('LEAD') == graph.find('Lead')
+    assert sorted(graph.names[i] for i in graph.find('1')) == ['Junior', 'QA']
+
+
+def test_closure_matches_bfs_beyond_max_depth(graph):
+    junior = graph.find('junior')[0]
+    assert names(graph, graph.descendants(junior, 2)) == [('Lead', 2), ('QA', 1), ('Senior', 1)]
+    # k > max_depth: tính bằng BFS trên CSR
+    assert ('Director', 4) in names(graph, graph.descendants(junior, 4))
+    assert names(graph, graph.ancestors(graph.find('Senior')[0], 2)) == [('Intern', 2), ('Junior', 1)]
+
+
+def test_shortest_path(graph):
+    path = graph.shortest_path(graph.find('Intern')[0], graph.find('Manager')[0])
+    assert [graph.names[i] for i in path] == ['Intern', 'Junior', 'Senior', 'Lead', 'Manager']
+    assert graph.shortest_path(graph.find('Manager')[0], graph.find('Intern')[0]) is None
+
+
+def test_save_load_round_trip(graph, tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    graph.save(path)
+    loaded = CareerGraph.load(path)
+    for name in ARRAY_NAMES:
+        assert getattr(loaded, name) == getattr(graph, name)
+        assert getattr(loaded, name).typecode == ('q' if name.endswith('_offsets') else 'i')
+    assert loaded.names == graph.names and loaded.max_depth == 2
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'CPG1' + b'\0' * 8)
+    with pytest.raises(ValueError):
+        CareerGraph.load(str(path))
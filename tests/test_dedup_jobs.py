@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from dedup_jobs import DedupIndex, dedup_stage, shingles
+
+DESCRIPTION = ('Phát triển và bảo trì hệ thống backend cho nền tảng thương mại điện tử, thiết kế API, '
+               'tối ưu truy vấn cơ sở dữ liệu, viết kiểm thử tự động và phối hợp với đội frontend')
+
+
+def job(url, title='Backend Developer', description=DESCRIPTION):
+    return {'jobUrl': url, 'title': title, 'description': description}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'index.sqlite')
+
+
+def test_shingles_windows_and_short_text():
+    assert shingles({'title': 'Lập trình viên Python'}, '') == {'lập trình viên', 'trình viên python'}
+    assert shingles({'title': 'Tester'}, 'ACME') == {'tester acme'}
+    assert shingles({}, '') == set()
+
+
+def test_near_duplicate_above_threshold_is_flagged(index_path):
+    with DedupIndex(index_path) as index:
+        assert index.check(job('a'), 'ACME') is None
+        # Khác một từ cuối mô tả -> Jaccard shingle vẫn trên ngưỡng
+        assert index.check(job('b', description=DESCRIPTION + ' nhỏ'), 'ACME') == 'a'
+        assert index.check(job('c', title='Kế toán', description='Lập báo cáo tài chính hằng tháng'), 'ACME') is None
+
+
+@pytest.mark.parametrize('threshold, expected', [(0.9, 'a'), (0.99, None)])
+def test_threshold_controls_match(index_path, threshold, expected):
+    # Ước lượng Jaccard của cặp này khoảng 0.93
+    with DedupIndex(index_path, threshold=threshold) as index:
+        index.check(job('a'), 'ACME')
+        assert index.check(job('b', description=DESCRIPTION + ' nhỏ'), 'ACME') == expected
+
+
+def test_within_batch_near_duplicates(index_path):
+    with DedupIndex(index_path) as index:
+        results = index.check_many([job('a'), job('b', description=DESCRIPTION + ' nhỏ'), job('c', title='QA')], 'ACME')
+    assert results[:2] == [None, 'a']
+
+
+def test_repeat_in_same_run_points_to_first_occurrence(index_path):
+    with DedupIndex(index_path) as index:
+        assert index.check_many([job('a'), job('a')], 'ACME') == [None, 'a']
+        assert index.check(job('a'), 'ACME') == 'a'
+        index.check(job('b', description=DESCRIPTION + ' nhỏ'), 'ACME')
+        assert index.check(job('b'), 'ACME') == 'a'
+
+
+def test_later_run_keeps_previous_conclusion(index_path):
+    with DedupIndex(index_path) as index:
+        index.check_many([job('a'), job('b', description=DESCRIPTION + ' nhỏ')], 'ACME')
+    with DedupIndex(index_path) as index:
+        assert index.check(job('a'), 'ACME') is None
+        assert index.check(job('b'), 'ACME') == 'a'
+
+
+def test_dedup_stage_flag_and_collapse(index_path):
+    def companies():
+        return [{'name': 'ACME', 'jobs': [job('a'), job('b', description=DESCRIPTION + ' nhỏ')]},
+                {'name': 'ACME', 'jobs': [job('a')]}]
+
+    totals = {}
+    with DedupIndex(index_path) as index:
+        flagged = list(dedup_stage(companies(), index, 'flag', totals))
+    assert [j['duplicateOf'] for c in flagged for j in c['jobs']] == ['', 'a', 'a']
+    assert totals == {'dedupJobs': 3, 'duplicates': 2}
+
+    with DedupIndex(index_path + '2') as index:
+        collapsed = list(dedup_stage(companies(), index, 'collapse'))
+    assert [[j['jobUrl'] for j in c['jobs']] for c in collapsed] == [['a'], []]
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from embedding_cache import EmbeddingCache, normalize_text, quantize, text_key
+from embedding_client import fill_embeddings
+
+FIELDS = [{'source': 'title', 'target': 'titleEmbed'}]
+
+
+class FakeClient:
+    """Client giả: vector theo độ dài text, đếm số text đã gửi."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def embed(self, text):
+        self.sent.append(text)
+        return [len(text) + 0.1, 1 / 3]
+
+
+def test_normalized_text_shares_key():
+    assert normalize_text('  Kế  Toán\n Trưởng ') == 'kế toán trưởng'
+    # Dựng sẵn và tổ hợp (NFD) cho cùng khóa
+    assert text_key('Kế toán') == text_key('Kế toán') == text_key('KẾ   TOÁN')
+    assert text_key('Kế toán', 'https://a') != text_key('Kế toán', 'https://b')
+
+
+def test_get_many_put_many_and_lru_eviction(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    with EmbeddingCache(path, max_entries=2) as cache:
+        cache.put_many([('a', [1.0]), ('b', [2.0])])
+        assert cache.get_many(['a', 'x', 'a']) == {'a': [1.0]}
+        assert (cache.hits, cache.misses) == (1, 1)
+        cache.put_many([('c', [3.0])])
+        assert cache.evicted == 1
+        assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+    # LRU giữ qua các lần mở lại
+    with EmbeddingCache(path, max_entries=2) as cache:
+        cache.get_many(['c'])
+        cache.put_many([('d', [4.0])])
+        assert set(cache.get_many(['a', 'c', 'd'])) == {'c', 'd'}
+
+
+def test_fill_embeddings_sends_each_text_once_across_runs(tmp_path):
+    def companies():
+        return [{'jobs': [{'title': 'Kế toán', 'titleEmbedding': []}, {'title': ' kế  TOÁN', 'titleEmbedding': []},
+                          {'title': 'Tester', 'titleEmbedding': []}]}]
+
+    async def run(cache, client):
+        totals = {}
+        filled = [company async for company in fill_embeddings(companies(), client, FIELDS, totals=totals,
+                                                               cache=cache)]
+        return filled, totals
+
+    path = str(tmp_path / 'cache.sqlite')
+    client = FakeClient()
+    with EmbeddingCache(path) as cache:
+        first, totals = asyncio.run(run(cache, client))
+    assert len(client.sent) == 2 and 'Tester' in client.sent
+    assert totals['apiCalls'] == 2 and totals['embedded'] == 3
+
+    client = FakeClient()
+    with EmbeddingCache(path) as cache:
+        second, totals = asyncio.run(run(cache, client))
+    assert client.sent == [] and totals['apiCalls'] == 0
+    assert second == first
+    # Vector từ API cũng được làm tròn float32 như vector lấy từ cache
+    assert first[0]['jobs'][2]['titleEmbedding'] == quantize([6.1, 1 / 3]) != [6.1, 1 / 3]
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import embedding_client
+from embedding_client import AdaptiveLimiter, EmbeddingClient, start_stub_server
+
+real_sleep = asyncio.sleep
+
+
+async def no_sleep(delay):
+    # Vẫn nhường event loop để các request song song đan xen như khi chờ thật
+    await real_sleep(0)
+
+
+async def embed_with_stub(texts, faults, max_retries=3, capacity=32):
+    server = await start_stub_server(0, dim=4, capacity=capacity, delay=0, faults=faults)
+    port = server.sockets[0].getsockname()[1]
+    config = {'api': {'url': f'http://127.0.0.1:{port}/embeds', 'authMethod': 'bearer', 'key': 'test'},
+              'rateLimiting': {'batchSize': 4}}
+    try:
+        async with EmbeddingClient(config, max_concurrency=4, max_retries=max_retries) as client:
+            vectors = await asyncio.gather(*(client.embed(text) for text in texts))
+            return vectors, client
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    # Bỏ thời gian chờ giữa các lần thử lại (stub server chạy với delay=0 nên không cần sleep thật)
+    monkeypatch.setattr(embedding_client.asyncio, 'sleep', no_sleep)
+
+
+@pytest.mark.parametrize('fault', ['status', 'chunk'])
+def test_malformed_framing_is_retried(fault):
+    vectors, client = asyncio.run(embed_with_stub(['kế toán'], [fault]))
+    assert len(vectors[0]) == 4
+    assert client.stats['invalid'] == 1
+    assert client.stats['retries'] == 1
+    assert client.stats['failed'] == 0
+
+
+def test_malformed_response_does_not_abort_batch():
+    texts = [f'job {i}' for i in range(8)]
+    vectors, client = asyncio.run(embed_with_stub(texts, ['status', 'chunk']))
+    assert all(vector is not None and len(vector) == 4 for vector in vectors)
+    assert client.stats['invalid'] == 2
+    assert client.limiter.last_decrease > 0
+
+
+def test_gives_up_after_max_retries():
+    vectors, client = asyncio.run(embed_with_stub(['x'], ['status', 'chunk', 'status'], max_retries=2))
+    assert vectors == [None]
+    assert client.stats['invalid'] == 3
+    assert client.stats['failed'] == 1
+
+
+def test_same_text_gets_same_vector():
+    vectors, _ = asyncio.run(embed_with_stub(['a', 'a', 'b'], []))
+    assert vectors[0] == vectors[1] != vectors[2]
+
+
+def test_limiter_grows_additively_and_halves_once_per_cooldown(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(embedding_client.time, 'monotonic', lambda: now[0])
+    limiter = AdaptiveLimiter(4, 6, cooldown=1.0)
+    for _ in range(4):
+        limiter.increase()
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+    for _ in range(100):
+        limiter.increase()
+    assert limiter.limit == limiter.peak == 6
+
+    limiter.decrease()
+    limiter.decrease()
+    assert limiter.limit == 3
+    now[0] += 1.0
+    limiter.decrease()
+    limiter.decrease()
+    assert limiter.limit == 1.5
+    now[0] += 1.0
+    limiter.decrease()
+    assert limiter.limit == 1
+
+
+def test_limiter_caps_in_flight_requests():
+    limiter = AdaptiveLimiter(2, 2)
+    peak = 0
+
+    async def task():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0)
+
+    async def run():
+        await asyncio.gather(*(task() for _ in range(10)))
+
+    asyncio.run(run())
+    assert peak == 2 and limiter.in_flight == 0
+
+
+def test_throttled_requests_are_retried_and_connections_reused():
+    texts = [f'job {i}' for i in range(40)]
+    vectors, client = asyncio.run(embed_with_stub(texts, [], max_retries=20, capacity=1))
+    assert all(vector is not None for vector in vectors)
+    assert client.stats['throttled'] > 0 and client.stats['failed'] == 0
+    assert client.pool.opened <= 4 < client.stats['requests']
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from embedding_store import EmbeddingStore, build_store
+
+
+@pytest.fixture
+def vectors():
+    return np.random.RandomState(7).standard_normal((23, 6)).astype(np.float32)
+
+
+@pytest.fixture
+def store_prefix(tmp_path, vectors):
+    # 3 jobs mỗi company, job thứ 2 của mỗi company không có vector
+    companies = []
+    rows = iter(vectors.tolist())
+    for company_index in range(12):
+        jobs = []
+        for job_index in range(3):
+            vector = [] if job_index == 1 else next(rows, [])
+            jobs.append({'title': f'{company_index}-{job_index}', 'titleEmbedding': vector})
+        companies.append({'name': str(company_index), 'jobs': jobs})
+    path = tmp_path / 'companies.jsonl'
+    path.write_text(''.join(json.dumps(company) + '\n' for company in companies), encoding='utf-8')
+    prefix = str(tmp_path / 'store')
+    assert build_store(str(path), prefix, batch_size=5) == (len(vectors), vectors.shape[1])
+    return prefix
+
+
+def brute_force(vectors, queries, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k], np.sort(scores, axis=1)[:, ::-1][:, :k]
+
+
+def test_build_writes_loadable_npy_and_ids(store_prefix, vectors):
+    assert np.array_equal(np.load(store_prefix + '.npy'), vectors)
+    store = EmbeddingStore(store_prefix)
+    assert len(store) == len(vectors)
+    assert store.lookup([0, 1, 2, -1]) == [(0, 0), (0, 2), (1, 0), None]
+
+
+@pytest.mark.parametrize('block_size', [4, 65536])
+def test_search_matches_brute_force(store_prefix, vectors, block_size):
+    queries = np.random.RandomState(8).standard_normal((5, 6)).astype(np.float32)
+    scores, rows = EmbeddingStore(store_prefix).search(queries, k=4, block_size=block_size)
+    expected_rows, expected_scores = brute_force(vectors, queries, 4)
+    assert np.array_equal(rows, expected_rows)
+    assert np.allclose(scores, expected_scores, atol=1e-5)
+
+
+def test_search_pads_when_k_exceeds_rows(store_prefix, vectors):
+    scores, rows = EmbeddingStore(store_prefix).search(vectors[0], k=30, block_size=8)
+    assert rows[0, 0] == 0 and scores[0, 0] == pytest.approx(1.0, abs=1e-5)
+    assert (rows[0, len(vectors):] == -1).all() and np.isneginf(scores[0, len(vectors):]).all()
+
+
+def test_search_rejects_wrong_dimension(store_prefix):
+    with pytest.raises(ValueError):
+        EmbeddingStore(store_prefix).search(np.zeros(5), k=1)
+
+
+def test_build_rejects_mixed_dimensions(tmp_path):
+    path = tmp_path / 'companies.jsonl'
+    path.write_text(json.dumps({'jobs': [{'titleEmbedding': [1, 2]}, {'titleEmbedding': [1, 2, 3]}]}) + '\n',
+                    encoding='utf-8')
+    with pytest.raises(ValueError):
+        build_store(str(path), str(tmp_path / 'store'))
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from export_columnar import export_columnar, load_job_embeddings
+
+
+def company(name, vectors):
+    return {'name': name, 'location': ['Hà Nội'],
+            'jobs': [{'title': f'{name} {i}', 'description': 'mô tả', 'skills': ['excel'],
+                      'titleEmbedding': vector} for i, vector in enumerate(vectors)]}
+
+
+def write_input(tmp_path, companies):
+    path = tmp_path / 'transformed.json'
+    path.write_text(json.dumps(companies, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('file_format', ['arrow', 'parquet'])
+def test_dimension_found_after_first_batch(tmp_path, file_format):
+    # Batch đầu (batch_size=2) chưa có vector nào, vector chỉ xuất hiện ở company cuối
+    companies = [company('a', [[], []]), company('b', [[]]), company('c', [[], [0.5, 1.5, 2.5]])]
+    output_dir = str(tmp_path / 'out')
+    exporter = export_columnar(write_input(tmp_path, companies), output_dir, file_format, batch_size=2)
+    assert exporter.embedding_dim == 3
+
+    vectors, valid = load_job_embeddings(exporter.table_path('jobs'))
+    assert vectors.shape == (5, 3)
+    assert valid.tolist() == [False, False, False, False, True]
+    assert vectors[4].tolist() == [0.5, 1.5, 2.5]
+
+
+def test_no_vectors_at_all_still_loads(tmp_path):
+    exporter = export_columnar(write_input(tmp_path, [company('a', [[], []])]), str(tmp_path / 'out'), 'arrow')
+    assert exporter.embedding_dim is None
+    vectors, valid = load_job_embeddings(exporter.table_path('jobs'))
+    assert vectors.shape == (2, 0)
+    assert not valid.any()
+
+
+def test_single_chunk_arrow_is_not_copied(tmp_path):
+    companies = [company('a', [[1.0, 2.0], [], [3.0, 4.0]])]
+    exporter = export_columnar(write_input(tmp_path, companies), str(tmp_path / 'out'), 'arrow')
+    vectors, valid = load_job_embeddings(exporter.table_path('jobs'))
+    assert not vectors.flags['OWNDATA']
+    assert valid.tolist() == [True, False, True]
+    assert vectors[[0, 2]].tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+def test_mismatched_dimension_fails_at_export(tmp_path):
+    companies = [company('a', [[1.0, 2.0], [1.0, 2.0, 3.0]])]
+    with pytest.raises(ValueError):
+        export_columnar(write_input(tmp_path, companies), str(tmp_path / 'out'), 'parquet')
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+from job_search import JobSearchIndex, city_of, fold, match_expression
+
+
+def job(url, title, location='Cầu Giấy, Hà Nội', skills=(), description=''):
+    return {'jobUrl': url, 'title': title, 'location': location, 'skills': list(skills), 'description': description,
+            'requirements': [], 'budget': ''}
+
+
+def write_shard(path, companies):
+    path.write_text(''.join(json.dumps(company, ensure_ascii=False) + '\n' for company in companies), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    try:
+        search_index = JobSearchIndex(str(tmp_path / 'search.sqlite'))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    with search_index:
+        yield search_index
+
+
+@pytest.fixture
+def shard(tmp_path):
+    return write_shard(tmp_path / 'a.jsonl', [
+        {'name': 'Ngân hàng A', 'industry': 'Ngân Hàng', 'jobs': [
+            job('u1', 'Kế Toán Tổng Hợp', skills=['excel']),
+            job('u2', 'Kế toán trưởng', 'TP. Hồ Chí Minh', skills=['excel', 'thuế']),
+        ]},
+        {'name': 'Tech B', 'industry': 'Công Nghệ Thông Tin', 'jobs': [
+            job('u3', 'Lập Trình Viên Python', 'Hà Nội.', skills=['python'], description='phát triển hệ thống kế toán'),
+            job('u4', 'Tester', 'HCM, Việt Nam'),
+        ]},
+    ])
+
+
+@pytest.mark.parametrize('location, city', [
+    ('Cầu Giấy, Hà Nội.', 'Hà Nội'),
+    ('TP.HCM, Việt Nam', 'Hồ Chí Minh'),
+    ('Ngã Tư Sở - Đống Đa - Hà Nội', 'Hà Nội'),
+    ('Tỉnh Bình Dương (KCN VSIP)', 'Bình Dương'),
+    (['Quận 1', 'Thành phố Hồ Chí Minh'], 'Hồ Chí Minh'),
+    ('Việt Nam', ''),
+    ('', ''),
+])
+def test_city_of(location, city):
+    assert city_of(location) == city
+
+
+def test_fold_and_match_expression():
+    assert fold('Kế Toán Đà Nẵng') == 'ke toan da nang'
+    assert match_expression('"kế toán" tổng', ['Excel'], 'Hà Nội') == \
+        '"ke toan" AND "tong" AND skills : "excel" AND location : "ha noi"'
+    assert match_expression('  ', (), None) == ''
+
+
+def test_search_ignores_diacritics_and_ranks_title_first(index, shard):
+    assert index.add_shard(shard) == 4
+    found = index.search('ke toan')
+    assert found['total'] == 3
+    assert [job['jobUrl'] for job in found['results']][-1] == 'u3'
+    assert index.search('kế toán', skills=['thuế'])['total'] == 1
+    assert index.search('', location='ha noi')['total'] == 2
+
+
+def test_facets_merge_city_spellings(index, shard):
+    index.add_shard(shard)
+    facets = index.search()['facets']
+    assert dict(facets['industry']) == {'Ngân Hàng': 2, 'Công Nghệ Thông Tin': 2}
+    assert dict(facets['city']) == {'Hà Nội': 2, 'Hồ Chí Minh': 2}
+    filtered = index.search(industry='Ngân Hàng')
+    assert filtered['total'] == 2 and dict(filtered['facets']['industry']) == {'Ngân Hàng': 2}
+
+
+def test_unchanged_shard_is_skipped_and_duplicate_urls_move_to_latest_shard(index, shard, tmp_path):
+    index.add_shard(shard)
+    assert index.add_shard(shard) is None
+    other = write_shard(tmp_path / 'b.jsonl', [{'name': 'Ngân hàng A', 'industry': 'Ngân Hàng', 'jobs': [
+        job('u1', 'Kế Toán Tổng Hợp (cập nhật)'), job('u5', 'Giao dịch viên'), job('u5', 'Giao dịch viên mới')]}])
+    assert index.add_shard(other) == 2
+    assert len(index) == 5
+    assert {os.path.basename(path): jobs for path, jobs, _ in index.shards()} == {'a.jsonl': 3, 'b.jsonl': 2}
+    assert [job['title'] for job in index.search('giao dich')['results']] == ['Giao dịch viên mới']
+    assert index.search('cap nhat')['total'] == 1
+
+    assert index.remove_shard(other) == 2
+    assert len(index) == 3
+    assert index.add_shard(shard, force=True) == 4
+
+
+def test_pagination(index, shard):
+    index.add_shard(shard)
+    pages = [index.search(limit=2, offset=offset)['results'] for offset in (0, 2, 4)]
+    assert [len(page) for page in pages] == [2, 2, 0]
+    assert len({job['jobUrl'] for page in pages for job in page}) == 4
@@ -0,0 +1,106 @@
+import codecs
+import gzip
+import json
+
+import pytest
+
+import json_stream
+from json_stream import dumps_compact, iter_array_items, iter_array_spans, iter_records, open_writer, output_path
+
+COMPANIES = [
+    {'name': 'Công ty Cổ phần Việt', 'jobs': [{'title': 'Kỹ sư phần mềm', 'budget': 'Hơn 15 triệu'}]},
+    {'name': 'ACME', 'jobs': []},
+    12.5,
+    'chuỗi "có" dấu ngoặc ] và , ',
+    {'name': '日本', 'jobs': [{'title': '🚀'}]},
+]
+
+
+@pytest.fixture(params=['pretty', 'compact'])
+def array_file(request, tmp_path):
+    path = tmp_path / 'companies.json'
+    indent = 2 if request.param == 'pretty' else None
+    path.write_text(json.dumps(COMPANIES, ensure_ascii=False, indent=indent), encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 20])
+def test_items_across_chunk_boundaries(array_file, chunk_size):
+    assert list(iter_array_items(str(array_file), chunk_size)) == COMPANIES
+
+
+@pytest.mark.parametrize('chunk_size', [3, 1 << 20])
+def test_span_offsets_are_byte_positions(array_file, chunk_size):
+    data = array_file.read_bytes()
+    spans = list(iter_array_spans(str(array_file), chunk_size))
+    assert [item for _, _, item in spans] == COMPANIES
+    for offset, length, item in spans:
+        assert json.loads(data[offset:offset + length]) == item
+
+
+def test_start_offset_resumes_after_item(array_file):
+    spans = list(iter_array_spans(str(array_file)))
+    offset, length, _ = spans[1]
+    resumed = [item for _, _, item in iter_array_spans(str(array_file), 5, start_offset=offset + length)]
+    assert resumed == COMPANIES[2:]
+
+
+def test_bom_and_empty_array(tmp_path):
+    path = tmp_path / 'bom.json'
+    path.write_bytes(codecs.BOM_UTF8 + b' [ {"a": 1} ]')
+    assert list(iter_array_spans(str(path))) == [(6, 8, {'a': 1})]
+    path.write_bytes(b'[]')
+    assert list(iter_array_items(str(path))) == []
+
+
+@pytest.mark.parametrize('content', [b'{"a": 1}', b'[{"a": 1}', b'[{"a": ]'])
+def test_invalid_input_raises(tmp_path, content):
+    path = tmp_path / 'bad.json'
+    path.write_bytes(content)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array_items(str(path), 4))
+
+
+@pytest.mark.parametrize('items', [COMPANIES, []])
+def test_pretty_writer_matches_json_dump(tmp_path, items):
+    path = str(tmp_path / 'out.json')
+    with open_writer(path) as writer:
+        for item in items:
+            writer.write(item)
+    expected = json.dumps(items, ensure_ascii=False, indent=2).encode('utf-8')
+    assert open(path, 'rb').read() == expected
+    assert writer.bytes_written == len(expected) and writer.count == len(items)
+
+
+@pytest.mark.parametrize('mode, compression', [('compact', None), ('jsonl', None), ('compact', 'gzip'),
+                                               ('jsonl', 'gzip')])
+def test_compact_modes_round_trip(tmp_path, mode, compression):
+    path = str(tmp_path / output_path('out', mode, compression))
+    with open_writer(path, mode, compression) as writer:
+        for item in COMPANIES:
+            writer.write(item)
+    raw = open(path, 'rb').read()
+    if compression == 'gzip':
+        raw = gzip.decompress(raw)
+    assert len(raw) == writer.bytes_written
+    if mode == 'jsonl':
+        assert [json.loads(line) for line in raw.splitlines()] == COMPANIES
+        if compression is None:
+            assert list(iter_records(path)) == COMPANIES
+    else:
+        assert json.loads(raw) == COMPANIES
+        assert b'\n' not in raw
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    encoded = [dumps_compact(item) for item in COMPANIES]
+    monkeypatch.setattr(json_stream, 'orjson', None)
+    assert [dumps_compact(item) for item in COMPANIES] == encoded
+
+
+def test_output_path_and_unknown_mode():
+    assert output_path('transformed_companies') == 'transformed_companies.json'
+    assert output_path('transformed_companies', 'jsonl', 'zstd') == 'transformed_companies.jsonl.zst'
+    assert output_path('x', 'compact', 'gzip') == 'x.json.gz'
+    with pytest.raises(ValueError):
+        open_writer('x.json', 'yaml')
@@ -0,0 +1,109 @@
+import argparse
+import json
+import pstats
+import sys
+import time
+
+import pytest
+
+import metrics as metrics_module
+from metrics import Metrics, add_arguments, instrument, measure, timer
+
+
+def slow(items, delay):
+    for item in items:
+        time.sleep(delay)
+        yield item
+
+
+def test_wrap_counts_records_and_self_time():
+    metrics = Metrics('test')
+    parsed = metrics.wrap(slow(range(3), 0.01), 'parse')
+    batches = metrics.wrap(slow([[1, 2], [3]], 0.02), 'batch', size=len)
+    doubled = metrics.wrap((item * 2 for item in parsed), 'double', 'parse')
+    assert list(doubled) == [0, 2, 4] and list(batches) == [[1, 2], [3]]
+
+    stages = metrics.report()['stages']
+    assert stages['parse']['records'] == stages['double']['records'] == 3
+    assert stages['batch']['records'] == 3
+    # 'double' chờ 'parse' gần hết thời gian, thời gian riêng rất nhỏ
+    assert stages['double']['seconds'] >= stages['parse']['seconds'] >= 0.03
+    assert stages['double']['selfSeconds'] < 0.01
+
+
+def test_stage_counters_and_files(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'x' * 10)
+    metrics = Metrics('test')
+    with metrics.stage('write', 5):
+        pass
+    with metrics.stage('write', 2):
+        pass
+    metrics.count('jobs', 4)
+    metrics.count('jobs')
+    metrics.read_file(str(path))
+    metrics.wrote_file(str(path))
+    metrics.wrote_file(str(tmp_path / 'missing'))
+    report = metrics.report()
+    assert report['stages']['write']['records'] == 7
+    assert report['counters'] == {'jobs': 5}
+    assert report['bytes'] == {'read': 10, 'written': 10}
+
+
+def test_measure_and_timer_without_metrics():
+    items = [1, 2]
+    assert measure(None, items, 'parse') is items
+    with timer(None, 'write', 1):
+        pass
+
+
+def test_prometheus_skips_missing_values():
+    metrics = Metrics('split-json')
+    with metrics.stage('idle'):
+        pass
+    metrics.stages['idle'].seconds = 0.0
+    metrics.count('files', 2)
+    text = metrics.prometheus()
+    assert 'pipeline_counter{job="split_json",name="files"} 2' in text
+    assert 'pipeline_stage_records_per_second{' not in text
+    assert '# TYPE pipeline_stage_records counter' in text
+
+
+def test_instrument_writes_reports_even_on_error(tmp_path):
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args(['--metrics', str(tmp_path / 'm.json'), '--prometheus', str(tmp_path / 'm.prom'),
+                              '--profile', str(tmp_path / 'run.prof')])
+    with pytest.raises(KeyError):
+        with instrument(args, 'transform') as metrics:
+            metrics.count('companies', 3)
+            raise KeyError('boom')
+    report = json.loads((tmp_path / 'm.json').read_text(encoding='utf-8'))
+    assert report['name'] == 'transform' and report['counters'] == {'companies': 3}
+    assert 'pipeline_counter{job="transform",name="companies"} 3' in (tmp_path / 'm.prom').read_text(encoding='utf-8')
+    pstats.Stats(str(tmp_path / 'run.prof'))
+
+
+def test_tracemalloc_report():
+    metrics = Metrics('test', trace_memory=True, top_allocations=3)
+    try:
+        data = [str(i) * 10 for i in range(1000)]
+        memory = metrics.report()['memory']
+    finally:
+        metrics_module.tracemalloc.stop()
+    assert memory['tracemallocPeakBytes'] > 0 and len(memory['topAllocations']) <= 3
+    assert data
+
+
+def test_split_json_main_writes_metrics(tmp_path, monkeypatch):
+    import split_json
+
+    source = tmp_path / 'companies.json'
+    source.write_text(json.dumps([{'name': str(i), 'jobs': [{}] * i} for i in range(5)]), encoding='utf-8')
+    monkeypatch.setattr(sys, 'argv', ['split_json.py', str(source), '--companies', '2',
+                                      '--metrics', str(tmp_path / 'm.json')])
+    split_json.main()
+    report = json.loads((tmp_path / 'm.json').read_text(encoding='utf-8'))
+    assert report['counters'] == {'files': 3, 'companies': 5, 'jobs': 10}
+    assert report['bytes']['read'] == source.stat().st_size
+    assert report['stages']['parse']['records'] == 5
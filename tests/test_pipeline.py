@@ -0,0 +1,96 @@
+import copy
+import json
+
+import pytest
+
+from budget_normalizer import normalize_budgets
+from pipeline import run_pipeline
+from summarized_jobs import summarize_company
+from transform_structure import transform_company_structure
+
+DESCRIPTION = 'Phát triển dịch vụ backend. Viết kiểm thử tự động; review code. ' * 6
+
+RAW = [
+    {'companyName': 'ACME', 'companyUrl': 'https://acme.vn', 'location': ['Hà Nội'], 'jobs': [
+        {'title': 'Backend', 'description': DESCRIPTION, 'budget': {'min': '', 'max': ''}, 'budgetRaw': '10 - 15 triệu',
+         'skillsSum': 'Python, Django, PostgreSQL, Redis, Celery, Docker, Kubernetes', 'job_url': 'https://acme.vn/1'},
+        {'title': 'QA', 'description': 'ngắn', 'budget': 'Thỏa thuận', 'job_type': 'Full-time'},
+    ]},
+    {'companyName': 'Beta', 'jobs': []},
+]
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'companies.json'
+    path.write_text(json.dumps(RAW, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def expected_output():
+    companies = copy.deepcopy(RAW)
+    for company in companies:
+        summarize_company(company)
+    transformed = transform_company_structure(companies)
+    normalize_budgets([job for company in transformed for job in company['jobs']])
+    return transformed
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_fused_pipeline_matches_separate_stages(tmp_path, input_file):
+    output_file = str(tmp_path / 'out.json')
+    totals = run_pipeline(input_file, output_file)
+    assert read(output_file) == expected_output()
+    assert totals['companies'] == 2 and totals['jobs'] == 2
+    assert totals['fields'] == 1 and totals['descriptions'] == 1
+    assert not (tmp_path / 'out.json.partial').exists()
+
+
+def test_partial_range_needs_index(tmp_path, input_file):
+    with pytest.raises(FileNotFoundError):
+        run_pipeline(input_file, str(tmp_path / 'out.json'), start=1)
+
+
+def test_cache_reuses_unchanged_jobs_and_evicts_removed(tmp_path, input_file):
+    from job_cache import JobCache
+
+    cache_file = str(tmp_path / 'cache.sqlite')
+    first, second = str(tmp_path / 'first.json'), str(tmp_path / 'second.json')
+    with JobCache(cache_file) as cache:
+        totals = run_pipeline(input_file, first, cache=cache)
+    assert (totals['cacheHits'], totals['cacheMisses']) == (0, 2)
+    assert read(first) == expected_output()
+
+    with JobCache(cache_file) as cache:
+        totals = run_pipeline(input_file, second, cache=cache)
+    assert (totals['cacheHits'], totals['cacheMisses']) == (2, 0)
+    assert read(second) == read(first)
+
+    # Sửa một job, bỏ job còn lại: job sửa phải xử lý lại, job bị bỏ bị xóa khỏi cache
+    changed = copy.deepcopy(RAW)
+    changed[0]['jobs'] = [dict(changed[0]['jobs'][0], title='Backend Senior')]
+    with open(input_file, 'w', encoding='utf-8') as f:
+        json.dump(changed, f, ensure_ascii=False)
+    with JobCache(cache_file) as cache:
+        totals = run_pipeline(input_file, second, cache=cache)
+        assert (totals['cacheHits'], totals['cacheMisses']) == (0, 1)
+        assert cache.evicted == 2
+    assert read(second)[0]['jobs'][0]['title'] == 'Backend Senior'
+
+
+def test_cache_gives_identical_jobs_separate_copies(tmp_path):
+    from job_cache import JobCache
+    from pipeline import cached_stage
+
+    job = {'title': 'Dev', 'budgetRaw': '$1,000 - 2,000'}
+    totals = {}
+    with JobCache(str(tmp_path / 'cache.sqlite')) as cache:
+        [company] = cached_stage([{'companyName': 'A', 'jobs': [job, dict(job)]}], cache, totals)
+    first, second = company['jobs']
+    # Các stage sau sửa job tại chỗ nên hai job giống nhau không được dùng chung một dict
+    assert first == second and first is not second
+    assert (totals['cacheHits'], totals['cacheMisses']) == (1, 1)
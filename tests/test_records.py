@@ -0,0 +1,92 @@
+import json
+import sys
+
+from budget_normalizer import normalize_budgets
+from records import Company, Job, to_dict
+from transform_structure import transform_company_structure
+
+RAW = [
+    {'companyName': 'ACME', 'industry': 'Công Nghệ', 'location': ['Hà Nội'], 'jobs': [
+        {'title': 'Backend', 'location': 'Hà Nội', 'budget': {'min': 10, 'max': 20}, 'budgetRaw': '10 - 20 triệu',
+         'skills': ['python', 'sql']},
+        {'title': 'QA', 'location': 'Hà Nội', 'budget': 'Thỏa thuận'},
+    ]},
+    {'companyName': 'Beta', 'industry': 'Công Nghệ', 'jobs': []},
+]
+
+
+def transformed():
+    return transform_company_structure(json.loads(json.dumps(RAW)))
+
+
+def test_round_trip_keeps_keys_order_and_values():
+    for company in transformed():
+        record = Company.from_dict(company)
+        assert record.to_dict() == company
+        assert list(record.to_dict()) == list(company)
+        assert all(isinstance(job, Job) for job in record['jobs'])
+        assert [list(job) for job in record['jobs']] == [list(job) for job in company['jobs']]
+
+
+def test_records_share_layout_and_interned_values():
+    first, second = [Company.from_dict(company) for company in transformed()]
+    assert first._layout is second._layout
+    assert first['industry'] is second['industry']
+    backend, qa = first['jobs']
+    assert backend._layout is qa._layout
+    assert backend['location'] is qa['location']
+
+
+def test_mapping_interface_and_extra_fields():
+    job = Job.from_dict({'title': 'Dev', 'budget': ''})
+    job['duplicateOf'] = 'https://a'
+    job['status'] = 'Open'
+    assert list(job) == ['title', 'budget', 'duplicateOf', 'status']
+    assert 'duplicateOf' in job and 'jobUrl' not in job
+    assert job.get('jobUrl', 'x') == 'x'
+    del job['budget']
+    del job['duplicateOf']
+    assert job.to_dict() == {'title': 'Dev', 'status': 'Open'}
+    assert len(job) == 2
+
+
+def test_existing_stages_accept_records():
+    companies = [Company.from_dict(company) for company in transformed()]
+    assert normalize_budgets([job for company in companies for job in company['jobs']]) == 1
+    expected = transformed()
+    normalize_budgets([job for company in expected for job in company['jobs']])
+    assert json.dumps(companies, default=to_dict, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+def test_transform_compact_records_output_is_identical(tmp_path, monkeypatch):
+    import transform_structure
+
+    monkeypatch.chdir(tmp_path)
+    outputs = []
+    for extra in ([], ['--compact-records']):
+        (tmp_path / 'summarized_companies.json').write_text(json.dumps(RAW * 7, ensure_ascii=False), encoding='utf-8')
+        monkeypatch.setattr(sys, 'argv', ['transform_structure.py'] + extra)
+        transform_structure.main()
+        outputs.append((tmp_path / 'transformed_companies.json').read_bytes())
+    assert outputs[0] == outputs[1]
+    assert len(json.loads(outputs[0])) == 14
+
+
+def test_transform_resumes_from_checkpoint_with_compact_records(tmp_path, monkeypatch, capsys):
+    import transform_structure
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'summarized_companies.json').write_text(json.dumps(RAW * 7, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(sys, 'argv', ['transform_structure.py'])
+    transform_structure.main()
+    expected = (tmp_path / 'transformed_companies.json').read_bytes()
+
+    # Lần chạy trước dừng sau batch đầu tiên (10 companies)
+    first_batch = json.loads(expected)[:10]
+    transform_structure.append_checkpoint('transformed_companies_temp.json', first_batch, True)
+    monkeypatch.setattr(sys, 'argv', ['transform_structure.py', '--compact-records'])
+    capsys.readouterr()
+    transform_structure.main()
+    assert 'với 10 companies đã xử lý' in capsys.readouterr().out
+    assert (tmp_path / 'transformed_companies.json').read_bytes() == expected
+    assert not (tmp_path / 'transformed_companies_temp.json').exists()
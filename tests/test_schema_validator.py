@@ -0,0 +1,72 @@
+import math
+
+import pytest
+
+from schema_validator import (FieldError, SchemaValidator, coerce_number, coerce_strings, coerce_timestamp,
+                              coerce_vector, parse_timestamp)
+
+TEMPLATE = {
+    'name': 'Công ty A',
+    'location': ['Hà Nội'],
+    'jobs': [{'title': 'Kế toán', 'skills': ['excel'], 'budgetMin': '', 'postedDate': 1701369600000,
+              'titleEmbedding': []}],
+}
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp('1701369600000') == 1701369600000
+    assert parse_timestamp('01/12/2023') == parse_timestamp('2023-12-01') == 1701388800000
+
+
+@pytest.mark.parametrize('text', ['²', '١٢٣', '12²', 'ngày mai', ''])
+def test_parse_timestamp_rejects_with_field_error(text):
+    with pytest.raises(FieldError):
+        parse_timestamp(text)
+
+
+@pytest.mark.parametrize('value', [math.nan, math.inf, -math.inf, 1.5, True, None])
+def test_coerce_timestamp_rejects_non_integral(value):
+    with pytest.raises(FieldError):
+        coerce_timestamp(value)
+
+
+def test_coerce_timestamp_integral_float():
+    assert coerce_timestamp(1701369600000.0) == 1701369600000
+
+
+def test_coerce_number():
+    assert coerce_number('1,500,000') == 1500000
+    assert coerce_number('12.5') == 12.5
+    assert coerce_number(None) == ''
+    with pytest.raises(FieldError):
+        coerce_number('mười')
+
+
+def test_coerce_vector_and_strings():
+    vector = [0.1, 0.2]
+    assert coerce_vector(vector) is vector
+    assert coerce_vector([0.1, 0]) == [0.1, 0]
+    assert coerce_vector(None) == []
+    with pytest.raises(FieldError):
+        coerce_vector([0.1, True])
+    assert coerce_strings('excel') == ['excel']
+    assert coerce_strings(['a', 1, None]) == ['a', '1']
+
+
+def test_bad_job_is_quarantined_not_raised():
+    validator = SchemaValidator(TEMPLATE)
+    company = {'name': 'B', 'location': 'Hà Nội',
+               'jobs': [{'title': 'ok', 'postedDate': '01/12/2023'}, {'title': 'bad', 'postedDate': math.nan}]}
+    kept, rejected = validator.validate(company)
+    assert [job['title'] for job in kept['jobs']] == ['ok']
+    assert kept['jobs'][0]['postedDate'] == 1701388800000
+    assert kept['location'] == ['Hà Nội']
+    assert [record['kind'] for record in rejected] == ['jobs']
+    assert validator.errors == {'jobs[].postedDate': 1}
+
+
+def test_company_error_rejects_whole_company():
+    validator = SchemaValidator(TEMPLATE)
+    kept, rejected = validator.validate({'name': {'x': 1}, 'jobs': []})
+    assert kept is None
+    assert rejected[0]['kind'] == 'company'
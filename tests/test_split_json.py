@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from split_json import split_companies_stream
+
+COMPANIES = [{'name': f'c{i}', 'jobs': [{'title': 'Dev'}] * i} for i in range(6)]
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'companies.json'
+    path.write_text(json.dumps(COMPANIES, ensure_ascii=False, indent=2), encoding='utf-8')
+    return str(path)
+
+
+def split(tmp_path, input_file, **limits):
+    shards = split_companies_stream(input_file, str(tmp_path / 'part-{}.json'), **limits)
+    return [json.loads(open(path, encoding='utf-8').read()) for path, *_ in shards], shards
+
+
+def names(parts):
+    return [[company['name'] for company in part] for part in parts]
+
+
+def test_split_by_companies(tmp_path, input_file):
+    parts, shards = split(tmp_path, input_file, companies_per_file=4)
+    assert names(parts) == [['c0', 'c1', 'c2', 'c3'], ['c4', 'c5']]
+    assert [(companies, jobs) for _, companies, jobs, _ in shards] == [(4, 6), (2, 9)]
+
+
+def test_split_by_jobs_keeps_oversized_company_whole(tmp_path, input_file):
+    parts, _ = split(tmp_path, input_file, jobs_per_file=4)
+    assert names(parts) == [['c0', 'c1', 'c2'], ['c3'], ['c4'], ['c5']]
+
+
+def test_split_by_bytes(tmp_path, input_file):
+    parts, shards = split(tmp_path, input_file, bytes_per_file=300)
+    assert sum(parts, []) == COMPANIES
+    for path, companies, _, size in shards:
+        assert size == len(open(path, 'rb').read())
+        assert size <= 300 or companies == 1
+
+
+def test_pretty_shard_matches_json_dump(tmp_path, input_file):
+    parts, shards = split(tmp_path, input_file, companies_per_file=10)
+    assert open(shards[0][0], encoding='utf-8').read() == json.dumps(COMPANIES, ensure_ascii=False, indent=2)
+
+
+@pytest.mark.parametrize('limits', [{}, {'companies_per_file': 1, 'jobs_per_file': 1}, {'companies_per_file': 0}])
+def test_invalid_limits(tmp_path, input_file, limits):
+    with pytest.raises(ValueError):
+        split_companies_stream(input_file, str(tmp_path / 'part-{}.json'), **limits)
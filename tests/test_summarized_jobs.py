@@ -0,0 +1,114 @@
+import json
+import sys
+
+import pytest
+
+import summarized_jobs
+from bench_summarize import summarize_text_legacy
+from summarized_jobs import input_signature, load_checkpoint, summarize_text
+
+LONG = 'Thiết kế API cho hệ thống thanh toán. ' * 10
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'companies.json'
+    companies = [{'name': f'c{i}', 'jobs': [{'title': 'Dev', 'description': LONG}]} for i in range(5)]
+    path.write_text(json.dumps(companies, ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+def run_main(monkeypatch, input_file, output_file):
+    monkeypatch.setattr(sys, 'argv', ['summarized_jobs.py', '-i', str(input_file), '-o', str(output_file),
+                                      '-w', '1', '--progress-interval', '3600'])
+    summarized_jobs.main()
+
+
+def test_summarize_text_keeps_whole_sentences():
+    assert summarize_text('ngắn') == 'ngắn'
+    summary = summarize_text(LONG)
+    assert len(summary) <= 200
+    assert summary.startswith('Thiết kế API cho hệ thống thanh toán. Thiết kế')
+    assert not summary.endswith('.')
+
+
+@pytest.mark.parametrize('text', [
+    LONG,
+    'x' * 300,
+    'một hai ba ' * 40,
+    'Yêu cầu:\n- Python\n- SQL;  Docker. ' * 12,
+    '  ' + 'Câu rất dài không có dấu chấm ' * 10 + '. Câu sau.',
+    'a. ' * 150,
+    'Mô tả ngắn; '.ljust(199, '.') + ' cuối',
+])
+@pytest.mark.parametrize('max_length', [50, 200])
+def test_summarize_text_matches_legacy(text, max_length):
+    assert summarize_text(text, max_length) == summarize_text_legacy(text, max_length)
+
+
+def test_iter_sentences():
+    assert list(summarized_jobs.iter_sentences('A. B;  C- D\n\nE.  ')) == ['A', 'B', 'C', 'D', 'E']
+
+
+def test_resume_truncates_partial_line(monkeypatch, tmp_path, input_file):
+    output_file = tmp_path / 'out.json'
+    run_main(monkeypatch, input_file, output_file)
+    expected = json.loads(output_file.read_text(encoding='utf-8'))
+    assert [c['name'] for c in expected] == ['c0', 'c1', 'c2', 'c3', 'c4']
+    assert all(c['jobs'][0]['descriptionSum'] for c in expected)
+
+    # Journal của một lần chạy bị ngắt sau company thứ 2, dòng thứ 3 ghi dở
+    journal = tmp_path / 'out_temp.jsonl'
+    output_file.unlink()
+    load_checkpoint(str(journal), input_signature(str(input_file)))
+    spans = list(summarized_jobs.iter_array_spans(str(input_file)))
+    lines = [summarized_jobs.process_company((i, offset + length, company))[0]
+             for i, (offset, length, company) in enumerate(spans[:3])]
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write(lines[0] + lines[1] + lines[2][:20])
+
+    assert load_checkpoint(str(journal), input_signature(str(input_file))) == (2, spans[1][0] + spans[1][1])
+    assert journal.read_text(encoding='utf-8').endswith(lines[1])
+
+    run_main(monkeypatch, input_file, output_file)
+    assert json.loads(output_file.read_text(encoding='utf-8')) == expected
+    assert not journal.exists()
+
+
+def test_journal_of_other_input_is_discarded(monkeypatch, tmp_path, input_file, capsys):
+    journal = tmp_path / 'out_temp.jsonl'
+    journal.write_text(json.dumps({'source': {'size': 1, 'mtimeNs': 0}}) + '\n' +
+                       json.dumps({'index': 0, 'nextOffset': 3, 'company': {'name': 'stale'}}) + '\n',
+                       encoding='utf-8')
+    assert load_checkpoint(str(journal), input_signature(str(input_file))) == (0, None)
+    assert 'không khớp' in capsys.readouterr().out
+
+    run_main(monkeypatch, input_file, tmp_path / 'out.json')
+    names = [c['name'] for c in json.loads((tmp_path / 'out.json').read_text(encoding='utf-8'))]
+    assert names == ['c0', 'c1', 'c2', 'c3', 'c4']
+
+
+def test_journal_without_header_is_discarded(tmp_path, input_file):
+    journal = tmp_path / 'out_temp.jsonl'
+    journal.write_text(json.dumps({'index': 0, 'nextOffset': 3, 'company': {}}) + '\n', encoding='utf-8')
+    source = input_signature(str(input_file))
+    assert load_checkpoint(str(journal), source) == (0, None)
+    assert json.loads(journal.read_text(encoding='utf-8')) == {'source': source}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_map_ordered_keeps_input_order(workers):
+    assert list(summarized_jobs.map_ordered(abs, range(0, -50, -1), workers, window=3)) == list(range(50))
+
+
+def test_iter_batches():
+    assert list(summarized_jobs.iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(summarized_jobs.iter_batches([], 2)) == []
+
+
+def test_parallel_run_matches_serial(monkeypatch, tmp_path, input_file):
+    run_main(monkeypatch, input_file, tmp_path / 'serial.json')
+    monkeypatch.setattr(sys, 'argv', ['summarized_jobs.py', '-i', str(input_file), '-o', str(tmp_path / 'parallel.json'),
+                                      '-w', '2', '--batch-size', '2', '--progress-interval', '3600'])
+    summarized_jobs.main()
+    assert (tmp_path / 'parallel.json').read_bytes() == (tmp_path / 'serial.json').read_bytes()